@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量清理 HelloAGENTS 遗留方案包
+
+一次扫描 plan/ 识别遗留方案包，以单个事务批量迁移至 archive/（全部成功或全部回滚），_index.md 只写入一次。
+
+遗留判定（满足任一即可）:
+    all_done:    所有任务已完成
+    no_pending:  没有待执行任务（含失败/跳过）
+    stale_age:   创建时间早于 --older-than 指定天数
+
+迁移状态: 所有任务已完成 → completed，其余 → skipped
+
+Usage:
+    python clean_packages.py [<package-name> ...] [--all] [--older-than <days>] [--dry-run] [--path <base-path>]
+
+Examples:
+    python clean_packages.py --dry-run                 # 预览遗留方案包
+    python clean_packages.py                           # 迁移所有遗留方案包
+    python clean_packages.py --older-than 30           # 同时清理 30 天前创建的方案包
+    python clean_packages.py --all                     # 迁移 plan/ 中全部方案包
+    python clean_packages.py 202501_a 202501_b         # 迁移指定方案包（用户选择）
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# 确保能找到同目录下的 utils 模块
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import (
+    setup_encoding,
+    get_plan_path,
+    get_archive_path,
+    parse_package_name,
+    validate_base_path,
+    ExecutionReport
+)
+from validate_package import parse_tasks
+from migrate_package import migrate_batch, recover_migrations
+
+
+def inspect_package(package_path: Path, cutoff: Optional[str]) -> Dict:
+    """
+    读取 tasks.md 并判定方案包是否遗留
+
+    Args:
+        package_path: 方案包目录
+        cutoff: 12 位时间戳阈值，早于此值视为过期；None 表示不按时间判定
+
+    Returns:
+        {"name", "path", "reasons": [str], "status", "tasks": {...}}
+    """
+    info = {
+        "name": package_path.name,
+        "path": str(package_path),
+        "reasons": [],
+        "status": "skipped",
+        "tasks": None
+    }
+
+    tasks_file = package_path / "tasks.md"
+    if tasks_file.is_file():
+        tasks = parse_tasks(tasks_file.read_text(encoding='utf-8'))
+        by_status = tasks["by_status"]
+        info["tasks"] = {"total": tasks["total"], **by_status}
+        # 无任务项（概述文档/空模板）不按任务状态判定
+        if tasks["total"] > 0:
+            if by_status["completed"] == tasks["total"]:
+                info["reasons"].append("all_done")
+                info["status"] = "completed"
+            if by_status["pending"] == 0:
+                info["reasons"].append("no_pending")
+
+    parsed = parse_package_name(package_path.name)
+    if cutoff and parsed and parsed[0] < cutoff:
+        info["reasons"].append("stale_age")
+
+    return info
+
+
+def find_stale_packages(plan_path: Path, older_than: Optional[int] = None,
+                        names: Optional[List[str]] = None, select_all: bool = False) -> List[Dict]:
+    """
+    单次扫描 plan/ 查找需要清理的方案包
+
+    Args:
+        plan_path: plan/ 目录
+        older_than: 过期天数，None 表示不按时间判定
+        names: 用户指定的方案包名称（指定时不做遗留判定）
+        select_all: 选择全部方案包
+
+    Returns:
+        待清理方案包信息列表（按名称排序）
+    """
+    if not plan_path.is_dir():
+        return []
+
+    cutoff = None
+    if older_than is not None:
+        cutoff = (datetime.now() - timedelta(days=older_than)).strftime("%Y%m%d%H%M")
+
+    selected = set(names or [])
+    result = []
+    with os.scandir(plan_path) as it:
+        entries = sorted((e for e in it if e.is_dir() and not e.name.startswith('.')), key=lambda e: e.name)
+
+    for entry in entries:
+        if selected and entry.name not in selected:
+            continue
+        info = inspect_package(Path(entry.path), cutoff)
+        if selected or select_all:
+            info["reasons"].append("selected")
+        if info["reasons"]:
+            result.append(info)
+
+    return result
+
+
+def clean_packages(plan_path: Path, archive_path: Path, older_than: Optional[int] = None,
+                   names: Optional[List[str]] = None, select_all: bool = False,
+                   dry_run: bool = False) -> ExecutionReport:
+    """
+    批量清理遗留方案包（支持 AI 降级接手）
+
+    Returns:
+        ExecutionReport: 汇总执行报告
+    """
+    report = ExecutionReport("clean_packages")
+    report.set_context(
+        plan_path=str(plan_path),
+        archive_path=str(archive_path),
+        older_than=older_than,
+        dry_run=dry_run
+    )
+
+    # 先恢复上次中断的迁移事务（回滚的方案包会回到 plan/ 并参与本次扫描）
+    if not dry_run:
+        recovered = recover_migrations(archive_path)
+        if recovered:
+            report.set_context(recovered=recovered)
+
+    packages = find_stale_packages(plan_path, older_than, names, select_all)
+    report.set_context(stale_packages=packages, total_packages=len(packages))
+
+    missing = sorted(set(names or []) - {p["name"] for p in packages})
+    if missing:
+        report.set_context(missing_packages=missing)
+
+    if not packages:
+        if missing:
+            report.mark_failed("查找方案包", [f"迁移 {n}" for n in missing], f"方案包不存在: {', '.join(missing)}")
+        else:
+            report.mark_success("plan/ 中无需要清理的方案包")
+        return report
+
+    if dry_run:
+        report.mark_success(f"预览: {len(packages)} 个方案包将被迁移（未执行任何修改）")
+        return report
+
+    # 单个事务迁移全部方案包（全部成功或全部回滚）
+    migrated = migrate_batch([(Path(pkg["path"]), pkg["status"]) for pkg in packages], archive_path, report)
+    if not migrated:
+        return report
+
+    if missing:
+        report.mark_failed(
+            f"批量迁移（{len(packages)}/{len(packages) + len(missing)} 成功）",
+            [f"迁移 {n}" for n in missing],
+            f"方案包不存在: {', '.join(missing)}"
+        )
+    else:
+        report.mark_success(f"全部 {len(packages)} 个方案包迁移完成")
+
+    return report
+
+
+def main():
+    setup_encoding()
+    parser = argparse.ArgumentParser(
+        description="批量清理 HelloAGENTS 遗留方案包"
+    )
+    parser.add_argument(
+        "packages",
+        nargs="*",
+        help="指定要清理的方案包名称（不指定则自动识别遗留方案包）"
+    )
+    parser.add_argument(
+        "--path",
+        default=None,
+        help="项目根目录 (默认: 当前目录)"
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="清理 plan/ 中的全部方案包"
+    )
+    parser.add_argument(
+        "--older-than",
+        type=int,
+        default=None,
+        metavar="DAYS",
+        help="创建时间早于指定天数的方案包视为遗留"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="仅预览待清理方案包，不执行迁移"
+    )
+
+    args = parser.parse_args()
+
+    # 验证基础路径
+    try:
+        validate_base_path(args.path)
+    except ValueError as e:
+        report = ExecutionReport("clean_packages")
+        report.mark_failed("验证基础路径", ["清理方案包"], str(e))
+        report.print_report()
+        sys.exit(1)
+
+    report = clean_packages(
+        get_plan_path(args.path),
+        get_archive_path(args.path),
+        older_than=args.older_than,
+        names=args.packages,
+        select_all=args.all,
+        dry_run=args.dry_run
+    )
+    report.print_report()
+    sys.exit(0 if report.success else 1)
+
+
+if __name__ == "__main__":
+    main()
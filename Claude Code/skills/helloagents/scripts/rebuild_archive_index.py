@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按 archive/YYYY-MM/ 目录重建归档索引（_index.md 及年份分片）
+
+手动移动、删除方案包或迁移中断后，索引会与实际归档目录不一致。本工具并行扫描所有月份目录，
+由方案包内容（tasks.md 的 @status、proposal.md 的类型/模块/决策）推导每一行，与现有索引对比后
+每个索引文件只重写一次；--check 只输出差异报告，不修改文件。
+
+- 新增: 目录存在但索引缺少的记录
+- 删除: 索引中存在但目录已不存在的记录
+- 变更: 行内容与推导结果不同（tasks.md 无 @status 时保留索引中原有的结果列）
+- 错位: 记录所在文件与其年份不符（当前年份位于 _index.md，往年位于 _index-YYYY.md）
+
+Usage:
+    python rebuild_archive_index.py [--path <base-path>] [--check] [--jobs <n>]
+
+Examples:
+    python rebuild_archive_index.py --check         # 只报告差异（存在差异时退出码为 1）
+    python rebuild_archive_index.py                 # 按归档目录重写索引
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 确保能找到同目录下的 utils 模块
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import (
+    setup_encoding,
+    get_archive_path,
+    parse_package_name,
+    get_year_month,
+    validate_base_path,
+    get_template_loader,
+    write_bytes_atomic,
+    workspace_lock
+)
+from migrate_package import (
+    INDEX_FILE_NAME,
+    INDEX_LOCK,
+    INDEX_LOG_NAME,
+    COMPACTING_SUFFIX,
+    INDEX_ROW_PATTERN,
+    INDEX_PLACEHOLDER_PATTERN,
+    SHARD_NAME_PATTERN,
+    build_index_entry,
+    read_proposal_meta,
+    read_index_log,
+    compact_archive_index,
+    shard_file_name,
+    table_header,
+    new_shard_content,
+    update_history_line
+)
+
+# 月份目录名称
+MONTH_DIR_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+# tasks.md 状态备注（由 migrate_package.py 写入）及读取上限
+STATUS_VALUE_PATTERN = re.compile(r'^> \*\*(?:@status|Status|状态):\*\*\s*(completed|skipped)\b', re.MULTILINE)
+STATUS_SCAN_LIMIT = 64 * 1024
+
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) + 4)
+
+RowKey = Tuple[str, str]
+
+
+def row_key(line: str) -> Optional[RowKey]:
+    """索引行 → (时间戳, 名称)，非记录行返回 None"""
+    match = INDEX_ROW_PATTERN.match(line)
+    return (match.group(1), match.group(2)) if match else None
+
+
+def with_result_cell(row: str, source: str) -> str:
+    """将 row 的结果列（最后一列）替换为 source 行的结果列"""
+    cells = row.split('|')
+    cells[-2] = source.rstrip().split('|')[-2]
+    return '|'.join(cells)
+
+
+def read_archived_status(task_file: Path) -> Optional[str]:
+    """读取归档方案包 tasks.md 中的 @status（completed/skipped），缺失时返回 None"""
+    try:
+        with open(task_file, "r", encoding="utf-8", errors="replace") as f:
+            head = f.read(STATUS_SCAN_LIMIT)
+    except OSError:
+        return None
+    match = STATUS_VALUE_PATTERN.search(head)
+    return match.group(1) if match else None
+
+
+def scan_month_dir(month_dir: Path) -> Tuple[List[Dict], List[str]]:
+    """
+    扫描单个月份目录
+
+    Returns:
+        ([{"key", "name", "status", "row", "misplaced"}], 无法识别的目录名)
+    """
+    packages, unknown = [], []
+    with os.scandir(month_dir) as it:
+        for entry in it:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            parsed = parse_package_name(entry.name)
+            if not parsed:
+                unknown.append(f"{month_dir.name}/{entry.name}")
+                continue
+            package_dir = Path(entry.path)
+            status = read_archived_status(package_dir / "tasks.md")
+            meta = read_proposal_meta(package_dir / "proposal.md")
+            packages.append({
+                "key": parsed,
+                "name": entry.name,
+                "status": status,
+                "row": build_index_entry(entry.name, status or "completed", meta),
+                "misplaced": get_year_month(parsed[0]) != month_dir.name
+            })
+    return packages, unknown
+
+
+def scan_archive(archive_path: Path, jobs: int = DEFAULT_JOBS) -> Tuple[Dict[RowKey, Dict], List[str]]:
+    """
+    并行扫描全部月份目录
+
+    Returns:
+        ({(时间戳, 名称): 方案包信息}, 无法识别的目录名)
+    """
+    month_dirs = sorted(
+        Path(entry.path) for entry in os.scandir(archive_path)
+        if entry.is_dir(follow_symlinks=False) and MONTH_DIR_PATTERN.match(entry.name)
+    )
+    derived: Dict[RowKey, Dict] = {}
+    unknown: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for packages, skipped in pool.map(scan_month_dir, month_dirs):
+            for package in packages:
+                derived[package["key"]] = package
+            unknown.extend(skipped)
+    return derived, sorted(unknown)
+
+
+def index_files(archive_path: Path) -> Dict[Optional[str], Path]:
+    """现有索引文件：{None: _index.md, 年份: _index-YYYY.md}"""
+    files: Dict[Optional[str], Path] = {}
+    if (archive_path / INDEX_FILE_NAME).exists():
+        files[None] = archive_path / INDEX_FILE_NAME
+    for path in archive_path.glob("_index-*.md"):
+        match = SHARD_NAME_PATTERN.match(path.name)
+        if match:
+            files[match.group(1)] = path
+    return files
+
+
+def read_index_rows(content: str) -> List[str]:
+    """第一个索引表的数据行（不含表头与分隔行）"""
+    rows = []
+    in_table = False
+    for line in content.split('\n'):
+        if not in_table:
+            in_table = line.startswith('|') and '---' in line
+        elif line.startswith('|'):
+            rows.append(line)
+        else:
+            break
+    return rows
+
+
+def replace_table_rows(content: str, rows: List[str]) -> str:
+    """
+    用给定记录替换第一个索引表的数据行
+
+    模板示例行被移除；无法识别为记录的手写行保留在表格末尾。
+    """
+    lines = content.split('\n')
+    separator = next(
+        (i for i, line in enumerate(lines) if line.startswith('|') and '---' in line),
+        None
+    )
+    if separator is None:
+        return content.rstrip('\n') + "\n\n" + "\n".join(table_header(content) + rows) + "\n"
+
+    end = separator + 1
+    while end < len(lines) and lines[end].startswith('|'):
+        end += 1
+    extra = [
+        line for line in lines[separator + 1:end]
+        if row_key(line) is None and not INDEX_PLACEHOLDER_PATTERN.match(line)
+    ]
+    lines[separator + 1:end] = rows + extra
+    return '\n'.join(lines)
+
+
+def pending_log_rows(archive_path: Path) -> List[str]:
+    """尚未合并进索引的追加日志记录（含中断合并遗留的文件）"""
+    rows = []
+    for log_file in sorted(archive_path.glob(f"{INDEX_LOG_NAME}.*{COMPACTING_SUFFIX}")):
+        rows.extend(read_index_log(log_file))
+    if (archive_path / INDEX_LOG_NAME).exists():
+        rows.extend(read_index_log(archive_path / INDEX_LOG_NAME))
+    return rows
+
+
+def diff_index(archive_path: Path, derived: Dict[RowKey, Dict], current_year: str,
+               include_log: bool = False) -> Tuple[Dict, Dict[Optional[str], str], Dict[RowKey, str]]:
+    """
+    对比现有索引与推导结果
+
+    Args:
+        include_log: 是否将未合并的追加日志视为已在索引中（只读检查时使用）
+
+    Returns:
+        (差异报告, {文件年份: 内容}, {(时间戳, 名称): 最终行})
+    """
+    contents = {year: path.read_text(encoding="utf-8") for year, path in index_files(archive_path).items()}
+    existing: Dict[RowKey, Tuple[Optional[str], str]] = {}
+    for year, content in contents.items():
+        for line in read_index_rows(content):
+            key = row_key(line)
+            if key is not None:
+                existing[key] = (year, line)
+    if include_log:
+        for line in pending_log_rows(archive_path):
+            key = row_key(line)
+            if key is not None:
+                location = existing.get(key, (None if key[0][:4] == current_year else key[0][:4], line))[0]
+                existing[key] = (location, line)
+
+    final: Dict[RowKey, str] = {}
+    report = {"added": [], "removed": [], "changed": [], "misfiled": [], "misplaced": []}
+    for key, package in derived.items():
+        row = package["row"]
+        old = existing.get(key)
+        if package["status"] is None and old is not None:
+            # 无 @status 时沿用索引中的结果列（可能是手动标注的 ⚠️/❌/🔄）
+            row = with_result_cell(row, old[1])
+        final[key] = row
+        if package["misplaced"]:
+            report["misplaced"].append(package["name"])
+        if old is None:
+            report["added"].append(package["name"])
+            continue
+        if old[1].strip() != row:
+            report["changed"].append({"name": package["name"], "old": old[1].strip(), "new": row})
+        expected = None if key[0][:4] == current_year else key[0][:4]
+        if old[0] != expected:
+            report["misfiled"].append({
+                "name": package["name"],
+                "file": INDEX_FILE_NAME if old[0] is None else shard_file_name(old[0]),
+                "expected": INDEX_FILE_NAME if expected is None else shard_file_name(expected)
+            })
+    for key in existing:
+        if key not in derived:
+            report["removed"].append(f"{key[0]}_{key[1]}")
+    report["removed"].sort()
+    report["added"].sort()
+    return report, contents, final
+
+
+def write_rebuilt_index(archive_path: Path, contents: Dict[Optional[str], str],
+                        final: Dict[RowKey, str], current_year: str) -> List[str]:
+    """
+    按年份写入全部索引文件（分片先于主索引，每个文件一次原子写入；无记录的分片被删除）
+
+    Returns:
+        写入或删除的文件名
+    """
+    by_year: Dict[str, List[str]] = {}
+    for key in sorted(final, key=lambda k: k[0], reverse=True):
+        by_year.setdefault(key[0][:4], []).append(final[key])
+
+    if None in contents:
+        main_content = contents[None]
+    else:
+        main_content = get_template_loader().load("archive/_index.md")
+        if not main_content:
+            raise FileNotFoundError("模板文件不存在: archive/_index.md")
+    header = table_header(main_content)
+
+    touched = []
+    for year, rows in sorted(by_year.items()):
+        if year == current_year:
+            continue
+        content = contents.get(year) or new_shard_content(year, header)
+        write_bytes_atomic(archive_path / shard_file_name(year), replace_table_rows(content, rows).encode("utf-8"))
+        touched.append(shard_file_name(year))
+    for year in contents:
+        # 无记录的往年分片与当前年份分片（记录已移回主索引）
+        if year is not None and (year == current_year or year not in by_year):
+            (archive_path / shard_file_name(year)).unlink()
+            touched.append(shard_file_name(year))
+
+    shard_years = sorted((y for y in by_year if y != current_year), reverse=True)
+    main_content = replace_table_rows(main_content, by_year.get(current_year, []))
+    main_content = update_history_line(main_content, shard_years)
+    write_bytes_atomic(archive_path / INDEX_FILE_NAME, main_content.encode("utf-8"))
+    touched.append(INDEX_FILE_NAME)
+    return touched
+
+
+def rebuild_archive_index(archive_path: Path, check: bool = False, jobs: int = DEFAULT_JOBS) -> Dict:
+    """
+    对比并（非 --check 时）重建归档索引
+
+    重建前先合并追加日志，并在 archive-index 锁内完成扫描与写入，与并发迁移的合并互斥。
+
+    Returns:
+        {"success", "check", "drift", "packages", "added", "removed", "changed", "misfiled",
+         "misplaced", "unknown_dirs", "written"?}
+    """
+    current_year = datetime.now().strftime("%Y")
+
+    def run() -> Dict:
+        derived, unknown = scan_archive(archive_path, jobs)
+        report, contents, final = diff_index(archive_path, derived, current_year, include_log=check)
+        drift = bool(report["added"] or report["removed"] or report["changed"] or report["misfiled"])
+        result = {"success": True, "check": check, "drift": drift, "packages": len(derived),
+                  **report, "unknown_dirs": unknown}
+        if not check and (drift or None not in contents):
+            result["written"] = write_rebuilt_index(archive_path, contents, final, current_year)
+        return result
+
+    if check:
+        return run()
+    compact_archive_index(archive_path)
+    with workspace_lock(archive_path.parent, INDEX_LOCK):
+        return run()
+
+
+def main():
+    setup_encoding()
+    parser = argparse.ArgumentParser(
+        description="按 archive/YYYY-MM/ 目录重建归档索引"
+    )
+    parser.add_argument(
+        "--path",
+        default=None,
+        help="项目根目录（默认: 当前目录）"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="只报告索引与归档目录的差异，不修改文件（存在差异时退出码为 1）"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"扫描线程数（默认: {DEFAULT_JOBS}）"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        validate_base_path(args.path)
+    except ValueError as e:
+        print(json.dumps({"error": str(e)}, ensure_ascii=False))
+        sys.exit(1)
+
+    archive_path = get_archive_path(args.path)
+    if not archive_path.is_dir():
+        print(json.dumps({"success": False, "error": f"归档目录不存在: {archive_path}"}, ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+    try:
+        result = rebuild_archive_index(archive_path, check=args.check, jobs=args.jobs)
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}, ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    sys.exit(1 if args.check and result["drift"] else 0)
+
+
+if __name__ == "__main__":
+    main()
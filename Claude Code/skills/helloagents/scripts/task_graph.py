@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HelloAGENTS 任务依赖图分析
+解析 tasks.md 中的层级任务编号与依赖行，构建 DAG 并计算环、悬空引用、关键路径和可并行批次
+
+tasks.md 格式（与模板一致）:
+    ### 1. 阶段名称
+
+    - [ ] 1.1 任务描述
+      - 验证: 如何验证
+
+    - [ ] 1.2 任务描述
+      - 依赖: 1.1
+
+依赖引用规则:
+    - 精确匹配任务编号（如 1.1）
+    - 引用父级编号（如 1 或 1.2）时展开为其全部子任务
+    - 多个依赖以逗号、顿号或空格分隔
+"""
+
+from typing import Dict, List, Optional, Set
+
+from task_model import parse_tasks_text
+
+# 视为已结束的状态（其后继任务可执行）
+CLOSED_STATUSES = {"completed", "skipped"}
+
+
+def parse_task_dependencies(tasks_content: str) -> List[Dict]:
+    """
+    解析任务及其依赖声明
+
+    Args:
+        tasks_content: tasks.md 内容
+
+    Returns:
+        [{"id", "status", "line", "description", "depends_on": [str]}]
+        无编号的任务使用 "#<序号>" 作为编号
+    """
+    return [
+        {
+            "id": task.id,
+            "status": task.status,
+            "line": task.line,
+            "description": task.description,
+            "depends_on": list(task.depends_on)
+        }
+        for task in parse_tasks_text(tasks_content).tasks
+    ]
+
+
+def build_prefix_index(task_ids: List[str]) -> Dict[str, List[str]]:
+    """
+    按父级编号索引任务（"1" 与 "1.2" 都能查到 "1.2.3"），保持任务顺序
+
+    Returns:
+        {父级编号: [任务编号]}
+    """
+    index: Dict[str, List[str]] = {}
+    for tid in task_ids:
+        parts = tid.split(".")
+        for i in range(1, len(parts)):
+            index.setdefault(".".join(parts[:i]), []).append(tid)
+    return index
+
+
+def resolve_reference(ref: str, id_set: Set[str], prefix_index: Dict[str, List[str]]) -> List[str]:
+    """
+    将依赖引用解析为任务编号
+
+    Args:
+        ref: 依赖引用（如 "1.1" 或父级 "1"）
+        id_set: 全部任务编号
+        prefix_index: build_prefix_index() 的结果
+
+    Returns:
+        匹配的任务编号列表，无法解析时为空
+    """
+    if ref in id_set:
+        return [ref]
+    return list(prefix_index.get(ref, []))
+
+
+def find_cycles(nodes: List[str], edges: Dict[str, List[str]]) -> List[List[str]]:
+    """
+    查找依赖环（Tarjan 强连通分量，迭代实现）
+
+    Args:
+        nodes: 节点列表
+        edges: 邻接表 {task: [依赖的任务]}
+
+    Returns:
+        环列表，每个环为按原始顺序排列的任务编号
+    """
+    order = {node: i for i, node in enumerate(nodes)}
+    index_of: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack = set()
+    stack: List[str] = []
+    cycles: List[List[str]] = []
+    counter = 0
+
+    for root in nodes:
+        if root in index_of:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child_idx = work.pop()
+            if child_idx == 0:
+                index_of[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack.add(node)
+            children = edges.get(node, [])
+            if child_idx < len(children):
+                work.append((node, child_idx + 1))
+                child = children[child_idx]
+                if child not in index_of:
+                    work.append((child, 0))
+                elif child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+                continue
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in edges.get(node, []):
+                    cycles.append(sorted(component, key=order.get))
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    cycles.sort(key=lambda c: order[c[0]])
+    return cycles
+
+
+def build_task_graph(tasks: List[Dict], durations: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    构建任务依赖图并分析
+
+    Args:
+        tasks: parse_task_dependencies() 的结果
+        durations: 可选的任务耗时 {task_id: 秒}，缺省时每个任务权重为 1
+
+    Returns:
+        {
+            "valid": bool,               # 无环且无悬空引用
+            "tasks": [...],              # 含解析后的 depends_on
+            "edges": [[from, to]],       # from 依赖 to
+            "cycles": [[task_id]],
+            "dangling": [{"task", "ref", "line"}],
+            "critical_path": {"length", "tasks"},
+            "waves": [[task_id]],        # 未完成任务的可并行批次
+            "blocked": [task_id]         # 处于环中或依赖环的未完成任务
+        }
+    """
+    task_ids = [t["id"] for t in tasks]
+    position = {tid: i for i, tid in enumerate(task_ids)}
+    by_id = {t["id"]: t for t in tasks}
+    id_set = set(task_ids)
+    prefix_index = build_prefix_index(task_ids)
+    edges: Dict[str, List[str]] = {tid: [] for tid in task_ids}
+    dangling = []
+
+    for task in tasks:
+        for ref in task["depends_on"]:
+            targets = [tid for tid in resolve_reference(ref, id_set, prefix_index) if tid != task["id"] or ref == task["id"]]
+            if not targets:
+                dangling.append({"task": task["id"], "ref": ref, "line": task["line"]})
+            for target in targets:
+                if target not in edges[task["id"]]:
+                    edges[task["id"]].append(target)
+
+    cycles = find_cycles(task_ids, edges)
+    in_cycle = {tid for cycle in cycles for tid in cycle}
+
+    # 拓扑序（Kahn），环中节点及其后继不会出现在结果中
+    dependents: Dict[str, List[str]] = {tid: [] for tid in task_ids}
+    remaining = {}
+    for tid in task_ids:
+        remaining[tid] = len(edges[tid])
+        for dep in edges[tid]:
+            dependents[dep].append(tid)
+    topo: List[str] = []
+    frontier = [tid for tid in task_ids if remaining[tid] == 0]
+    while frontier:
+        topo.extend(frontier)
+        next_frontier = []
+        for tid in frontier:
+            for succ in dependents[tid]:
+                remaining[succ] -= 1
+                if remaining[succ] == 0:
+                    next_frontier.append(succ)
+        frontier = sorted(next_frontier, key=position.get)
+    acyclic = set(topo)
+
+    # 关键路径（DAG 上的最长加权路径）
+    weight = {tid: (durations or {}).get(tid, 1.0) for tid in task_ids}
+    dist: Dict[str, float] = {}
+    prev: Dict[str, Optional[str]] = {}
+    for tid in topo:
+        best, best_dep = 0.0, None
+        for dep in edges[tid]:
+            if dist.get(dep, 0.0) > best:
+                best, best_dep = dist[dep], dep
+        dist[tid] = best + weight[tid]
+        prev[tid] = best_dep
+    critical: List[str] = []
+    if dist:
+        node: Optional[str] = max(topo, key=lambda t: (dist[t], -position[t]))
+        length = dist[node]
+        while node is not None:
+            critical.append(node)
+            node = prev[node]
+        critical.reverse()
+    else:
+        length = 0
+
+    # 可并行批次：仅包含未结束任务，已结束的依赖视为满足
+    open_ids = [tid for tid in topo if by_id[tid]["status"] not in CLOSED_STATUSES]
+    open_set = set(open_ids)
+    level: Dict[str, int] = {}
+    for tid in topo:
+        if tid not in open_set:
+            continue
+        deps = [level[d] for d in edges[tid] if d in level]
+        level[tid] = (max(deps) + 1) if deps else 0
+    waves: List[List[str]] = []
+    for tid in open_ids:
+        while len(waves) <= level[tid]:
+            waves.append([])
+        waves[level[tid]].append(tid)
+
+    blocked = [
+        tid for tid in task_ids
+        if tid not in acyclic and by_id[tid]["status"] not in CLOSED_STATUSES
+    ]
+
+    return {
+        "valid": not cycles and not dangling,
+        "tasks": [dict(t, depends_on=edges[t["id"]], in_cycle=t["id"] in in_cycle) for t in tasks],
+        "edges": [[tid, dep] for tid in task_ids for dep in edges[tid]],
+        "cycles": cycles,
+        "dangling": dangling,
+        "critical_path": {"length": length, "tasks": critical},
+        "waves": waves,
+        "blocked": blocked
+    }
+
+
+def analyze_tasks(tasks_content: str, durations: Optional[Dict[str, float]] = None) -> Dict:
+    """解析 tasks.md 内容并返回依赖图分析结果"""
+    return build_task_graph(parse_task_dependencies(tasks_content), durations)
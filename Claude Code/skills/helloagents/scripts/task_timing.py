@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HelloAGENTS 任务计时（.timing.jsonl）
+
+每个方案包目录下的 .timing.jsonl 以追加方式记录任务事件，随方案包一起迁移到 archive/:
+    {"ts": 1735689600.0, "task": "1.1", "event": "start", "worker": "w1"}
+    {"ts": 1735689720.5, "task": "1.1", "event": "status", "status": "completed", "worker": null}
+
+事件来源:
+    - start:  task_timing.py start 或 task_scheduler.py claim
+    - status: update_task.py 或 task_scheduler.py complete（状态改回 pending 视为重置）
+
+报告内容: 任务耗时、阶段耗时、吞吐量（已完成任务/小时）、空闲间隔、关键路径耗时；
+可汇总 plan/ 与 archive/ 中所有带计时记录的方案包。
+
+Usage:
+    python task_timing.py start <package-name> <task-id> [<task-id> ...] [--worker <id>] [--path <base-path>]
+    python task_timing.py report [<package-name>] [--archive] [--min-gap <秒>] [--path <base-path>]
+
+Examples:
+    python task_timing.py start 202501_feat 1.2          # 记录任务 1.2 开始执行
+    python task_timing.py report 202501_feat             # 单个方案包计时报告
+    python task_timing.py report --archive               # 汇总 plan/ 与 archive/ 中的计时记录
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 确保能找到同目录下的 utils 模块
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import (
+    setup_encoding,
+    get_plan_path,
+    get_archive_path,
+    validate_base_path
+)
+from task_graph import analyze_tasks
+from task_model import parse_tasks_file
+
+# 计时文件（位于方案包目录下）
+TIMING_FILE = ".timing.jsonl"
+
+# 报告中忽略的短空闲间隔（秒）
+DEFAULT_MIN_GAP = 60.0
+
+# 汇总报告中列出的最慢任务数
+SLOWEST_LIMIT = 10
+
+
+def record_events(package_path: Path, events: List[Dict]) -> None:
+    """
+    追加计时事件（单次 O_APPEND 写入，多个执行者并发追加时行不会交错）
+
+    Args:
+        package_path: 方案包目录
+        events: [{"task", "event", "status"?, "worker"?}]，缺少 ts 时使用当前时间
+    """
+    if not events:
+        return
+    now = time.time()
+    payload = "".join(
+        json.dumps({"ts": event.get("ts", now), **event}, ensure_ascii=False) + "\n"
+        for event in events
+    ).encode("utf-8")
+    fd = os.open(package_path / TIMING_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, payload)
+    finally:
+        os.close(fd)
+
+
+def load_events(timing_file: Path) -> List[Dict]:
+    """读取计时事件（跳过损坏行），按时间排序"""
+    events = []
+    with open(timing_file, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict) and isinstance(event.get("ts"), (int, float)) and event.get("task"):
+                events.append(event)
+    events.sort(key=lambda e: e["ts"])
+    return events
+
+
+def build_intervals(events: List[Dict]) -> Dict:
+    """
+    将事件序列转换为任务区间
+
+    同一任务多次开始时取最后一次（崩溃后被接管）；没有开始事件的任务以上一个任务结束时间
+    作为开始（顺序执行场景），并标记 inferred。
+
+    Returns:
+        {"intervals": {task_id: {"task", "start", "end", "seconds", "status", "inferred"}},
+         "running": {task_id: start}}
+    """
+    intervals: Dict[str, Dict] = {}
+    running: Dict[str, float] = {}
+    last_end: Optional[float] = None
+
+    for event in events:
+        task, ts = str(event["task"]), float(event["ts"])
+        if event.get("event") == "start":
+            running[task] = ts
+            continue
+        if event.get("event") != "status":
+            continue
+        if event.get("status") == "pending":
+            running.pop(task, None)
+            intervals.pop(task, None)
+            continue
+        start = running.pop(task, None)
+        inferred = start is None
+        if inferred:
+            start = last_end if last_end is not None and last_end <= ts else ts
+        intervals[task] = {
+            "task": task,
+            "start": start,
+            "end": ts,
+            "seconds": ts - start,
+            "status": event.get("status"),
+            "inferred": inferred
+        }
+        last_end = ts if last_end is None else max(last_end, ts)
+
+    return {"intervals": intervals, "running": running}
+
+
+def find_idle_gaps(intervals: List[Dict], min_gap: float) -> List[Dict]:
+    """合并忙碌区间，返回其间不短于 min_gap 的空闲间隔"""
+    gaps = []
+    busy_end: Optional[float] = None
+    for item in sorted(intervals, key=lambda i: i["start"]):
+        if busy_end is not None and item["start"] - busy_end >= min_gap and item["start"] > busy_end:
+            gaps.append({"start": busy_end, "end": item["start"], "seconds": item["start"] - busy_end,
+                         "before_task": item["task"]})
+        busy_end = item["end"] if busy_end is None else max(busy_end, item["end"])
+    return gaps
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts).isoformat(timespec="seconds") if ts is not None else None
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(float(value), 1) if value is not None else None
+
+
+def package_timing(package_path: Path, min_gap: float = DEFAULT_MIN_GAP) -> Dict:
+    """
+    计算单个方案包的计时报告
+
+    Returns:
+        {
+            "name", "path", "events": int,
+            "span_seconds", "busy_seconds", "idle_seconds", "throughput_per_hour",
+            "tasks": [{"task", "phase", "start", "end", "seconds", "status", "inferred"}],
+            "running": [{"task", "start"}],
+            "phases": [{"phase", "title", "tasks", "task_seconds", "span_seconds"}],
+            "idle_gaps": [{"start", "end", "seconds", "before_task"}],
+            "critical_path": {"seconds", "tasks"}
+        }
+    """
+    timing_file = package_path / TIMING_FILE
+    events = load_events(timing_file) if timing_file.is_file() else []
+    state = build_intervals(events)
+    intervals = state["intervals"]
+
+    # 任务 → 阶段（tasks.md 缺失时按编号首段分组）
+    task_file = package_path / "tasks.md"
+    doc = parse_tasks_file(task_file) if task_file.is_file() else None
+    phases: Dict[str, Dict] = {}
+    phase_of: Dict[str, str] = {}
+    if doc is not None:
+        for task in doc.tasks:
+            if task.phase is not None:
+                key = task.phase.number or task.phase.title
+                phase_of[task.id] = key
+                phases.setdefault(key, {"phase": key, "title": task.phase.title})
+
+    ordered = sorted(intervals.values(), key=lambda i: (i["start"], i["end"]))
+    phase_rows: Dict[str, Dict] = {}
+    for item in ordered:
+        key = phase_of.get(item["task"], item["task"].split(".")[0])
+        row = phase_rows.setdefault(key, {
+            **phases.get(key, {"phase": key, "title": None}),
+            "tasks": 0, "task_seconds": 0.0, "start": item["start"], "end": item["end"]
+        })
+        row["tasks"] += 1
+        row["task_seconds"] += item["seconds"]
+        row["start"] = min(row["start"], item["start"])
+        row["end"] = max(row["end"], item["end"])
+
+    gaps = find_idle_gaps(ordered, min_gap)
+    all_gaps = find_idle_gaps(ordered, 0.0)
+    span = (max(i["end"] for i in ordered) - ordered[0]["start"]) if ordered else 0.0
+    idle = sum(g["seconds"] for g in all_gaps)
+    completed = sum(1 for i in ordered if i["status"] == "completed")
+
+    critical = {"seconds": None, "tasks": []}
+    if doc is not None and intervals:
+        durations = {task.id: intervals[task.id]["seconds"] if task.id in intervals else 0.0 for task in doc.tasks}
+        graph = analyze_tasks(task_file.read_text(encoding="utf-8"), durations)
+        critical = {"seconds": _round(graph["critical_path"]["length"]), "tasks": graph["critical_path"]["tasks"]}
+
+    return {
+        "name": package_path.name,
+        "path": str(package_path),
+        "events": len(events),
+        "span_seconds": _round(span),
+        "busy_seconds": _round(span - idle),
+        "idle_seconds": _round(idle),
+        "throughput_per_hour": _round(completed * 3600 / span) if span > 0 else None,
+        "tasks": [
+            {"task": i["task"], "phase": phase_of.get(i["task"], i["task"].split(".")[0]),
+             "start": _iso(i["start"]), "end": _iso(i["end"]), "seconds": _round(i["seconds"]),
+             "status": i["status"], "inferred": i["inferred"]}
+            for i in ordered
+        ],
+        "running": [{"task": t, "start": _iso(ts)} for t, ts in sorted(state["running"].items(), key=lambda x: x[1])],
+        "phases": [
+            {"phase": r["phase"], "title": r["title"], "tasks": r["tasks"],
+             "task_seconds": _round(r["task_seconds"]), "span_seconds": _round(r["end"] - r["start"])}
+            for r in phase_rows.values()
+        ],
+        "idle_gaps": [
+            {"start": _iso(g["start"]), "end": _iso(g["end"]), "seconds": _round(g["seconds"]),
+             "before_task": g["before_task"]}
+            for g in gaps
+        ],
+        "critical_path": critical
+    }
+
+
+def collect_timed_packages(plan_path: Path, archive_path: Optional[Path] = None) -> List[Dict]:
+    """收集带计时记录的方案包: [{"scope", "path"}]（plan/ 在前，archive/ 按年月排序）"""
+    found = []
+    if plan_path.is_dir():
+        for item in sorted(plan_path.iterdir()):
+            if (item / TIMING_FILE).is_file():
+                found.append({"scope": "plan", "path": item})
+    if archive_path is not None and archive_path.is_dir():
+        for month_dir in sorted(archive_path.iterdir()):
+            if not month_dir.is_dir() or month_dir.name.startswith("."):
+                continue
+            for item in sorted(month_dir.iterdir()):
+                if (item / TIMING_FILE).is_file():
+                    found.append({"scope": "archive", "path": item})
+    return found
+
+
+def aggregate_timing(plan_path: Path, archive_path: Optional[Path] = None,
+                     min_gap: float = DEFAULT_MIN_GAP) -> Dict:
+    """
+    汇总多个方案包的计时报告
+
+    Returns:
+        {"packages", "tasks", "completed", "span_seconds", "busy_seconds", "idle_seconds",
+         "throughput_per_hour", "task_seconds": {"mean", "median", "p90"},
+         "by_package": [...], "slowest_tasks": [...]}
+    """
+    rows = []
+    durations = []
+    slowest = []
+    totals = {"tasks": 0, "completed": 0, "span": 0.0, "busy": 0.0, "idle": 0.0}
+
+    for entry in collect_timed_packages(plan_path, archive_path):
+        report = package_timing(entry["path"], min_gap)
+        completed = sum(1 for t in report["tasks"] if t["status"] == "completed")
+        totals["tasks"] += len(report["tasks"])
+        totals["completed"] += completed
+        totals["span"] += report["span_seconds"] or 0.0
+        totals["busy"] += report["busy_seconds"] or 0.0
+        totals["idle"] += report["idle_seconds"] or 0.0
+        for task in report["tasks"]:
+            durations.append(task["seconds"])
+            slowest.append({"package": report["name"], "task": task["task"], "seconds": task["seconds"]})
+        rows.append({
+            "name": report["name"],
+            "scope": entry["scope"],
+            "tasks": len(report["tasks"]),
+            "completed": completed,
+            "span_seconds": report["span_seconds"],
+            "idle_seconds": report["idle_seconds"],
+            "throughput_per_hour": report["throughput_per_hour"],
+            "critical_path_seconds": report["critical_path"]["seconds"]
+        })
+
+    slowest.sort(key=lambda t: t["seconds"], reverse=True)
+    durations.sort()
+    return {
+        "packages": len(rows),
+        "tasks": totals["tasks"],
+        "completed": totals["completed"],
+        "span_seconds": _round(totals["span"]),
+        "busy_seconds": _round(totals["busy"]),
+        "idle_seconds": _round(totals["idle"]),
+        "throughput_per_hour": _round(totals["completed"] * 3600 / totals["span"]) if totals["span"] > 0 else None,
+        "task_seconds": {
+            "mean": _round(statistics.mean(durations)) if durations else None,
+            "median": _round(statistics.median(durations)) if durations else None,
+            "p90": _round(durations[min(len(durations) - 1, int(len(durations) * 0.9))]) if durations else None
+        },
+        "by_package": rows,
+        "slowest_tasks": slowest[:SLOWEST_LIMIT]
+    }
+
+
+def resolve_package(base_path: Optional[str], package: str) -> Path:
+    """方案包名称或路径 → 目录"""
+    package_path = get_plan_path(base_path) / package
+    return package_path if package_path.is_dir() else Path(package)
+
+
+def main():
+    setup_encoding()
+    parser = argparse.ArgumentParser(
+        description="记录与统计方案包任务耗时"
+    )
+    parser.add_argument("command", choices=["start", "report"], help="start: 记录任务开始; report: 计时报告")
+    parser.add_argument("package", nargs="?", help="方案包名称（report 不指定时汇总所有方案包）")
+    parser.add_argument("tasks", nargs="*", help="任务编号（start 使用）")
+    parser.add_argument("--worker", default=None, help="执行者标识（start 使用）")
+    parser.add_argument("--archive", action="store_true", help="汇总时包含 archive/ 中的方案包")
+    parser.add_argument("--min-gap", type=float, default=DEFAULT_MIN_GAP, metavar="SECONDS",
+                        help=f"报告的最短空闲间隔（默认: {DEFAULT_MIN_GAP:g} 秒）")
+    parser.add_argument("--path", default=None, help="项目根目录 (默认: 当前目录)")
+
+    args = parser.parse_args()
+
+    try:
+        validate_base_path(args.path)
+    except ValueError as e:
+        print(json.dumps({"error": str(e), "success": False}, ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+    if args.command == "start":
+        if not args.package or not args.tasks:
+            print(json.dumps({"error": "start 需要指定方案包和任务编号", "success": False},
+                             ensure_ascii=False, indent=2))
+            sys.exit(1)
+        package_path = resolve_package(args.path, args.package)
+        if not package_path.is_dir():
+            print(json.dumps({"error": f"方案包不存在: {args.package}", "success": False},
+                             ensure_ascii=False, indent=2))
+            sys.exit(1)
+        record_events(package_path, [{"task": t, "event": "start", "worker": args.worker} for t in args.tasks])
+        print(json.dumps({"success": True, "package": package_path.name, "started": args.tasks},
+                         ensure_ascii=False, indent=2))
+        return
+
+    if args.package:
+        package_path = resolve_package(args.path, args.package)
+        if not package_path.is_dir():
+            print(json.dumps({"error": f"方案包不存在: {args.package}", "success": False},
+                             ensure_ascii=False, indent=2))
+            sys.exit(1)
+        result = package_timing(package_path, args.min_gap)
+    else:
+        archive_path = get_archive_path(args.path) if args.archive else None
+        result = aggregate_timing(get_plan_path(args.path), archive_path, args.min_gap)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原地更新 tasks.md 任务状态
+
+通过任务模型的字节偏移定位任务，只替换状态符号所在的字节，并在"执行备注"表格末尾追加记录，
+同时按内存中的任务状态重新计算"执行状态"代码块；读改写期间持有方案包锁，整个文件原子写入（不会出现半写入或改动其他行）。
+每次状态变更都会追加到方案包的 .timing.jsonl（见 task_timing.py）。
+
+Usage:
+    python update_task.py <package-name> <task-id> [<task-id> ...] --status <status> [--note <text>] [--path <base-path>]
+    python update_task.py <package-name> --batch <updates.json|-> [--path <base-path>]
+
+    status: pending / completed / failed / skipped / uncertain
+    batch:  JSON 数组 [{"task": "1.1", "status": "completed", "note": "可选"}]
+
+Examples:
+    python update_task.py 202501_feat 1.1 --status completed
+    python update_task.py 202501_feat 1.2 --status failed --note "接口签名变更，需确认"
+    python update_task.py 202501_feat 2.1 2.2 2.3 --status skipped --note "被 1.3 覆盖"
+    echo '[{"task":"1.1","status":"completed"}]' | python update_task.py 202501_feat --batch -
+"""
+
+import argparse
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 确保能找到同目录下的 utils 模块
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import (
+    setup_encoding,
+    get_plan_path,
+    validate_base_path,
+    write_bytes_atomic,
+    tasks_lock,
+    ExecutionReport
+)
+from task_model import STATUS_CHARS, TaskDocument, parse_task_stream, status_block_patch, status_summary
+from task_timing import record_events
+
+# 执行备注章节与表头（与 plan/tasks.md 模板一致）
+NOTES_SECTION = "执行备注"
+NOTES_TABLE_HEADER = "| 任务 | 状态 | 备注 |\n|------|------|------|\n"
+
+
+def escape_cell(text: str) -> str:
+    """转义表格单元格内容（竖线、换行）"""
+    return " ".join(text.replace("|", "\\|").split()) or "-"
+
+
+def find_notes_insert(data: bytes, doc: TaskDocument) -> Tuple[int, bytes]:
+    """
+    定位执行备注表格的追加位置
+
+    Returns:
+        (偏移, 需在记录前插入的内容)：章节或表头缺失时前缀中包含补全内容
+    """
+    section = doc.section(NOTES_SECTION)
+    if section is None:
+        lead = b"\n" if data and not data.endswith(b"\n") else b""
+        return len(data), lead + f"\n## {NOTES_SECTION}\n\n{NOTES_TABLE_HEADER}".encode("utf-8")
+
+    last_row_end = None
+    pos = section.start
+    for line in data[section.start:section.end].splitlines(keepends=True):
+        pos += len(line)
+        if line.lstrip().startswith(b"|"):
+            last_row_end = pos
+
+    if last_row_end is not None:
+        lead = b"" if data[last_row_end - 1:last_row_end] == b"\n" else b"\n"
+        return last_row_end, lead
+
+    lead = b"" if data[section.end - 1:section.end] == b"\n" else b"\n"
+    return section.end, lead + b"\n" + NOTES_TABLE_HEADER.encode("utf-8")
+
+
+def apply_patches(data: bytes, patches: List[Tuple[int, int, bytes]]) -> bytes:
+    """按偏移拼接补丁（区间互不重叠），未涉及的字节原样保留"""
+    pieces = []
+    cursor = 0
+    for start, end, replacement in sorted(patches, key=lambda p: (p[0], p[1])):
+        pieces.append(data[cursor:start])
+        pieces.append(replacement)
+        cursor = end
+    pieces.append(data[cursor:])
+    return b"".join(pieces)
+
+
+def update_tasks(task_file: Path, updates: List[Dict]) -> Dict:
+    """
+    批量更新任务状态（单次读取、单次原子写入）
+
+    读取到写入全程持有方案包的 tasks.md 锁，并发更新不会互相覆盖。
+
+    Args:
+        task_file: tasks.md 路径
+        updates: [{"task": str, "status": str, "note": Optional[str]}]，同一任务多次更新时以最后一次为准
+
+    Returns:
+        {"updated": [{"task", "line", "from", "to"}], "missing": [task_id], "notes_added": int,
+         "status": 执行状态取值, "doc": TaskDocument}
+    """
+    with tasks_lock(task_file):
+        data = task_file.read_bytes()
+        doc = parse_task_stream(io.BytesIO(data))
+
+        final: Dict[str, Dict] = {}
+        rows = []
+        missing = []
+        for update in updates:
+            task = doc.find(update["task"])
+            if task is None:
+                if update["task"] not in missing:
+                    missing.append(update["task"])
+                continue
+            entry = final.setdefault(task.id, {"task": task.id, "line": task.line, "from": task.status})
+            entry["to"] = update["status"]
+            rows.append(f"| {task.id} | {update['status']} | {escape_cell(update.get('note') or '')} |\n")
+
+        patches = []
+        for entry in final.values():
+            task = doc.find(entry["task"])
+            old = STATUS_CHARS[task.status].encode("utf-8")
+            patches.append((task.status_offset, task.status_offset + len(old), STATUS_CHARS[entry["to"]].encode("utf-8")))
+            task.status = entry["to"]
+
+        if rows:
+            offset, lead = find_notes_insert(data, doc)
+            patches.append((offset, offset, lead + "".join(rows).encode("utf-8")))
+
+        if patches:
+            status_patch = status_block_patch(doc, data)
+            if status_patch is not None:
+                patches.append(status_patch)
+            write_bytes_atomic(task_file, apply_patches(data, patches))
+
+    return {"updated": list(final.values()), "missing": missing, "notes_added": len(rows),
+            "status": status_summary(doc), "doc": doc}
+
+
+def run_update(package_path: Path, updates: List[Dict]) -> ExecutionReport:
+    """
+    更新方案包任务状态（支持 AI 降级接手）
+
+    Returns:
+        ExecutionReport: 执行报告
+    """
+    report = ExecutionReport("update_task")
+    task_file = package_path / "tasks.md"
+    report.set_context(package=package_path.name, task_file=str(task_file))
+    pending = [f"将任务 {u['task']} 状态更新为 {u['status']}" for u in updates]
+
+    if not task_file.is_file():
+        report.mark_failed("读取 tasks.md", pending, f"tasks.md 不存在: {task_file}")
+        return report
+
+    try:
+        result = update_tasks(task_file, updates)
+    except Exception as e:
+        report.mark_failed("更新 tasks.md", pending, str(e))
+        return report
+
+    report.set_context(updated=result["updated"], missing=result["missing"], status=result["status"])
+    try:
+        record_events(package_path, [
+            {"task": u["task"], "event": "status", "status": u["to"], "worker": None} for u in result["updated"]
+        ])
+    except OSError as e:
+        # 计时记录失败不影响状态更新
+        report.set_context(timing_error=str(e))
+    if result["updated"]:
+        report.mark_completed(
+            "更新任务状态",
+            ", ".join(f"{u['task']}: {u['from']} → {u['to']}" for u in result["updated"]),
+            "检查对应任务行的状态符号"
+        )
+    if result["notes_added"]:
+        report.mark_completed(
+            f"追加{NOTES_SECTION}",
+            f"{result['notes_added']} 条记录",
+            f"检查 {NOTES_SECTION} 表格末尾"
+        )
+
+    if result["missing"]:
+        report.mark_failed(
+            "定位任务",
+            [p for u, p in zip(updates, pending) if u["task"] in result["missing"]],
+            f"tasks.md 中不存在任务: {', '.join(result['missing'])}"
+        )
+    else:
+        report.mark_success(f"已更新 {len(result['updated'])} 个任务")
+    return report
+
+
+def load_batch(source: str) -> List[Dict]:
+    """读取批量更新 JSON（文件路径或 - 表示 stdin）"""
+    text = sys.stdin.read() if source == "-" else Path(source).read_text(encoding="utf-8")
+    items = json.loads(text)
+    if not isinstance(items, list):
+        raise ValueError("批量更新必须是 JSON 数组")
+    updates = []
+    for item in items:
+        status = item.get("status")
+        if status not in STATUS_CHARS or not item.get("task"):
+            raise ValueError(f"无效的更新项: {item}")
+        updates.append({"task": str(item["task"]), "status": status, "note": item.get("note")})
+    return updates
+
+
+def resolve_package(base_path: Optional[str], package: str) -> Path:
+    """方案包名称或路径 → 目录"""
+    package_path = get_plan_path(base_path) / package
+    return package_path if package_path.is_dir() else Path(package)
+
+
+def main():
+    setup_encoding()
+    parser = argparse.ArgumentParser(
+        description="原地更新 tasks.md 任务状态"
+    )
+    parser.add_argument("package", help="方案包名称")
+    parser.add_argument("tasks", nargs="*", help="任务编号（如 1.1）")
+    parser.add_argument("--status", choices=list(STATUS_CHARS), help="目标状态")
+    parser.add_argument("--note", default=None, help="执行备注")
+    parser.add_argument("--batch", default=None, help="批量更新 JSON 文件（- 表示 stdin）")
+    parser.add_argument("--path", default=None, help="项目根目录 (默认: 当前目录)")
+
+    args = parser.parse_args()
+
+    report = ExecutionReport("update_task")
+    try:
+        validate_base_path(args.path)
+        if args.batch:
+            updates = load_batch(args.batch)
+        elif args.tasks and args.status:
+            updates = [{"task": t, "status": args.status, "note": args.note} for t in args.tasks]
+        else:
+            raise ValueError("需要指定 <task-id> --status，或使用 --batch")
+    except (ValueError, OSError) as e:
+        report.mark_failed("解析参数", ["更新任务状态"], str(e))
+        report.print_report()
+        sys.exit(1)
+
+    report = run_update(resolve_package(args.path, args.package), updates)
+    report.print_report()
+    sys.exit(0 if report.success else 1)
+
+
+if __name__ == "__main__":
+    main()
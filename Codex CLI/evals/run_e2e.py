@@ -719,6 +719,34 @@ def _check_exec_safety_primitives(base: Path) -> List[CheckResult]:
     return results
 
 
+def _check_task_scheduler(base: Path) -> List[CheckResult]:
+    """task_scheduler.py 多进程压力测试：每个任务恰好完成一次且按依赖顺序领取。"""
+    results: List[CheckResult] = []
+
+    scheduler = base / "skills/helloagents/scripts/task_scheduler.py"
+    code, out, err = _run_py(scheduler, ["stress", "--workers", "4", "--packages", "2", "--tasks", "12"], cwd=base)
+    results.append(CheckResult("scheduler:stress_exit0", code == 0, f"exit={code}, err={err.strip()}"))
+
+    try:
+        res = json.loads(out)
+    except json.JSONDecodeError:
+        results.append(CheckResult("scheduler:stress_json", False, "task_scheduler 输出不是 JSON"))
+        return results
+
+    results.append(CheckResult(
+        "scheduler:no_duplicates",
+        not res.get("duplicates") and not res.get("missing"),
+        f"completed={res.get('completed')}/{res.get('tasks_total')}, duplicates={res.get('duplicates')}",
+    ))
+    results.append(CheckResult(
+        "scheduler:dependency_order",
+        not res.get("order_violations"),
+        f"violations={res.get('order_violations')}",
+    ))
+
+    return results
+
+
 def _lint_no_bare_references(base: Path) -> List[CheckResult]:
     """references/*.md 中非代码块内不应出现裸露的 references/...（应为显式 Markdown 链接）。"""
     root = base / "skills/helloagents/references"
@@ -880,6 +908,7 @@ def run_local_checks(*, base: Path, only: str, pattern: str) -> int:
         checks.extend(_check_create_package(base))
         checks.extend(_check_init_upgrade(base))
         checks.extend(_check_exec_safety_primitives(base))
+        checks.extend(_check_task_scheduler(base))
 
     ok = True
     for c in checks:
@@ -30,6 +30,7 @@ from utils import (
     get_template_loader,
     ExecutionReport
 )
+from task_model import refresh_status_text
 
 
 # 模板路径常量
@@ -151,9 +152,6 @@ def create_package(feature: str, base_path: str = None, pkg_type: str = "impleme
 
     # overview 类型：替换任务列表为"无执行任务"
     if pkg_type == "overview":
-        # 替换执行状态中的完成率
-        tasks_content = re.sub(r'完成率:\s*\d+%', '完成率: N/A', tasks_content)
-        tasks_content = re.sub(r'总任务:\s*\w+', '总任务: 0', tasks_content)
         # 替换任务列表部分
         tasks_content = re.sub(
             r'## 任务列表\s*\n.*?(?=\n---)',
@@ -162,6 +160,9 @@ def create_package(feature: str, base_path: str = None, pkg_type: str = "impleme
             flags=re.DOTALL
         )
 
+    # 执行状态由任务列表派生
+    tasks_content = refresh_status_text(tasks_content)
+
     # 步骤6: 写入 proposal.md
     proposal_path = package_path / "proposal.md"
     try:
@@ -5,19 +5,38 @@
 
 Usage:
     python migrate_package.py <package-name> [--path <base-path>] [--status <completed|skipped>]
+    python migrate_package.py --reshard [--path <base-path>]
+    python migrate_package.py --compact [--path <base-path>]
+
+每次迁移（含 --all 批量迁移）是一个事务: 预写日志位于 helloagents/.journal/，移动未完成时回滚，
+索引未更新时前滚；脚本启动时自动恢复上次中断的事务。
+
+archive/_index.md 只保留当前年份的记录，往年记录写入 archive/_index-YYYY.md 年份分片。
+索引记录先追加到 archive/.index_log.jsonl，再由持有 helloagents/.locks/archive-index.lock 的进程合并进
+markdown 表格；并发迁移之间只在追加日志时互斥。
 
 Examples:
     python migrate_package.py 202512191430_login
     python migrate_package.py 202512191430_login --status skipped
     python migrate_package.py --all --status skipped
+    python migrate_package.py --reshard                # 将已有 _index.md 中的往年记录拆分到年份分片
+    python migrate_package.py --compact                # 合并中断遗留的索引日志
 """
 
 import argparse
+import errno
+import json
+import os
 import re
 import shutil
+import socket
 import sys
+import tempfile
+import time
+import uuid
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 # 确保能找到同目录下的 utils 模块
 sys.path.insert(0, str(Path(__file__).parent))
@@ -33,13 +52,54 @@ from utils import (
     script_error_handler,
     validate_base_path,
     get_template_loader,
+    write_bytes_atomic,
+    workspace_lock,
+    tasks_lock,
     ExecutionReport
 )
+from task_model import parse_tasks_text
+
+# proposal.md 元信息读取上限（字节），超大提案只读取前部
+PROPOSAL_SCAN_LIMIT = 256 * 1024
+
+# 方案类型（语言无关：overview）
+PKG_TYPE_PATTERN = re.compile(r':\s*overview\b', re.IGNORECASE)
+
+# 涉及模块键与列表项
+MODULES_KEY_PATTERN = re.compile(r'^(\s*)(?:涉及模块|modules)\s*[:：]\s*(.*)$', re.IGNORECASE)
+MODULE_ITEM_PATTERN = re.compile(r'^(\s+)-\s+([^:：]+?)\s*(?:[:：].*)?$')
+MODULE_SPLIT_PATTERN = re.compile(r'[,，、]')
+
+# 决策ID（语言无关：#D001）
+DECISION_PATTERN = re.compile(r'#D\d{3}')
+
+# 索引行: | 时间戳 | 名称 | ...；模板示例行以占位符开头
+INDEX_ROW_PATTERN = re.compile(r'^\|\s*(\d{12})\s*\|\s*([^|]*?)\s*\|')
+INDEX_PLACEHOLDER_PATTERN = re.compile(r'^\|\s*\{')
+
+# 迁移事务日志目录（位于 helloagents/ 下）与方案包内的事务归属标记
+JOURNAL_DIR_NAME = ".journal"
+MIGRATION_MARKER = ".migrating"
+
+# 主索引与年份分片（主索引只保留当前年份，往年记录位于 _index-YYYY.md）
+INDEX_FILE_NAME = "_index.md"
+SHARD_NAME_PATTERN = re.compile(r'^_index-(\d{4})\.md$')
+HISTORY_LINE_PATTERN = re.compile(r'^(>\s*(?:历史年份|History)\s*[:：])')
+DEFAULT_TABLE_HEADER = (
+    "| 时间戳 | 名称 | 类型 | 涉及模块 | 决策 | 结果 |",
+    "|--------|------|------|---------|------|------|"
+)
+
+# 索引追加日志（archive/ 下）与工作空间锁名称
+INDEX_LOG_NAME = ".index_log.jsonl"
+COMPACTING_SUFFIX = ".compacting"
+INDEX_LOCK = "archive-index"
+INDEX_LOG_LOCK = "archive-index-log"
 
 
 def update_task_status(task_file: Path, status: str):
     """
-    更新 tasks.md 的状态备注
+    更新 tasks.md 的状态备注（调用方需持有 tasks_lock）
 
     Args:
         task_file: tasks.md 文件路径
@@ -57,19 +117,13 @@ def update_task_status(task_file: Path, status: str):
     else:
         status_line = f"> **@status:** skipped | {timestamp}"
 
-    # 检测是否已有状态备注（兼容新旧格式）
-    status_pattern = r'^> \*\*(?:@status|Status|状态):\*\*'
+    # 检测是否已有状态备注（兼容新旧格式，由任务模型定位）
+    status_note = parse_tasks_text(content).status_note
     lines = content.split('\n')
 
-    # 查找并替换已有的状态行
-    found_status = False
-    for i, line in enumerate(lines):
-        if re.match(status_pattern, line):
-            lines[i] = status_line
-            found_status = True
-            break
-
-    if not found_status:
+    if status_note is not None:
+        lines[status_note.line - 1] = status_line
+    else:
         # 在标题后插入
         if content.startswith('#'):
             # 找到第一个空行
@@ -85,77 +139,736 @@ def update_task_status(task_file: Path, status: str):
             lines.insert(1, '')
 
     content = '\n'.join(lines)
-    task_file.write_text(content, encoding='utf-8')
+    write_bytes_atomic(task_file, content.encode('utf-8'))
 
 
-def update_archive_index(archive_path: Path, package_name: str, status: str):
+def read_proposal_meta(proposal_file: Path, limit: int = PROPOSAL_SCAN_LIMIT) -> Dict:
     """
-    更新 archive/_index.md
+    流式读取 proposal.md 中归档索引需要的元信息（最多读取 limit 字节）
+
+    Args:
+        proposal_file: proposal.md 路径
+        limit: 读取上限（字节）
+
+    Returns:
+        {"pkg_type": str, "modules": [str], "decisions": ["#D001", ...]}
+    """
+    meta = {"pkg_type": "implementation", "modules": [], "decisions": []}
+    if not proposal_file.is_file():
+        return meta
+
+    consumed = 0
+    modules_indent = None
+    with open(proposal_file, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            consumed += len(line.encode("utf-8"))
+            if consumed > limit:
+                break
+            line = line.rstrip("\n")
+
+            # 方案类型（语言无关，与 validate_package.py 一致）
+            if PKG_TYPE_PATTERN.search(line):
+                meta["pkg_type"] = "overview"
+
+            # 决策ID（仅取标题行，正文中对其他方案决策的引用不计入）
+            if line.startswith("#"):
+                for decision in DECISION_PATTERN.findall(line):
+                    if decision not in meta["decisions"]:
+                        meta["decisions"].append(decision)
+                modules_indent = None
+                continue
+
+            # 涉及模块: a, b  或  涉及模块:\n  - a: 说明
+            key_match = MODULES_KEY_PATTERN.match(line)
+            if key_match:
+                inline = key_match.group(2).strip()
+                modules_indent = None if inline else len(key_match.group(1))
+                for name in MODULE_SPLIT_PATTERN.split(inline):
+                    _add_module(meta["modules"], name)
+                continue
+            if modules_indent is not None:
+                item_match = MODULE_ITEM_PATTERN.match(line)
+                if item_match and len(item_match.group(1)) > modules_indent:
+                    _add_module(meta["modules"], item_match.group(2))
+                    continue
+                modules_indent = None
+
+    return meta
+
+
+def _add_module(modules: List[str], name: str):
+    name = name.strip().strip("`").strip()
+    if name and "{" not in name and name not in modules:
+        modules.append(name)
+
+
+def _index_cell(text: str) -> str:
+    return text.replace("|", "\\|") or "-"
+
+
+def build_index_entry(package_name: str, status: str, meta: Optional[Dict] = None) -> Optional[str]:
+    """
+    生成 archive/_index.md 索引行
 
     Args:
-        archive_path: archive/ 目录路径
         package_name: 方案包名称
         status: 状态 (completed/skipped)
-    """
-    index_file = archive_path / "_index.md"
+        meta: read_proposal_meta() 的结果，None 时类型/模块/决策列为 "-"
 
-    # 解析方案包名称
+    Returns:
+        索引行，名称无法解析时返回 None
+    """
     parsed = parse_package_name(package_name)
     if not parsed:
-        return
+        return None
 
     timestamp, feature = parsed
-    year_month = get_year_month(timestamp)
     # 使用中文状态标识符，与模板一致（无空格格式）
     status_icon = "✅完成" if status == "completed" else "⏸未执行"
 
+    pkg_type, modules, decisions = "-", "-", "-"
+    if meta is not None:
+        pkg_type = meta["pkg_type"]
+        modules = _index_cell(", ".join(meta["modules"]))
+        if meta["decisions"]:
+            decisions = feature + ",".join(meta["decisions"])
+
     # 新记录行（6列：时间戳、名称、类型、涉及模块、决策、结果）
-    new_entry = f"| {timestamp} | {feature} | - | - | - | {status_icon} |"
+    return f"| {timestamp} | {feature} | {pkg_type} | {modules} | {decisions} | {status_icon} |"
 
-    if index_file.exists():
-        content = index_file.read_text(encoding='utf-8')
 
-        # 在索引表中插入新记录（表头之后）
-        lines = content.split('\n')
-        insert_pos = -1
-        for i, line in enumerate(lines):
-            # 检测表格分隔行（语言无关）
-            if line.startswith('|') and '---' in line:
-                insert_pos = i + 1
-                break
+def _row_key(line: str) -> Optional[Tuple[str, str]]:
+    match = INDEX_ROW_PATTERN.match(line)
+    return (match.group(1), match.group(2)) if match else None
+
+
+def merge_index_rows(content: str, rows: List[str]) -> str:
+    """
+    将索引行合并到第一个索引表，按时间戳倒序插入
+
+    同一时间戳与名称的已有行被替换（重复迁移不产生重复记录），模板示例行被移除。
+
+    Args:
+        content: 索引文件内容
+        rows: build_index_entry() 生成的索引行
+
+    Returns:
+        合并后的内容
+    """
+    lines = content.split('\n')
+    separator = next(
+        (i for i, line in enumerate(lines) if line.startswith('|') and '---' in line),
+        None
+    )
+    if separator is None:
+        return content + "\n" + "\n".join(rows)
 
-        if insert_pos > 0 and insert_pos <= len(lines):
-            lines.insert(insert_pos, new_entry)
-            content = '\n'.join(lines)
+    end = separator + 1
+    while end < len(lines) and lines[end].startswith('|'):
+        end += 1
+
+    replaced = {_row_key(row): row for row in rows}
+    pending = sorted(replaced.values(), key=lambda row: _row_key(row)[0], reverse=True)
+    merged = []
+    for line in lines[separator + 1:end]:
+        if INDEX_PLACEHOLDER_PATTERN.match(line):
+            continue
+        key = _row_key(line)
+        if key in replaced:
+            continue
+        if key is not None:
+            while pending and _row_key(pending[0])[0] > key[0]:
+                merged.append(pending.pop(0))
+        merged.append(line)
+    merged.extend(pending)
+
+    lines[separator + 1:end] = merged
+    return '\n'.join(lines)
+
+
+def shard_file_name(year: str) -> str:
+    """年份分片文件名: _index-YYYY.md"""
+    return f"_index-{year}.md"
+
+
+def list_shard_years(archive_path: Path) -> List[str]:
+    """已存在的年份分片（倒序）"""
+    years = []
+    for path in archive_path.glob("_index-*.md"):
+        match = SHARD_NAME_PATTERN.match(path.name)
+        if match:
+            years.append(match.group(1))
+    return sorted(years, reverse=True)
+
+
+def table_header(content: str) -> List[str]:
+    """提取第一个索引表的表头与分隔行（缺失时使用默认6列表头）"""
+    lines = content.split('\n')
+    for i, line in enumerate(lines):
+        if i > 0 and line.startswith('|') and '---' in line and lines[i - 1].startswith('|'):
+            return [lines[i - 1], line]
+    return list(DEFAULT_TABLE_HEADER)
+
+
+def new_shard_content(year: str, header: List[str]) -> str:
+    """新建年份分片（标题、返回主索引链接、与主索引一致的表头）"""
+    return "\n".join([
+        f"# 方案归档索引 - {year}",
+        "",
+        f"> 返回: [当前年份]({INDEX_FILE_NAME})",
+        "",
+        *header,
+        ""
+    ])
+
+
+def update_history_line(content: str, years: List[str]) -> str:
+    """
+    按已存在的分片重写主索引的"历史年份"行（无分片时为"无"，避免模板示例链接成为死链）
+    """
+    links = " | ".join(f"[{year}]({shard_file_name(year)})" for year in years) or "无"
+    lines = content.split('\n')
+    for i, line in enumerate(lines):
+        match = HISTORY_LINE_PATTERN.match(line)
+        if match:
+            lines[i] = f"{match.group(1)} {links}"
+            return '\n'.join(lines)
+    if not years:
+        return content
+    # 缺少历史年份行时插入到标题之后
+    insert_pos = 1 if lines and lines[0].startswith('#') else 0
+    lines[insert_pos:insert_pos] = ["", f"> 历史年份: {links}"]
+    return '\n'.join(lines)
+
+
+def split_index_rows(content: str, keep_year: str) -> Tuple[str, Dict[str, List[str]]]:
+    """
+    从第一个索引表中移出非 keep_year 年份的记录
+
+    Returns:
+        (剩余内容, {年份: [索引行]})
+    """
+    lines = content.split('\n')
+    moved: Dict[str, List[str]] = {}
+    kept = []
+    in_table = False
+    table_done = False
+    for line in lines:
+        if not table_done and line.startswith('|') and '---' in line:
+            in_table = True
+            kept.append(line)
+            continue
+        if in_table:
+            if not line.startswith('|'):
+                in_table = False
+                table_done = True
+            else:
+                key = _row_key(line)
+                if key is not None and key[0][:4] != keep_year:
+                    moved.setdefault(key[0][:4], []).append(line)
+                    continue
+        kept.append(line)
+    return '\n'.join(kept), moved
+
+
+def write_index_shards(archive_path: Path, shard_rows: Dict[str, List[str]], header: List[str]):
+    """将记录合并写入各年份分片（分片不存在时新建）"""
+    for year, rows in shard_rows.items():
+        shard_file = archive_path / shard_file_name(year)
+        if shard_file.exists():
+            content = shard_file.read_text(encoding='utf-8')
         else:
-            content += f"\n{new_entry}"
+            content = new_shard_content(year, header)
+        write_bytes_atomic(shard_file, merge_index_rows(content, rows).encode('utf-8'))
+
+
+def write_index_rows(archive_path: Path, rows: List[str]):
+    """
+    将索引行合并写入 archive/_index.md 及年份分片（每个文件一次读取、一次写入）
+
+    当前年份的记录写入 _index.md，其他年份写入 _index-YYYY.md；跨年后主索引中的往年记录
+    在下次写入时一并移入分片，主索引只保留当前年份。分片先于主索引写入，中断时记录不会丢失。
+    调用方需持有 archive-index 锁（见 compact_archive_index）。
+
+    Args:
+        archive_path: archive/ 目录路径
+        rows: 索引表行，按时间戳倒序合并，同一方案包的旧记录被替换
+    """
+    index_file = archive_path / INDEX_FILE_NAME
+
+    if index_file.exists():
+        content = index_file.read_text(encoding='utf-8')
     else:
         # 创建新的 _index.md - 从模板加载
         loader = get_template_loader()
-        template_content = loader.load("archive/_index.md")
-
-        if template_content:
-            # 在表格分隔行后插入新记录
-            lines = template_content.split('\n')
-            for i, line in enumerate(lines):
-                if line.startswith('|') and '---' in line:
-                    lines.insert(i + 1, new_entry)
-                    break
-            content = '\n'.join(lines)
-        else:
+        content = loader.load("archive/_index.md")
+        if not content:
             raise FileNotFoundError("模板文件不存在: archive/_index.md")
 
-    index_file.write_text(content, encoding='utf-8')
+    current_year = datetime.now().strftime("%Y")
+    content, shard_rows = split_index_rows(content, current_year)
+    main_rows = []
+    for row in rows:
+        year = _row_key(row)[0][:4]
+        if year == current_year:
+            main_rows.append(row)
+        else:
+            shard_rows.setdefault(year, []).append(row)
+
+    write_index_shards(archive_path, shard_rows, table_header(content))
+    if main_rows:
+        content = merge_index_rows(content, main_rows)
+    content = update_history_line(content, list_shard_years(archive_path))
+    write_bytes_atomic(index_file, content.encode('utf-8'))
+
+
+def append_index_log(archive_path: Path, rows: List[str]):
+    """
+    将索引行追加到 archive/.index_log.jsonl（只在追加期间持有 archive-index-log 锁）
+
+    每行一条 JSON 记录，追加后 fsync；日志由 compact_archive_index 合并进 _index.md。
+    """
+    data = "".join(json.dumps({"row": row}, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+    archive_path.mkdir(parents=True, exist_ok=True)
+    with workspace_lock(archive_path.parent, INDEX_LOG_LOCK):
+        fd = os.open(archive_path / INDEX_LOG_NAME, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def read_index_log(log_file: Path) -> List[str]:
+    """读取日志中的索引行（跳过中断写入留下的不完整行）"""
+    rows = []
+    with open(log_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line)["row"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return rows
+
+
+def compact_archive_index(archive_path: Path, blocking: bool = True) -> Optional[int]:
+    """
+    将追加日志合并进 _index.md 及年份分片
+
+    持有 archive-index 锁期间，先在 archive-index-log 锁内把日志改名为待合并文件（新的追加写入新日志），
+    再合并全部待合并文件（含上次中断遗留的）并删除。合并可重复执行：同一方案包的记录按名称替换。
+    释放锁后若又有新日志则继续合并，保证非阻塞调用方追加的记录不会滞留。
+
+    Args:
+        archive_path: archive/ 目录路径
+        blocking: 其他进程正在合并时是否等待（False 时直接返回，由持锁进程负责合并）
+
+    Returns:
+        合并的记录数；未获得锁时返回 None
+    """
+    log_file = archive_path / INDEX_LOG_NAME
+    merged = 0
+    while True:
+        with workspace_lock(archive_path.parent, INDEX_LOCK, blocking) as acquired:
+            if not acquired:
+                return None if merged == 0 else merged
+            with workspace_lock(archive_path.parent, INDEX_LOG_LOCK):
+                if log_file.exists():
+                    os.replace(log_file, log_file.with_name(
+                        f"{INDEX_LOG_NAME}.{time.time_ns()}-{os.getpid()}{COMPACTING_SUFFIX}"))
+            pending = sorted(archive_path.glob(f"{INDEX_LOG_NAME}.*{COMPACTING_SUFFIX}"))
+            rows = []
+            for pending_file in pending:
+                rows.extend(read_index_log(pending_file))
+            if rows:
+                write_index_rows(archive_path, rows)
+            for pending_file in pending:
+                pending_file.unlink()
+            merged += len(rows)
+        if not log_file.exists():
+            return merged
+
+
+def update_archive_index_entries(archive_path: Path, entries: List[Tuple[str, str]]) -> Dict:
+    """
+    批量更新 archive/_index.md 及年份分片
+
+    方案包需已迁移至 archive/YYYY-MM/，类型、涉及模块、决策列从归档后的 proposal.md 提取（不持锁）。
+    记录先追加到日志，再尝试非阻塞合并：其他进程正在合并时不等待，由其在释放锁前后一并合并，
+    因此并发迁移之间只在追加日志时互斥。
+
+    Args:
+        archive_path: archive/ 目录路径
+        entries: [(package_name, status)]
+
+    Returns:
+        {"logged": 追加的记录数, "compacted": 本进程合并的记录数（None 表示交由其他进程合并）}
+    """
+    rows = []
+    for package_name, status in entries:
+        parsed = parse_package_name(package_name)
+        if not parsed:
+            continue
+        proposal_file = archive_path / get_year_month(parsed[0]) / package_name / "proposal.md"
+        rows.append(build_index_entry(package_name, status, read_proposal_meta(proposal_file)))
+    if not rows:
+        return {"logged": 0, "compacted": 0}
+
+    append_index_log(archive_path, rows)
+    return {"logged": len(rows), "compacted": compact_archive_index(archive_path, blocking=False)}
+
+
+def reshard_archive_index(archive_path: Path) -> Dict:
+    """
+    将 archive/_index.md 中非当前年份的记录一次性拆分到年份分片
+
+    主索引逐行流式读取；往年记录直接写入各年份的临时文件，不在内存中保留整张表。
+
+    Returns:
+        {"moved": int, "kept": int, "shards": {年份: 记录数}}
+    """
+    index_file = archive_path / INDEX_FILE_NAME
+    if not index_file.exists():
+        raise FileNotFoundError(f"索引文件不存在: {index_file}")
+
+    # 先合并日志，再在 archive-index 锁内拆分，避免与并发合并互相覆盖
+    compact_archive_index(archive_path)
+    with workspace_lock(archive_path.parent, INDEX_LOCK):
+        return _reshard_locked(index_file, archive_path)
+
+
+def _reshard_locked(index_file: Path, archive_path: Path) -> Dict:
+    current_year = datetime.now().strftime("%Y")
+    result = {"moved": 0, "kept": 0, "shards": {}}
+    header: List[str] = []
+    kept_lines: List[str] = []
+    spools: Dict[str, object] = {}
+    previous = ""
+    in_table = False
+    table_done = False
+
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            for raw in f:
+                line = raw.rstrip("\n")
+                if not table_done and not in_table and line.startswith('|') and '---' in line:
+                    in_table = True
+                    header = [previous, line] if previous.startswith('|') else list(DEFAULT_TABLE_HEADER)
+                elif in_table and not line.startswith('|'):
+                    in_table = False
+                    table_done = True
+                elif in_table:
+                    key = _row_key(line)
+                    if key is not None and key[0][:4] != current_year:
+                        year = key[0][:4]
+                        if year not in spools:
+                            spools[year] = tempfile.TemporaryFile("w+", encoding="utf-8")
+                        spools[year].write(line + "\n")
+                        result["shards"][year] = result["shards"].get(year, 0) + 1
+                        result["moved"] += 1
+                        continue
+                    if key is not None:
+                        result["kept"] += 1
+                kept_lines.append(line)
+                previous = line
+
+        if not spools:
+            return result
+
+        for year, spool in spools.items():
+            spool.seek(0)
+            rows = spool.read().splitlines()
+            write_index_shards(archive_path, {year: rows}, header)
+
+        content = update_history_line('\n'.join(kept_lines), list_shard_years(archive_path))
+        write_bytes_atomic(index_file, (content + "\n").encode('utf-8'))
+    finally:
+        for spool in spools.values():
+            spool.close()
+    return result
+
+
+def update_archive_index(archive_path: Path, package_name: str, status: str):
+    """
+    更新 archive/_index.md
+
+    Args:
+        archive_path: archive/ 目录路径
+        package_name: 方案包名称
+        status: 状态 (completed/skipped)
+    """
+    update_archive_index_entries(archive_path, [(package_name, status)])
+
+
+def move_dir(source: Path, target: Path):
+    """移动目录：同一文件系统上使用 os.rename（O(1)），跨设备时退回 shutil.move"""
+    try:
+        os.rename(source, target)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(source), str(target))
+
+
+def archive_target(package_name: str, archive_base: Path) -> Tuple[str, Path, bool]:
+    """
+    计算归档目标路径
+
+    Returns:
+        (年月, 目标路径, 名称格式是否有效)，名称无法解析时使用当前年月
+    """
+    parsed = parse_package_name(package_name)
+    year_month = get_year_month(parsed[0]) if parsed else datetime.now().strftime("%Y-%m")
+    return year_month, archive_base / year_month / package_name, parsed is not None
+
+
+class MigrationError(Exception):
+    """迁移失败（已回滚或待恢复），携带失败步骤与待完成任务"""
+
+    def __init__(self, step: str, pending: List[str], message: str, rolled_back: bool):
+        super().__init__(message)
+        self.step = step
+        self.pending = pending
+        self.message = message
+        self.rolled_back = rolled_back
+
+
+class MigrationJournal:
+    """
+    迁移预写日志（helloagents/.journal/）
+
+    每个事务对应 <id>.json（原子写入）与 <id>/ 工作目录:
+        <id>/tasks/<name>.md       迁移前 tasks.md 原始内容（回滚时恢复）
+        <id>/displaced/<name>      同名覆盖时被替换的旧归档目录（提交后删除，回滚时移回）
+    移动前在方案包内写入 .migrating 标记（内容为事务ID），随目录一起移动；
+    恢复时只处理带本事务标记的方案包，提交后删除标记。
+
+    事务状态:
+        prepared  移动尚未全部完成 → 恢复时回滚（按文件系统实际状态逐包还原）
+        moved     全部方案包已移动 → 恢复时前滚（重写索引，索引合并可重复执行）
+        indexed   索引已更新       → 恢复时只清理工作目录
+    """
+
+    def __init__(self, workspace: Path):
+        self.root = workspace / JOURNAL_DIR_NAME
+
+    def record_path(self, txn_id: str) -> Path:
+        return self.root / f"{txn_id}.json"
+
+    def work_dir(self, txn_id: str) -> Path:
+        return self.root / txn_id
+
+    def save(self, txn: Dict):
+        write_bytes_atomic(self.record_path(txn["id"]), json.dumps(txn, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def begin(self, archive_base: Path, items: List[Tuple[Path, str]]) -> Dict:
+        """创建事务：备份各方案包 tasks.md 并写入 prepared 记录"""
+        txn_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        work = self.work_dir(txn_id)
+        (work / "tasks").mkdir(parents=True)
+        (work / "displaced").mkdir()
+        txn = {
+            "id": txn_id,
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "state": "prepared",
+            "archive_base": str(archive_base),
+            "packages": []
+        }
+        for package_path, status in items:
+            task_file = package_path / "tasks.md"
+            if task_file.is_file():
+                shutil.copyfile(task_file, work / "tasks" / f"{package_path.name}.md")
+            txn["packages"].append({
+                "name": package_path.name,
+                "source": str(package_path),
+                "target": str(archive_target(package_path.name, archive_base)[1]),
+                "status": status
+            })
+        self.save(txn)
+        return txn
+
+    def owns(self, txn: Dict, package_dir: Path) -> bool:
+        """方案包目录是否带有本事务的标记"""
+        try:
+            return (package_dir / MIGRATION_MARKER).read_text(encoding="utf-8").strip() == txn["id"]
+        except OSError:
+            return False
+
+    def mark(self, txn: Dict, package_dir: Path):
+        write_bytes_atomic(package_dir / MIGRATION_MARKER, txn["id"].encode("utf-8"))
+
+    def rollback(self, txn: Dict):
+        """逆序还原本事务处理过的方案包：移回 plan/、恢复被替换的旧归档、恢复 tasks.md"""
+        work = self.work_dir(txn["id"])
+        for pkg in reversed(txn["packages"]):
+            source, target = Path(pkg["source"]), Path(pkg["target"])
+            if not source.exists() and self.owns(txn, target):
+                move_dir(target, source)
+            displaced = work / "displaced" / pkg["name"]
+            if displaced.exists() and not target.exists():
+                move_dir(displaced, target)
+            if self.owns(txn, source):
+                backup = work / "tasks" / f"{pkg['name']}.md"
+                if backup.is_file():
+                    write_bytes_atomic(source / "tasks.md", backup.read_bytes())
+                (source / MIGRATION_MARKER).unlink()
+        self.finish(txn)
+
+    def roll_forward(self, txn: Dict):
+        """完成索引更新并提交"""
+        if txn["state"] == "moved":
+            update_archive_index_entries(
+                Path(txn["archive_base"]),
+                [(pkg["name"], pkg["status"]) for pkg in txn["packages"]]
+            )
+            txn["state"] = "indexed"
+            self.save(txn)
+        self.finish(txn)
+
+    def finish(self, txn: Dict):
+        """删除归属标记、工作目录（含被替换的旧归档）与事务记录"""
+        for pkg in txn["packages"]:
+            for package_dir in (Path(pkg["target"]), Path(pkg["source"])):
+                if self.owns(txn, package_dir):
+                    (package_dir / MIGRATION_MARKER).unlink()
+        shutil.rmtree(self.work_dir(txn["id"]), ignore_errors=True)
+        self.record_path(txn["id"]).unlink(missing_ok=True)
+
+    def _owner_alive(self, txn: Dict) -> bool:
+        if txn.get("host") != socket.gethostname() or txn.get("pid") == os.getpid():
+            return False
+        try:
+            os.kill(txn["pid"], 0)
+        except (OSError, KeyError, TypeError):
+            return False
+        return True
+
+    def recover(self) -> List[Dict]:
+        """
+        恢复中断的事务（跳过仍在运行的进程持有的事务）
+
+        Returns:
+            [{"id", "action": "rolled_back"|"rolled_forward"|"failed", "packages", "error"?}]
+        """
+        results = []
+        if not self.root.is_dir():
+            return results
+        for record in sorted(self.root.glob("*.json")):
+            try:
+                txn = json.loads(record.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if self._owner_alive(txn):
+                continue
+            entry = {"id": txn["id"], "packages": [p["name"] for p in txn["packages"]]}
+            try:
+                if txn["state"] == "prepared":
+                    self.rollback(txn)
+                    entry["action"] = "rolled_back"
+                else:
+                    self.roll_forward(txn)
+                    entry["action"] = "rolled_forward"
+            except Exception as e:
+                entry["action"] = "failed"
+                entry["error"] = str(e)
+            results.append(entry)
+        return results
+
+
+def recover_migrations(archive_base: Path) -> List[Dict]:
+    """恢复 archive/ 所在工作空间中中断的迁移事务，并合并遗留的索引日志（不等待正在进行的合并）"""
+    results = MigrationJournal(archive_base.parent).recover()
+    if (archive_base / INDEX_LOG_NAME).exists() or any(archive_base.glob(f"{INDEX_LOG_NAME}.*{COMPACTING_SUFFIX}")):
+        compact_archive_index(archive_base, blocking=False)
+    return results
+
+
+def transactional_migrate(items: List[Tuple[Path, str]], archive_base: Path,
+                          update_index: bool = True) -> Dict:
+    """
+    以单个事务迁移一个或多个方案包
+
+    移动阶段任一失败即回滚全部方案包；索引更新失败时事务保留为 moved 状态，
+    下次运行迁移脚本时自动前滚。
+
+    Args:
+        items: [(方案包路径, 状态)]
+        archive_base: archive/ 目录
+        update_index: 是否更新 _index.md（False 时由调用方负责，事务在移动完成后提交）
+
+    Returns:
+        {"journal": 事务ID, "targets": {name: 目标路径}, "overwritten": [name]}
+
+    Raises:
+        MigrationError: 迁移失败
+    """
+    journal = MigrationJournal(archive_base.parent)
+    txn = journal.begin(archive_base, items)
+    work = journal.work_dir(txn["id"])
+    result = {"journal": txn["id"], "targets": {}, "overwritten": []}
+
+    step = "创建归档目录"
+    pkg = txn["packages"][0]
+    try:
+        for pkg in txn["packages"]:
+            source, target = Path(pkg["source"]), Path(pkg["target"])
+            step = "创建归档目录"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # 持有 tasks.md 锁直到移动完成，并发的 update_task.py 不会覆盖状态备注或写入已迁走的文件
+            with tasks_lock(source / "tasks.md"):
+                step = "更新 tasks.md 状态"
+                journal.mark(txn, source)
+                update_task_status(source / "tasks.md", pkg["status"])
+                step = "移动方案包"
+                if target.exists():
+                    move_dir(target, work / "displaced" / pkg["name"])
+                    result["overwritten"].append(pkg["name"])
+                move_dir(source, target)
+            result["targets"][pkg["name"]] = str(target)
+    except Exception as e:
+        try:
+            journal.rollback(txn)
+            rolled_back, note = True, "已回滚，方案包保留在原位置"
+        except Exception as rollback_error:
+            rolled_back, note = False, f"回滚失败: {rollback_error}，下次运行迁移脚本时自动恢复"
+        names = [p["name"] for p in txn["packages"]]
+        raise MigrationError(
+            f"{step}（{pkg['name']}）" if len(names) > 1 else step,
+            [f"迁移 {name}" for name in names],
+            f"{e}（{note}）",
+            rolled_back=rolled_back
+        )
+
+    txn["state"] = "moved"
+    journal.save(txn)
+    if not update_index:
+        journal.finish(txn)
+        return result
+
+    try:
+        journal.roll_forward(txn)
+    except Exception as e:
+        raise MigrationError(
+            "更新 _index.md",
+            [f"在 _index.md 中添加 {p['name']} 记录（状态: {p['status']}）" for p in txn["packages"]],
+            f"{e}（方案包已迁移，下次运行迁移脚本时自动重试索引更新）",
+            rolled_back=False
+        )
+    return result
 
 
-def migrate_package(package_path: Path, archive_base: Path, status: str = "completed") -> ExecutionReport:
+def migrate_package(package_path: Path, archive_base: Path, status: str = "completed",
+                    update_index: bool = True) -> ExecutionReport:
     """
-    迁移单个方案包到 archive/（支持 AI 降级接手）
+    迁移单个方案包到 archive/（事务执行，支持 AI 降级接手）
 
     Args:
         package_path: 方案包源路径
         archive_base: archive/ 基础路径
         status: 迁移状态
+        update_index: 是否立即更新 _index.md（False 时由调用方统一写入）
 
     Returns:
         ExecutionReport: 执行报告
@@ -184,99 +897,82 @@ def migrate_package(package_path: Path, archive_base: Path, status: str = "compl
     )
 
     # 步骤2: 解析时间戳获取年月
-    parsed = parse_package_name(package_path.name)
-    if not parsed:
-        # 使用当前年月
-        year_month = datetime.now().strftime("%Y-%m")
-        report.set_context(year_month=year_month, name_format_warning=True)
-    else:
-        year_month = get_year_month(parsed[0])
-        report.set_context(year_month=year_month)
-
-    # 步骤3: 创建目标目录
-    target_dir = archive_base / year_month
-    target_path = target_dir / package_path.name
-    report.set_context(target_path=str(target_path))
+    year_month, target_path, name_ok = archive_target(package_path.name, archive_base)
+    report.set_context(year_month=year_month, target_path=str(target_path))
+    if not name_ok:
+        report.set_context(name_format_warning=True)
 
+    # 步骤3-6: 事务迁移（创建目录、更新 tasks.md、移动、更新索引）
     try:
-        target_dir.mkdir(parents=True, exist_ok=True)
-        report.mark_completed(
-            "创建归档目录",
-            str(target_dir),
-            "检查 archive/YYYY-MM/ 目录是否存在"
-        )
-    except PermissionError as e:
-        report.mark_failed(
-            "创建归档目录",
-            ["创建归档目录", "更新 tasks.md 状态", "移动方案包", "更新 _index.md"],
-            f"权限不足: {e}"
-        )
+        result = transactional_migrate([(package_path, status)], archive_base, update_index)
+    except MigrationError as e:
+        report.set_context(rolled_back=e.rolled_back)
+        report.mark_failed(e.step, e.pending, e.message)
         return report
 
-    # 步骤4: 更新 tasks.md 状态
-    task_file = package_path / "tasks.md"
-    try:
-        update_task_status(task_file, status)
+    if result["overwritten"]:
+        report.set_context(overwritten=True)
+    report.mark_completed(
+        "创建归档目录",
+        str(target_path.parent),
+        "检查 archive/YYYY-MM/ 目录是否存在"
+    )
+    report.mark_completed(
+        "更新 tasks.md 状态",
+        str(target_path / "tasks.md"),
+        "检查 tasks.md 中是否包含 @status 状态行"
+    )
+    report.mark_completed(
+        "移动方案包",
+        str(target_path),
+        "检查目标路径存在且源路径已删除"
+    )
+    if update_index:
         report.mark_completed(
-            "更新 tasks.md 状态",
-            str(task_file),
-            "检查 tasks.md 中是否包含 @status 状态行"
-        )
-    except Exception as e:
-        report.mark_failed(
-            "更新 tasks.md 状态",
-            ["更新 tasks.md 状态", "移动方案包", "更新 _index.md"],
-            str(e)
+            "更新 _index.md",
+            str(archive_base / INDEX_FILE_NAME),
+            "检查 _index.md 中是否包含新迁移的方案包记录（其他进程正在合并时短暂位于 archive/.index_log.jsonl）"
         )
-        return report
 
-    # 步骤5: 移动方案包（覆盖已存在的）
-    try:
-        if target_path.exists():
-            shutil.rmtree(target_path)
-            report.set_context(overwritten=True)
+    # 全部完成
+    report.mark_success(str(target_path))
+    return report
 
-        shutil.move(str(package_path), str(target_path))
-        report.mark_completed(
-            "移动方案包",
-            str(target_path),
-            "检查目标路径存在且源路径已删除"
-        )
-    except Exception as e:
-        report.mark_failed(
-            "移动方案包",
-            ["移动方案包", "更新 _index.md"],
-            str(e)
-        )
-        return report
 
-    # 步骤6: 更新 _index.md
+def migrate_batch(items: List[Tuple[Path, str]], archive_base: Path, report: ExecutionReport) -> bool:
+    """
+    以单个事务批量迁移方案包（全部成功或全部回滚），_index.md 只写入一次
+
+    Args:
+        items: [(方案包路径, 状态)]
+        archive_base: archive/ 目录
+        report: 汇总报告（写入每个方案包的完成记录或失败信息）
+
+    Returns:
+        是否成功
+    """
     try:
-        update_archive_index(archive_base, package_path.name, status)
+        result = transactional_migrate(items, archive_base)
+    except MigrationError as e:
+        report.set_context(success_count=0 if e.rolled_back else len(items), rolled_back=e.rolled_back)
+        report.mark_failed(e.step, e.pending, e.message)
+        return False
+
+    for package_path, _ in items:
         report.mark_completed(
-            "更新 _index.md",
-            str(archive_base / "_index.md"),
-            "检查 _index.md 中是否包含新迁移的方案包记录"
-        )
-    except FileNotFoundError as e:
-        # 模板不存在的特殊情况
-        report.mark_failed(
-            "更新 _index.md",
-            ["创建 _index.md（需包含表格：时间戳、名称、类型、涉及模块、决策、结果）"],
-            str(e)
-        )
-        return report
-    except Exception as e:
-        report.mark_failed(
-            "更新 _index.md",
-            ["更新 _index.md"],
-            str(e)
+            f"迁移 {package_path.name}",
+            result["targets"][package_path.name],
+            "检查目标路径存在且源路径已删除"
         )
-        return report
-
-    # 全部完成
-    report.mark_success(str(target_path))
-    return report
+    report.mark_completed(
+        "更新 _index.md",
+        str(archive_base / INDEX_FILE_NAME),
+        f"检查 _index.md 中是否包含 {len(items)} 条新记录"
+    )
+    report.set_context(success_count=len(items))
+    if result["overwritten"]:
+        report.set_context(overwritten=result["overwritten"])
+    return True
 
 
 def main():
@@ -305,6 +1001,16 @@ def main():
         action="store_true",
         help="迁移 plan/ 中的所有方案包"
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="将 archive/.index_log.jsonl 中的待合并记录写入 _index.md"
+    )
+    parser.add_argument(
+        "--reshard",
+        action="store_true",
+        help="将 archive/_index.md 中的往年记录拆分到 _index-YYYY.md"
+    )
 
     args = parser.parse_args()
 
@@ -320,13 +1026,70 @@ def main():
     plan_path = get_plan_path(args.path)
     archive_path = get_archive_path(args.path)
 
+    # 恢复上次中断的迁移事务（回滚未完成的移动或前滚索引更新）
+    recovered = recover_migrations(archive_path)
+
+    if args.compact:
+        report = ExecutionReport("migrate_package")
+        report.set_context(mode="compact", index_file=str(archive_path / INDEX_FILE_NAME))
+        if recovered:
+            report.set_context(recovered=recovered)
+        try:
+            merged = compact_archive_index(archive_path)
+        except Exception as e:
+            report.mark_failed(
+                "合并索引日志",
+                ["将 archive/.index_log.jsonl 中的记录写入 _index.md"],
+                str(e)
+            )
+            report.print_report()
+            sys.exit(1)
+        report.set_context(merged=merged)
+        if merged:
+            report.mark_completed(
+                "合并索引日志",
+                f"{merged} 条记录",
+                "检查 _index.md 中包含日志中的方案包记录且 archive/.index_log.jsonl 已删除"
+            )
+        report.mark_success(f"合并 {merged} 条索引记录")
+        report.print_report()
+        sys.exit(0)
+
+    if args.reshard:
+        report = ExecutionReport("migrate_package")
+        report.set_context(mode="reshard", index_file=str(archive_path / INDEX_FILE_NAME))
+        if recovered:
+            report.set_context(recovered=recovered)
+        try:
+            result = reshard_archive_index(archive_path)
+        except Exception as e:
+            report.mark_failed(
+                "拆分 _index.md",
+                ["将 _index.md 中往年记录移入 _index-YYYY.md", "更新 _index.md 历史年份链接"],
+                str(e)
+            )
+            report.print_report()
+            sys.exit(1)
+        report.set_context(**result)
+        if result["moved"]:
+            report.mark_completed(
+                "拆分 _index.md",
+                ", ".join(f"{shard_file_name(y)}: {n}" for y, n in sorted(result["shards"].items())),
+                "检查往年记录已移入对应分片且 _index.md 历史年份链接有效"
+            )
+        report.mark_success(f"移出 {result['moved']} 条往年记录，保留 {result['kept']} 条当前年份记录")
+        report.print_report()
+        sys.exit(0)
+
     if args.all:
-        # 迁移所有方案包 - 返回汇总报告
-        packages = list_packages(plan_path)
+        # 迁移所有方案包 - 返回汇总报告（迁移不需要任务数，不读取 tasks.md）
+        packages = list_packages(plan_path, with_tasks=False)
 
         if not packages:
             report = ExecutionReport("migrate_package")
             report.set_context(mode="all", status=args.status)
+            if recovered:
+                report.set_context(recovered=recovered)
             report.mark_success("plan/ 目录为空，无方案包需要迁移")
             report.print_report()
             sys.exit(0)
@@ -338,43 +1101,14 @@ def main():
             status=args.status,
             total_packages=len(packages)
         )
+        if recovered:
+            summary_report.set_context(recovered=recovered)
 
-        success_count = 0
-        failed_packages = []
-
-        for pkg in packages:
-            pkg_report = migrate_package(pkg['path'], archive_path, args.status)
-            if pkg_report.success:
-                success_count += 1
-                summary_report.mark_completed(
-                    f"迁移 {pkg['name']}",
-                    pkg_report.context.get("target_path", ""),
-                    "检查目标路径存在"
-                )
-            else:
-                failed_packages.append({
-                    "name": pkg['name'],
-                    "failed_at": pkg_report.failed_at,
-                    "error": pkg_report.error_message
-                })
-
-        if failed_packages:
-            summary_report.set_context(
-                success_count=success_count,
-                failed_packages=failed_packages
-            )
-            pending = [f"迁移 {p['name']}" for p in failed_packages]
-            summary_report.mark_failed(
-                f"批量迁移（{success_count}/{len(packages)} 成功）",
-                pending,
-                f"{len(failed_packages)} 个方案包迁移失败"
-            )
-        else:
-            summary_report.set_context(success_count=success_count)
-            summary_report.mark_success(f"全部 {success_count} 个方案包迁移完成")
-
+        # 单个事务迁移全部方案包（全部成功或全部回滚），_index.md 只写入一次
+        if migrate_batch([(pkg['path'], args.status) for pkg in packages], archive_path, summary_report):
+            summary_report.mark_success(f"全部 {len(packages)} 个方案包迁移完成")
         summary_report.print_report()
-        sys.exit(0 if not failed_packages else 1)
+        sys.exit(0 if summary_report.success else 1)
 
     elif args.package:
         # 迁移单个方案包
@@ -387,6 +1121,8 @@ def main():
             sys.exit(1)
 
         report = migrate_package(package_path, archive_path, args.status)
+        if recovered:
+            report.set_context(recovered=recovered)
         report.print_report()
         sys.exit(0 if report.success else 1)
 
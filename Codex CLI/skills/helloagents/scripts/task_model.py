@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HelloAGENTS tasks.md 任务模型（流式解析）
+逐行读取 tasks.md，生成 阶段 → 任务 → 子项 的紧凑树，每个节点携带精确的行号与字节偏移
+
+节点:
+    Section   ## 二级标题（如 "执行状态"、"任务列表"）
+    Phase     ### N. 阶段标题
+    Task      - [ ] 1.1 任务描述（按缩进嵌套子任务）
+    Note      任务下的子项（  - 验证: ... / - 依赖: ... / 其他说明）
+
+偏移约定:
+    start/end 为 UTF-8 字节偏移，半开区间 [start, end)，end 位于末行换行符之后
+    Task.status_offset 为状态符号（[ ] 中的字符）的字节偏移，可用于原地修改状态
+    TaskDocument.status_block 为 "执行状态" 代码块内容的字节区间（不含围栏行）
+    line 为 1 起始行号
+
+执行状态:
+    "执行状态" 代码块（总任务/已完成/完成率）是派生内容，由 status_block_patch() 按任务列表重新计算
+
+Usage（库模块）:
+    from task_model import parse_tasks_file
+    doc = parse_tasks_file(Path("tasks.md"))
+    task = doc.find("1.2")
+    print(task.line, task.status_offset, task.depends_on)
+"""
+
+import io
+import re
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# 任务状态符号
+TASK_STATUS = {
+    " ": "pending",
+    "√": "completed",
+    "X": "failed",
+    "-": "skipped",
+    "?": "uncertain"
+}
+
+# 状态 → 符号
+STATUS_CHARS = {status: char for char, status in TASK_STATUS.items()}
+
+# 任务行: - [ ] 1.1 描述（允许缩进）
+TASK_LINE_PATTERN = re.compile(r'^([ \t]*)[-*]\s*\[([ √X\-?])\]\s*(.*?)\s*$')
+
+# 任务编号: 1 / 1.1 / 1.2.3
+TASK_ID_PATTERN = re.compile(r'^(\d+(?:\.\d+)*)\.?\s+(.*)$')
+
+# 阶段标题: ### 1. 阶段名称
+PHASE_PATTERN = re.compile(r'^###\s+(?:(\d+(?:\.\d+)*)\.?\s+)?(.*?)\s*$')
+
+# 二级标题
+SECTION_PATTERN = re.compile(r'^##\s+(.*?)\s*$')
+
+# 子项: "  - 键: 值" 或 "  - 说明"
+NOTE_PATTERN = re.compile(r'^([ \t]+)[-*]\s+(.*?)\s*$')
+NOTE_KEY_PATTERN = re.compile(r'^([^:：`\[]{1,20}?)\s*[:：]\s*(.*)$')
+
+# 执行状态代码块（由任务列表派生）
+STATUS_SECTION = "执行状态"
+STATUS_BLOCK_KEYS = ("总任务", "已完成", "完成率")
+STATUS_BLOCK_LINE_PATTERN = re.compile(r'^[ \t]*(总任务|已完成|完成率)[ \t]*[:：].*$', re.MULTILINE)
+
+# 状态备注行（migrate_package.py 写入）
+STATUS_NOTE_PATTERN = re.compile(r'^> \*\*(?:@status|Status|状态):\*\*')
+
+# 子项类型
+DEPENDENCY_KEYS = {"依赖", "前置", "depends", "depends on", "dep", "deps"}
+VERIFY_KEYS = {"验证", "verify", "verification"}
+
+# 依赖值分隔符与"无依赖"取值
+DEPENDENCY_SPLIT_PATTERN = re.compile(r'[,，、;；\s]+')
+NO_DEPENDENCY_VALUES = {"无", "none", "-", "n/a", "na"}
+
+
+class Section:
+    """## 二级标题"""
+    __slots__ = ("title", "line", "start", "end")
+
+    def __init__(self, title: str, line: int, start: int, end: int):
+        self.title = title
+        self.line = line
+        self.start = start
+        self.end = end
+
+    def to_dict(self) -> Dict:
+        return {"title": self.title, "line": self.line, "start": self.start, "end": self.end}
+
+
+class Note:
+    """任务子项（kind: verify / depends / note）"""
+    __slots__ = ("kind", "key", "value", "line", "start", "end")
+
+    def __init__(self, kind: str, key: Optional[str], value: str, line: int, start: int, end: int):
+        self.kind = kind
+        self.key = key
+        self.value = value
+        self.line = line
+        self.start = start
+        self.end = end
+
+    def to_dict(self) -> Dict:
+        return {"kind": self.kind, "key": self.key, "value": self.value,
+                "line": self.line, "start": self.start, "end": self.end}
+
+
+class Task:
+    """任务节点"""
+    __slots__ = ("id", "status", "description", "indent", "line", "start", "end",
+                 "status_offset", "phase", "parent", "notes", "children", "depends_on")
+
+    def __init__(self, task_id: str, status: str, description: str, indent: int,
+                 line: int, start: int, end: int, status_offset: int):
+        self.id = task_id
+        self.status = status
+        self.description = description
+        self.indent = indent
+        self.line = line
+        self.start = start
+        self.end = end
+        self.status_offset = status_offset
+        self.phase: Optional["Phase"] = None
+        self.parent: Optional["Task"] = None
+        self.notes: List[Note] = []
+        self.children: List["Task"] = []
+        self.depends_on: List[str] = []
+
+    @property
+    def verification(self) -> List[str]:
+        return [n.value for n in self.notes if n.kind == "verify"]
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "description": self.description,
+            "line": self.line,
+            "start": self.start,
+            "end": self.end,
+            "status_offset": self.status_offset,
+            "phase": self.phase.number if self.phase else None,
+            "parent": self.parent.id if self.parent else None,
+            "depends_on": list(self.depends_on),
+            "notes": [n.to_dict() for n in self.notes],
+            "children": [c.id for c in self.children]
+        }
+
+
+class Phase:
+    """### 阶段节点"""
+    __slots__ = ("number", "title", "line", "start", "end", "tasks")
+
+    def __init__(self, number: Optional[str], title: str, line: int, start: int, end: int):
+        self.number = number
+        self.title = title
+        self.line = line
+        self.start = start
+        self.end = end
+        self.tasks: List[Task] = []
+
+    def to_dict(self) -> Dict:
+        return {"number": self.number, "title": self.title, "line": self.line,
+                "start": self.start, "end": self.end, "tasks": [t.id for t in self.tasks]}
+
+
+class TaskDocument:
+    """tasks.md 解析结果"""
+    __slots__ = ("sections", "phases", "tasks", "status_note", "status_block", "size", "lines", "_by_id")
+
+    def __init__(self):
+        self.sections: List[Section] = []
+        self.phases: List[Phase] = []
+        self.tasks: List[Task] = []          # 全部任务（文档顺序，含嵌套子任务）
+        self.status_note: Optional[Note] = None
+        self.status_block: Optional[Tuple[int, int]] = None
+        self.size = 0
+        self.lines = 0
+        self._by_id: Optional[Dict[str, Task]] = None
+
+    @property
+    def by_id(self) -> Dict[str, Task]:
+        if self._by_id is None:
+            self._by_id = {}
+            for task in self.tasks:
+                self._by_id.setdefault(task.id, task)
+        return self._by_id
+
+    def find(self, task_id: str) -> Optional[Task]:
+        """按编号查找任务"""
+        return self.by_id.get(task_id)
+
+    def section(self, title: str) -> Optional[Section]:
+        """按标题查找二级标题（忽略编号前缀）"""
+        for section in self.sections:
+            if section.title == title or re.sub(r'^\d+\.\s*', '', section.title) == title:
+                return section
+        return None
+
+    def counts(self) -> Dict:
+        """任务统计: {"total", "by_status": {status: n}}"""
+        by_status = {status: 0 for status in TASK_STATUS.values()}
+        for task in self.tasks:
+            by_status[task.status] += 1
+        return {"total": len(self.tasks), "by_status": by_status}
+
+    def to_dict(self) -> Dict:
+        return {
+            "size": self.size,
+            "lines": self.lines,
+            "sections": [s.to_dict() for s in self.sections],
+            "phases": [p.to_dict() for p in self.phases],
+            "tasks": [t.to_dict() for t in self.tasks],
+            "status_note": self.status_note.to_dict() if self.status_note else None,
+            "status_block": list(self.status_block) if self.status_block else None,
+            **self.counts()
+        }
+
+
+def _indent_width(indent: str) -> int:
+    return len(indent.expandtabs(4))
+
+
+def _byte_len(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _parse_dependencies(value: str) -> List[str]:
+    refs = []
+    for ref in DEPENDENCY_SPLIT_PATTERN.split(value.strip()):
+        ref = ref.strip().strip('`').rstrip('.')
+        if ref and ref.lower() not in NO_DEPENDENCY_VALUES and ref not in refs:
+            refs.append(ref)
+    return refs
+
+
+def parse_task_stream(stream: BinaryIO) -> TaskDocument:
+    """
+    流式解析 tasks.md（逐行读取，内存占用与任务数成正比而非文件大小）
+
+    Args:
+        stream: 以二进制模式打开的文件对象
+
+    Returns:
+        TaskDocument
+    """
+    doc = TaskDocument()
+    offset = 0
+    lineno = 0
+    in_fence = False
+    phase: Optional[Phase] = None
+    section: Optional[Section] = None
+    stack: List[Task] = []   # 当前打开的任务（按缩进递增）
+    block_start: Optional[int] = None   # 执行状态代码块内容起点
+
+    def _extend(end: int) -> None:
+        for task in stack:
+            task.end = end
+        if phase is not None:
+            phase.end = end
+
+    for raw in stream:
+        lineno += 1
+        start = offset
+        offset += len(raw)
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+        if section is not None and line.strip():
+            section.end = offset
+
+        stripped = line.lstrip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            in_fence = not in_fence
+            if in_fence and doc.status_block is None and section is not None \
+                    and re.sub(r'^\d+\.\s*', '', section.title) == STATUS_SECTION:
+                block_start = offset
+            elif not in_fence and block_start is not None:
+                doc.status_block = (block_start, start)
+                block_start = None
+            if stack and line[:1] in (" ", "\t"):
+                _extend(offset)
+            continue
+        if in_fence:
+            if stack and line[:1] in (" ", "\t"):
+                _extend(offset)
+            continue
+
+        if not line.strip():
+            continue
+
+        task_match = TASK_LINE_PATTERN.match(line)
+        if task_match:
+            indent = _indent_width(task_match.group(1))
+            text = task_match.group(3)
+            id_match = TASK_ID_PATTERN.match(text)
+            if id_match:
+                task_id, description = id_match.group(1), id_match.group(2).strip()
+            else:
+                task_id, description = f"#{len(doc.tasks) + 1}", text
+            task = Task(
+                task_id,
+                TASK_STATUS.get(task_match.group(2), "pending"),
+                description,
+                indent,
+                lineno,
+                start,
+                offset,
+                start + _byte_len(line[:task_match.start(2)])
+            )
+            while stack and stack[-1].indent >= indent:
+                stack.pop()
+            if stack:
+                task.parent = stack[-1]
+                stack[-1].children.append(task)
+            task.phase = phase
+            if phase is not None:
+                phase.tasks.append(task)
+            doc.tasks.append(task)
+            stack.append(task)
+            _extend(offset)
+            continue
+
+        if line.startswith("#"):
+            stack.clear()
+            phase_match = PHASE_PATTERN.match(line)
+            if phase_match:
+                phase = Phase(phase_match.group(1), phase_match.group(2), lineno, start, offset)
+                doc.phases.append(phase)
+                continue
+            section_match = SECTION_PATTERN.match(line)
+            if section_match:
+                phase = None
+                section = Section(section_match.group(1), lineno, start, offset)
+                doc.sections.append(section)
+            continue
+
+        if doc.status_note is None and STATUS_NOTE_PATTERN.match(line):
+            doc.status_note = Note("status", "@status", line, lineno, start, offset)
+            continue
+
+        if line[:1] not in (" ", "\t"):
+            # 顶格的非任务内容结束任务范围
+            stack.clear()
+            continue
+
+        indent = _indent_width(line[:len(line) - len(stripped)])
+        while stack and stack[-1].indent >= indent:
+            stack.pop()
+        if not stack:
+            continue
+
+        owner = stack[-1]
+        note_match = NOTE_PATTERN.match(line)
+        if note_match:
+            body = note_match.group(2)
+            key_match = NOTE_KEY_PATTERN.match(body)
+            key, value = (key_match.group(1).strip(), key_match.group(2).strip()) if key_match else (None, body)
+            lowered = key.lower() if key else None
+            if lowered in DEPENDENCY_KEYS:
+                kind = "depends"
+                for ref in _parse_dependencies(value):
+                    if ref not in owner.depends_on:
+                        owner.depends_on.append(ref)
+            elif lowered in VERIFY_KEYS:
+                kind = "verify"
+            else:
+                kind = "note"
+            owner.notes.append(Note(kind, key, value, lineno, start, offset))
+        _extend(offset)
+
+    doc.size = offset
+    doc.lines = lineno
+    return doc
+
+
+def status_summary(doc: TaskDocument) -> Dict[str, str]:
+    """执行状态取值: {"总任务", "已完成", "完成率"}（无任务时完成率为 N/A）"""
+    total = len(doc.tasks)
+    completed = sum(1 for task in doc.tasks if task.status == "completed")
+    return {
+        "总任务": str(total),
+        "已完成": str(completed),
+        "完成率": f"{completed * 100 // total}%" if total else "N/A"
+    }
+
+
+def render_status_block(body: str, summary: Dict[str, str]) -> str:
+    """
+    按 summary 重写执行状态代码块内容
+
+    只替换 总任务/已完成/完成率 行的取值，其他行原样保留，缺失的键追加在末尾
+    """
+    seen = set()
+
+    def _replace(match: "re.Match") -> str:
+        seen.add(match.group(1))
+        return f"{match.group(1)}: {summary[match.group(1)]}"
+
+    body = STATUS_BLOCK_LINE_PATTERN.sub(_replace, body)
+    missing = "".join(f"{key}: {summary[key]}\n" for key in STATUS_BLOCK_KEYS if key not in seen)
+    if missing and body and not body.endswith("\n"):
+        body += "\n"
+    return body + missing
+
+
+def status_block_patch(doc: TaskDocument, data: bytes) -> Optional[Tuple[int, int, bytes]]:
+    """
+    计算执行状态代码块的补丁
+
+    Args:
+        doc: 解析结果（任务状态可已在内存中修改）
+        data: 解析时的原始字节
+
+    Returns:
+        (start, end, 新内容)；无执行状态代码块或内容已是最新时返回 None
+    """
+    if doc.status_block is None:
+        return None
+    start, end = doc.status_block
+    body = data[start:end].decode("utf-8", errors="replace")
+    updated = render_status_block(body, status_summary(doc))
+    if updated == body:
+        return None
+    return start, end, updated.encode("utf-8")
+
+
+def refresh_status_text(content: str) -> str:
+    """重新计算 tasks.md 文本中的执行状态代码块"""
+    data = content.encode("utf-8")
+    patch = status_block_patch(parse_task_stream(io.BytesIO(data)), data)
+    if patch is None:
+        return content
+    start, end, replacement = patch
+    return (data[:start] + replacement + data[end:]).decode("utf-8")
+
+
+def parse_tasks_text(content: str) -> TaskDocument:
+    """解析 tasks.md 文本内容"""
+    return parse_task_stream(io.BytesIO(content.encode("utf-8")))
+
+
+def parse_tasks_file(task_file: Path) -> TaskDocument:
+    """流式解析 tasks.md 文件"""
+    with open(task_file, "rb") as f:
+        return parse_task_stream(f)
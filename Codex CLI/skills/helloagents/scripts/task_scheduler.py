@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HelloAGENTS 多执行者任务调度（租约文件）
+
+多个执行者共享同一工作空间时，按依赖顺序分配方案包/任务的独占租约，避免重复执行。
+
+租约机制:
+    - 租约文件位于 helloagents/.scheduler/<package>/<task>.lease
+    - 获取: 先写临时文件再 os.link 到租约路径（目标已存在即失败），内容始终完整
+    - 过期: 超过 expires_at 的租约可被其他执行者接管（崩溃的执行者不会永久占用任务）
+    - 互斥: 接管、心跳、释放与完成都在 <task>.lock 文件锁内校验令牌与有效期后再修改租约
+    - 心跳: 持有者在过期前调用 heartbeat 续期；令牌不匹配或已过期说明租约已丢失，应停止执行
+    - 完成: 更新 tasks.md 任务状态并原子创建 <task>.done 标记，再删除租约；已完成的任务不会再次分配
+    - 计时: 领取与完成分别向方案包 .timing.jsonl 追加 start/status 事件（见 task_timing.py）
+
+分配规则:
+    - 方案包按名称顺序，任务按 tasks.md 顺序
+    - 仅分配依赖全部结束（completed/skipped）的任务，依赖失败的任务视为 blocked
+    - 其他执行者持有方案包租约（claim --scope package）时跳过该方案包
+
+Usage:
+    python task_scheduler.py claim --worker <id> [--package <name>] [--scope task|package] [--ttl <秒>]
+    python task_scheduler.py heartbeat --package <name> [--task <id>] --token <token> [--ttl <秒>]
+    python task_scheduler.py complete --package <name> --task <id> --token <token> [--status completed|failed|skipped]
+    python task_scheduler.py release --package <name> [--task <id>] --token <token>
+    python task_scheduler.py status [--package <name>]
+    python task_scheduler.py reset [--package <name>]
+    python task_scheduler.py stress [--workers <N>] [--packages <N>] [--tasks <N>]
+
+Examples:
+    python task_scheduler.py claim --worker w1                 # 领取下一个可执行任务
+    python task_scheduler.py claim --worker w1 --scope package # 独占领取下一个方案包
+    python task_scheduler.py complete --package 202501_feat --task 1.2 --token <token>
+    python task_scheduler.py status                            # 查看租约与可执行任务
+    python task_scheduler.py stress --workers 8                # 本地多进程压力测试
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 确保能找到同目录下的 utils 模块
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import (
+    setup_encoding,
+    get_workspace_path,
+    get_plan_path,
+    validate_base_path,
+    file_lock
+)
+from task_graph import analyze_tasks, CLOSED_STATUSES
+from task_timing import record_events
+from update_task import update_tasks
+
+# 调度状态目录（位于 helloagents/ 下）
+SCHEDULER_DIR = ".scheduler"
+
+# 方案包级租约使用的键
+PACKAGE_LEASE_KEY = "__package__"
+
+LEASE_SUFFIX = ".lease"
+DONE_SUFFIX = ".done"
+LOCK_SUFFIX = ".lock"
+
+# 默认租约有效期（秒）
+DEFAULT_TTL = 300
+
+# 完成状态
+COMPLETE_STATUSES = ("completed", "failed", "skipped")
+
+
+def default_worker_id() -> str:
+    """默认执行者标识: <主机名>:<进程号>"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def task_key(task_id: str) -> str:
+    """任务编号转文件名（#n 形式的编号去掉 #）"""
+    return task_id.replace("#", "n").replace(os.sep, "_")
+
+
+def read_json_file(path: Path) -> Optional[Dict]:
+    """读取 JSON 文件，不存在或内容损坏时返回 None"""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def create_exclusive(path: Path, data: Dict) -> bool:
+    """
+    原子创建文件（已存在时失败）
+
+    先写入同目录临时文件，再通过硬链接发布，读者永远看不到半写入的内容。
+
+    Returns:
+        是否创建成功
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        try:
+            os.link(tmp, path)
+            return True
+        except FileExistsError:
+            return False
+    finally:
+        os.unlink(tmp)
+
+
+def replace_file(path: Path, data: Dict) -> None:
+    """原子覆盖文件（临时文件 + os.replace）"""
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class LeaseStore:
+    """
+    方案包目录下的租约与完成标记
+
+    目录结构:
+        .scheduler/<package>/<key>.lease   当前租约
+        .scheduler/<package>/<key>.done    完成标记
+        .scheduler/<package>/<key>.lock    租约修改锁
+    """
+
+    def __init__(self, workspace: Path):
+        self.root = workspace / SCHEDULER_DIR
+
+    def package_dir(self, package: str) -> Path:
+        return self.root / package
+
+    def lease_path(self, package: str, key: str) -> Path:
+        return self.package_dir(package) / (task_key(key) + LEASE_SUFFIX)
+
+    def done_path(self, package: str, key: str) -> Path:
+        return self.package_dir(package) / (task_key(key) + DONE_SUFFIX)
+
+    def lock(self, package: str, key: str):
+        """租约修改锁（接管/心跳/释放/完成互斥）"""
+        return file_lock(self.package_dir(package) / (task_key(key) + LOCK_SUFFIX))
+
+    def read_lease(self, package: str, key: str) -> Optional[Dict]:
+        return read_json_file(self.lease_path(package, key))
+
+    def acquire(self, package: str, key: str, worker: str, ttl: float) -> Optional[Dict]:
+        """
+        获取租约；已存在的过期租约会被接管
+
+        Returns:
+            租约内容（含 token），被占用时返回 None
+        """
+        path = self.lease_path(package, key)
+        now = time.time()
+        lease = {
+            "package": package,
+            "key": key,
+            "worker": worker,
+            "token": uuid.uuid4().hex,
+            "acquired_at": now,
+            "heartbeat_at": now,
+            "expires_at": now + ttl
+        }
+        if create_exclusive(path, lease):
+            return lease
+
+        # 租约已存在：在锁内确认过期后接管，与心跳/释放互斥，不会接管刚续期的租约
+        with self.lock(package, key):
+            current = self.read_lease(package, key)
+            now = time.time()
+            lease["acquired_at"] = lease["heartbeat_at"] = now
+            lease["expires_at"] = now + ttl
+            if current is None:
+                # 租约恰好被释放，重试一次
+                return lease if create_exclusive(path, lease) else None
+            if current.get("expires_at", 0) > now:
+                return None
+            replace_file(path, lease)
+            return lease
+
+    def verify(self, package: str, key: str, token: str) -> Optional[Dict]:
+        """校验令牌与有效期，返回当前租约；租约已丢失或已过期时返回 None"""
+        current = self.read_lease(package, key)
+        if current is None or current.get("token") != token:
+            return None
+        if current.get("expires_at", 0) <= time.time():
+            return None
+        return current
+
+    def heartbeat(self, package: str, key: str, token: str, ttl: float) -> Optional[Dict]:
+        """续期租约，令牌不匹配或已过期时返回 None"""
+        with self.lock(package, key):
+            current = self.verify(package, key, token)
+            if current is None:
+                return None
+            now = time.time()
+            current["heartbeat_at"] = now
+            current["expires_at"] = now + ttl
+            replace_file(self.lease_path(package, key), current)
+            return current
+
+    def release(self, package: str, key: str, token: str) -> bool:
+        """释放租约，令牌不匹配或已过期时返回 False"""
+        with self.lock(package, key):
+            if self.verify(package, key, token) is None:
+                return False
+            return self._remove_lease(package, key)
+
+    def _remove_lease(self, package: str, key: str) -> bool:
+        """删除租约文件（调用方需持有租约锁）"""
+        try:
+            os.unlink(self.lease_path(package, key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def mark_done(self, package: str, key: str, worker: str, status: str) -> bool:
+        """创建完成标记，已存在时返回 False"""
+        return create_exclusive(self.done_path(package, key), {
+            "package": package,
+            "key": key,
+            "worker": worker,
+            "status": status,
+            "completed_at": time.time()
+        })
+
+    def scan(self, package: str) -> Dict[str, Dict[str, Dict]]:
+        """
+        单次扫描方案包的租约与完成标记
+
+        Returns:
+            {"leases": {key: lease}, "done": {key: marker}}
+        """
+        state: Dict[str, Dict[str, Dict]] = {"leases": {}, "done": {}}
+        directory = self.package_dir(package)
+        if not directory.is_dir():
+            return state
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith(LEASE_SUFFIX):
+                    bucket = state["leases"]
+                elif entry.name.endswith(DONE_SUFFIX):
+                    bucket = state["done"]
+                else:
+                    continue
+                data = read_json_file(Path(entry.path))
+                if data is not None:
+                    bucket[data.get("key", entry.name)] = data
+        return state
+
+
+def list_plan_packages(plan_path: Path) -> List[str]:
+    """plan/ 下含 tasks.md 的方案包名称（按名称排序）"""
+    if not plan_path.is_dir():
+        return []
+    with os.scandir(plan_path) as it:
+        return sorted(
+            e.name for e in it
+            if e.is_dir() and not e.name.startswith('.') and os.path.isfile(os.path.join(e.path, "tasks.md"))
+        )
+
+
+def package_state(plan_path: Path, store: LeaseStore, package: str, now: Optional[float] = None) -> Dict:
+    """
+    计算方案包的调度状态
+
+    Returns:
+        {
+            "package", "tasks": [task],
+            "ready": [task_id], "leased": {task_id: lease}, "done": {task_id: marker},
+            "blocked": [task_id], "package_lease": lease|None, "drained": bool
+        }
+    """
+    now = time.time() if now is None else now
+    tasks_path = plan_path / package / "tasks.md"
+    graph = analyze_tasks(tasks_path.read_text(encoding="utf-8")) if tasks_path.is_file() else {"tasks": []}
+    scanned = store.scan(package)
+
+    live = {k: v for k, v in scanned["leases"].items() if v.get("expires_at", 0) > now}
+    package_lease = live.pop(PACKAGE_LEASE_KEY, None)
+    done = scanned["done"]
+
+    # tasks.md 中的状态与完成标记合并（完成标记优先）
+    status = {t["id"]: t["status"] for t in graph["tasks"]}
+    for key, marker in done.items():
+        if key in status:
+            status[key] = marker.get("status", "completed")
+
+    open_tasks = [
+        t for t in graph["tasks"]
+        if status[t["id"]] not in CLOSED_STATUSES and status[t["id"]] != "failed"
+    ]
+
+    # 处于环中、或（传递）依赖失败/环中任务的任务永远无法执行
+    unreachable = {tid for tid, s in status.items() if s == "failed"}
+    unreachable.update(t["id"] for t in open_tasks if t.get("in_cycle"))
+    changed = True
+    while changed:
+        changed = False
+        for task in open_tasks:
+            if task["id"] not in unreachable and any(d in unreachable for d in task["depends_on"]):
+                unreachable.add(task["id"])
+                changed = True
+
+    ready, blocked = [], []
+    for task in open_tasks:
+        tid = task["id"]
+        if tid in unreachable:
+            blocked.append(tid)
+        elif all(status.get(d) in CLOSED_STATUSES for d in task["depends_on"]) and tid not in live:
+            ready.append(tid)
+    return {
+        "package": package,
+        "tasks": graph["tasks"],
+        "ready": ready,
+        "leased": {k: v for k, v in live.items() if k in status},
+        "done": done,
+        "blocked": blocked,
+        "package_lease": package_lease,
+        "drained": len(blocked) == len(open_tasks)
+    }
+
+
+def _record_timing(package_path: Path, event: Dict) -> None:
+    """追加计时事件（失败不影响调度）"""
+    try:
+        record_events(package_path, [event])
+    except OSError:
+        pass
+
+
+def claim(base_path: Optional[str], worker: str, package: Optional[str] = None,
+          scope: str = "task", ttl: float = DEFAULT_TTL) -> Dict:
+    """
+    领取下一个可执行任务（scope=task）或方案包（scope=package）
+
+    Returns:
+        成功: {"claimed": True, "package", "task", "token", "expires_at", ...}
+        失败: {"claimed": False, "reason": "drained"|"waiting"|"not_found"}
+              waiting 表示仍有未结束任务但暂不可领取（被占用或依赖未完成）
+    """
+    plan_path = get_plan_path(base_path)
+    store = LeaseStore(get_workspace_path(base_path))
+    packages = [package] if package else list_plan_packages(plan_path)
+    if package and not (plan_path / package / "tasks.md").is_file():
+        return {"claimed": False, "reason": "not_found", "package": package}
+
+    waiting = False
+    for name in packages:
+        state = package_state(plan_path, store, name)
+        if state["drained"]:
+            continue
+        foreign = state["package_lease"] and state["package_lease"].get("worker") != worker
+
+        if scope == "package":
+            if foreign or any(l.get("worker") != worker for l in state["leased"].values()):
+                waiting = True
+                continue
+            lease = store.acquire(name, PACKAGE_LEASE_KEY, worker, ttl)
+            if lease is None:
+                waiting = True
+                continue
+            return {"claimed": True, "scope": "package", "package": name, "task": None,
+                    "token": lease["token"], "expires_at": lease["expires_at"],
+                    "ready": state["ready"]}
+
+        if foreign or not state["ready"]:
+            waiting = True
+            continue
+
+        descriptions = {t["id"]: t["description"] for t in state["tasks"]}
+        for tid in state["ready"]:
+            lease = store.acquire(name, tid, worker, ttl)
+            if lease is None:
+                continue
+            # 扫描与获取之间任务可能已被他人完成（完成标记先于租约删除写入）
+            if store.done_path(name, tid).exists():
+                store.release(name, tid, lease["token"])
+                continue
+            _record_timing(plan_path / name, {"task": tid, "event": "start", "worker": worker})
+            return {"claimed": True, "scope": "task", "package": name, "task": tid,
+                    "description": descriptions.get(tid, ""),
+                    "token": lease["token"], "expires_at": lease["expires_at"]}
+        waiting = True
+
+    return {"claimed": False, "reason": "waiting" if waiting else "drained"}
+
+
+def complete(base_path: Optional[str], package: str, task: str, token: str,
+             status: str = "completed") -> Dict:
+    """
+    标记任务完成并释放租约（同时更新 tasks.md 中的任务状态）
+
+    Returns:
+        {"success": bool, "package", "task", "status", "error"?}
+    """
+    store = LeaseStore(get_workspace_path(base_path))
+    package_path = get_plan_path(base_path) / package
+    result = {"success": False, "package": package, "task": task, "status": status}
+
+    # 校验租约、写入 tasks.md、创建完成标记与删除租约在同一把租约锁内完成
+    with store.lock(package, task):
+        lease = store.verify(package, task, token)
+        if lease is None:
+            result["error"] = "租约已丢失（已过期被接管或令牌无效），请勿提交结果"
+            return result
+        if store.done_path(package, task).exists():
+            result["error"] = "任务已被标记完成"
+            store._remove_lease(package, task)
+            return result
+        try:
+            updated = update_tasks(package_path / "tasks.md", [{"task": task, "status": status}])
+        except OSError as e:
+            result["error"] = f"更新 tasks.md 失败: {e}"
+            return result
+        if updated["missing"]:
+            result["error"] = f"tasks.md 中不存在任务 {task}"
+            return result
+        store.mark_done(package, task, lease["worker"], status)
+        store._remove_lease(package, task)
+
+    _record_timing(package_path,
+                   {"task": task, "event": "status", "status": status, "worker": lease["worker"]})
+    result["success"] = True
+    return result
+
+
+def scheduler_status(base_path: Optional[str], package: Optional[str] = None) -> Dict:
+    """汇总各方案包的调度状态"""
+    plan_path = get_plan_path(base_path)
+    store = LeaseStore(get_workspace_path(base_path))
+    packages = [package] if package else list_plan_packages(plan_path)
+    result = {"packages": []}
+    for name in packages:
+        state = package_state(plan_path, store, name)
+        result["packages"].append({
+            "package": name,
+            "total": len(state["tasks"]),
+            "ready": state["ready"],
+            "leased": {k: {"worker": v["worker"], "expires_at": v["expires_at"]} for k, v in state["leased"].items()},
+            "done": {k: v.get("status") for k, v in state["done"].items()},
+            "blocked": state["blocked"],
+            "package_lease": state["package_lease"]["worker"] if state["package_lease"] else None,
+            "drained": state["drained"]
+        })
+    return result
+
+
+def reset(base_path: Optional[str], package: Optional[str] = None) -> Dict:
+    """删除调度状态（租约与完成标记）"""
+    store = LeaseStore(get_workspace_path(base_path))
+    targets = [store.package_dir(package)] if package else (
+        [p for p in store.root.iterdir() if p.is_dir()] if store.root.is_dir() else []
+    )
+    removed = 0
+    for directory in targets:
+        if not directory.is_dir():
+            continue
+        for item in directory.iterdir():
+            item.unlink()
+            removed += 1
+        directory.rmdir()
+    return {"success": True, "removed": removed}
+
+
+# === 压力测试 ===
+
+def _stress_worker(base_path: str, worker: str, ttl: float, crash_rate: float, seed: int) -> List[Dict]:
+    """
+    压力测试执行者：循环领取并完成任务，按 crash_rate 模拟崩溃（不释放租约直接放弃）
+
+    Returns:
+        本执行者的领取记录 [{"package", "task", "outcome", "claimed_at", "completed_at"}]
+        outcome: completed / crashed / lost（提交时发现租约已丢失或任务已完成，即发生了重复执行）
+    """
+    rng = random.Random(seed)
+    log = []
+    while True:
+        result = claim(base_path, worker, ttl=ttl)
+        if not result["claimed"]:
+            if result["reason"] == "drained":
+                return log
+            time.sleep(0.005 + rng.random() * 0.01)
+            continue
+        claimed_at = time.time()
+        time.sleep(rng.random() * 0.01)
+        entry = {"package": result["package"], "task": result["task"],
+                 "claimed_at": claimed_at, "completed_at": None}
+        if rng.random() < crash_rate:
+            # 模拟崩溃：租约保留至过期后由他人接管
+            log.append(dict(entry, outcome="crashed"))
+            continue
+        # 完成标记在 complete() 内写入，提交前的时间是依赖方可见完成状态的下界
+        entry["completed_at"] = time.time()
+        done = complete(base_path, result["package"], result["task"], result["token"])
+        entry["outcome"] = "completed" if done["success"] else "lost"
+        log.append(entry)
+
+
+def run_stress_test(workers: int = 4, packages: int = 2, tasks: int = 12,
+                    ttl: float = 0.5, crash_rate: float = 0.05, seed: int = 0) -> Dict:
+    """
+    本地多进程压力测试
+
+    在临时目录中生成带依赖的方案包，N 个进程并发领取直至全部完成，
+    校验: 每个任务恰好完成一次；任务领取时其依赖均已完成。
+
+    Returns:
+        {"success": bool, "workers", "tasks_total", "completed", "duplicates", "missing",
+         "order_violations", "elapsed_s", "crashes", "per_worker"}
+    """
+    rng = random.Random(seed)
+    start = time.time()
+    with tempfile.TemporaryDirectory(prefix="helloagents-scheduler-") as td:
+        plan_path = get_plan_path(td)
+        expected: Dict[str, Dict[str, List[str]]] = {}
+        for p in range(packages):
+            name = f"200001010000_stress{p}"
+            lines = ["# 任务清单", ""]
+            deps_by_task: Dict[str, List[str]] = {}
+            ids: List[str] = []
+            for i in range(tasks):
+                phase = i // 4 + 1
+                tid = f"{phase}.{i % 4 + 1}"
+                if i % 4 == 0:
+                    lines += [f"### {phase}. 阶段{phase}", ""]
+                deps = rng.sample(ids, k=min(len(ids), rng.randint(0, 2)))
+                deps_by_task[tid] = deps
+                ids.append(tid)
+                lines.append(f"- [ ] {tid} 任务{tid}")
+                if deps:
+                    lines.append(f"  - 依赖: {', '.join(deps)}")
+                lines.append("")
+            (plan_path / name).mkdir(parents=True)
+            (plan_path / name / "tasks.md").write_text("\n".join(lines), encoding="utf-8")
+            expected[name] = deps_by_task
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_stress_worker, td, f"w{i}", ttl, crash_rate, seed + i)
+                for i in range(workers)
+            ]
+            logs = [f.result() for f in futures]
+
+    entries = [dict(e, worker=f"w{i}") for i, log in enumerate(logs) for e in log]
+    seen: Dict[tuple, Dict] = {}
+    duplicates = []
+    for entry in entries:
+        key = (entry["package"], entry["task"])
+        if entry["outcome"] == "lost" or (entry["outcome"] == "completed" and key in seen):
+            duplicates.append(list(key))
+        if entry["outcome"] == "completed":
+            seen[key] = entry
+
+    missing = [[pkg, tid] for pkg, deps in expected.items() for tid in deps if (pkg, tid) not in seen]
+    violations = []
+    for (pkg, tid), entry in seen.items():
+        for dep in expected[pkg][tid]:
+            dep_entry = seen.get((pkg, dep))
+            if dep_entry is None or dep_entry["completed_at"] > entry["claimed_at"]:
+                violations.append({"package": pkg, "task": tid, "depends_on": dep})
+
+    total = packages * tasks
+    return {
+        "success": not duplicates and not missing and not violations,
+        "workers": workers,
+        "tasks_total": total,
+        "completed": len(seen),
+        "duplicates": duplicates,
+        "missing": missing,
+        "order_violations": violations,
+        "elapsed_s": round(time.time() - start, 3),
+        "crashes": sum(1 for e in entries if e["outcome"] == "crashed"),
+        "per_worker": {f"w{i}": sum(1 for e in log if e["outcome"] == "completed") for i, log in enumerate(logs)}
+    }
+
+
+def main():
+    setup_encoding()
+    parser = argparse.ArgumentParser(
+        description="HelloAGENTS 多执行者任务调度（租约文件）"
+    )
+    parser.add_argument(
+        "command",
+        choices=["claim", "heartbeat", "complete", "release", "status", "reset", "stress"],
+        help="操作"
+    )
+    parser.add_argument("--path", default=None, help="项目根目录（默认: 当前目录）")
+    parser.add_argument("--worker", default=None, help="执行者标识（默认: <主机名>:<进程号>）")
+    parser.add_argument("--package", default=None, help="方案包名称")
+    parser.add_argument("--task", default=None, help="任务编号（如 1.2）")
+    parser.add_argument("--token", default=None, help="claim 返回的租约令牌")
+    parser.add_argument("--scope", choices=["task", "package"], default="task", help="领取范围（默认: task）")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help=f"租约有效期秒数（默认: {DEFAULT_TTL}）")
+    parser.add_argument("--status", choices=COMPLETE_STATUSES, default="completed", help="complete 的任务状态")
+    parser.add_argument("--workers", type=int, default=4, help="stress: 进程数（默认: 4）")
+    parser.add_argument("--packages", type=int, default=2, help="stress: 方案包数（默认: 2）")
+    parser.add_argument("--tasks", type=int, default=12, help="stress: 每个方案包的任务数（默认: 12）")
+
+    args = parser.parse_args()
+
+    def _emit(result: Dict, ok: bool) -> None:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        sys.exit(0 if ok else 1)
+
+    if args.command == "stress":
+        result = run_stress_test(workers=args.workers, packages=args.packages, tasks=args.tasks)
+        _emit(result, result["success"])
+
+    try:
+        validate_base_path(args.path)
+    except ValueError as e:
+        _emit({"success": False, "error": str(e)}, False)
+
+    key = args.task or PACKAGE_LEASE_KEY
+    store = LeaseStore(get_workspace_path(args.path))
+
+    if args.command == "claim":
+        result = claim(args.path, args.worker or default_worker_id(), args.package, args.scope, args.ttl)
+        _emit(result, result["claimed"] or result["reason"] != "not_found")
+    elif args.command == "status":
+        _emit(scheduler_status(args.path, args.package), True)
+    elif args.command == "reset":
+        _emit(reset(args.path, args.package), True)
+
+    if not args.package or not args.token:
+        _emit({"success": False, "error": f"{args.command} 需要 --package 与 --token"}, False)
+
+    if args.command == "heartbeat":
+        lease = store.heartbeat(args.package, key, args.token, args.ttl)
+        if lease is None:
+            _emit({"success": False, "error": "租约已丢失，请停止执行该任务"}, False)
+        _emit({"success": True, "expires_at": lease["expires_at"]}, True)
+    elif args.command == "release":
+        ok = store.release(args.package, key, args.token)
+        _emit({"success": ok} if ok else {"success": False, "error": "租约已丢失或令牌无效"}, ok)
+    elif args.command == "complete":
+        if not args.task:
+            _emit({"success": False, "error": "complete 需要 --task"}, False)
+        result = complete(args.path, args.package, args.task, args.token, args.status)
+        _emit(result, result["success"])
+
+
+if __name__ == "__main__":
+    main()
@@ -7,45 +7,162 @@ HelloAGENTS 知识库工具（纯文件操作）
 内容分析由 AI 通过 ~upgrade 命令执行。
 
 Usage:
-    python upgradewiki.py --scan [--path <base-path>]
+    python upgradewiki.py --scan [--hash [--jobs <n>]] [--since <manifest>] [--save-manifest [<manifest>]] [--path <base-path>]
     python upgradewiki.py --init [--path <base-path>]
-    python upgradewiki.py --backup [--path <base-path>]
-    python upgradewiki.py --write <json-file> [--path <base-path>]
+    python upgradewiki.py --backup [--incremental | --compress [tar.xz|zip]] [--retain <n>] [--retain-days <d>] [--path <base-path>]
+    python upgradewiki.py --restore <backup-archive> [--path <base-path>]
+    python upgradewiki.py --write <json-file> [--dry-run] [--path <base-path>]
 
 Examples:
-    python upgradewiki.py --scan                    # 扫描知识库目录，返回文件列表
+    python upgradewiki.py --scan                    # 扫描知识库目录，返回文件列表（含大小、修改时间）
+    python upgradewiki.py --scan --hash             # 同时计算文件 sha256（线程池并行）
+    python upgradewiki.py --scan --save-manifest    # 扫描并保存清单到 helloagents/.scan_manifest.json
+    python upgradewiki.py --scan --since helloagents/.scan_manifest.json --save-manifest   # 只返回变化的文件并更新清单
     python upgradewiki.py --init                    # 创建标准目录结构
     python upgradewiki.py --backup                  # 备份现有知识库
-    python upgradewiki.py --write plan.json         # 按计划写入文件
+    python upgradewiki.py --backup --incremental    # 增量备份：未变化的文件硬链接到上一次备份
+    python upgradewiki.py --backup --compress --retain 5   # 流式压缩为 tar.xz，只保留最近 5 个备份
+    python upgradewiki.py --restore helloagents_backup_20250101120000.tar.xz   # 解压并校验后恢复
+    python upgradewiki.py --write plan.json         # 按计划写入文件（事务执行，失败时全部撤销）
+    python upgradewiki.py --write plan.json --dry-run   # 预览将写入/删除的文件数与字节数
 """
 
 import argparse
+import hashlib
+import io
 import json
+import os
+import re
 import shutil
 import sys
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # 确保能找到同目录下的 utils 模块
 sys.path.insert(0, str(Path(__file__).parent))
-from utils import get_workspace_path, setup_encoding, print_error, print_success, validate_base_path
+from utils import (
+    get_workspace_path,
+    setup_encoding,
+    print_error,
+    print_success,
+    validate_base_path,
+    file_digest,
+    write_bytes_atomic,
+    workspace_lock,
+    HASH_CHUNK_SIZE
+)
 
 
 # V3 标准目录结构
 V3_DIRECTORIES = ['modules', 'archive', 'plan']
 V3_ROOT_FILES = ['INDEX.md', 'context.md', 'CHANGELOG.md']
 
+# 备份目录（与 dedup_workspace.py 一致）：helloagents_backup_<YYYYMMDDHHMMSS>[_<序号>][.tar.xz|.zip]
+BACKUP_PREFIX = "helloagents_backup_"
+BACKUP_NAME_PATTERN = re.compile(r'^helloagents_backup_(\d{14})(?:_(\d+))?(\.tar\.xz|\.zip)?$')
 
-def scan_workspace(workspace: Path) -> Dict:
+# 压缩备份格式 → 文件扩展名；校验清单位于归档根目录（知识库文件位于 helloagents/ 前缀下）
+COMPRESS_FORMATS = {"tar.xz": ".tar.xz", "zip": ".zip"}
+MANIFEST_NAME = "backup-manifest.json"
+
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) + 4)
+
+# 扫描清单（--save-manifest 默认位置，以 . 开头，不出现在扫描结果中）
+SCAN_MANIFEST_NAME = ".scan_manifest.json"
+MANIFEST_VERSION = 1
+
+# 备份写入过程中的临时目录后缀（完成后改名，中断时不会留下看似完整的备份）
+PARTIAL_SUFFIX = ".partial"
+
+
+def _walk_workspace(root: Path, prefix: str, files: List[Dict], structure: Optional[Dict]):
+    """
+    单次 os.scandir 递归：按名称排序（与排序后的 rglob 顺序一致），复用 DirEntry 的类型与 stat 信息
+
+    悬空符号链接按链接自身的 stat 记录；扫描期间被删除的文件与目录直接跳过。
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = sorted((e for e in it if not e.name.startswith('.')), key=lambda e: e.name)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        is_dir = entry.is_dir()
+        rel_path = prefix + entry.name
+        if is_dir:
+            if structure is not None:
+                structure["directories"].append(entry.name)
+            files.append({"path": rel_path, "type": "directory"})
+            # 不进入符号链接目录，避免循环
+            if not entry.is_symlink():
+                _walk_workspace(Path(entry.path), rel_path + "/", files, None)
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+        if structure is not None:
+            structure["root_files"].append(entry.name)
+        files.append({"path": rel_path, "type": "file", "size": st.st_size, "mtime": st.st_mtime})
+
+
+def fill_digests(workspace: Path, files: List[Dict], previous: Dict[str, Dict], jobs: int = DEFAULT_JOBS) -> int:
+    """
+    为文件列表补充 sha256：大小与修改时间均与清单记录一致的文件沿用清单中的摘要，其余在线程池中计算
+
+    无法读取的文件（悬空符号链接、扫描后被删除）sha256 记为 None。
+
+    Returns:
+        实际读取并计算摘要的文件数
+    """
+    def _digest(item: Dict) -> Optional[str]:
+        try:
+            return file_digest(workspace / item["path"])
+        except OSError:
+            return None
+
+    pending = []
+    for item in files:
+        if item["type"] != "file":
+            continue
+        old = previous.get(item["path"])
+        if old and old.get("sha256") and old.get("size") == item["size"] and old.get("mtime") == item["mtime"]:
+            item["sha256"] = old["sha256"]
+        else:
+            pending.append(item)
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            for item, digest in zip(pending, pool.map(_digest, pending)):
+                item["sha256"] = digest
+    return len(pending)
+
+
+def scan_workspace(workspace: Path, with_hash: bool = False, jobs: int = DEFAULT_JOBS,
+                   previous: Optional[Dict] = None) -> Dict:
     """
     扫描知识库目录，返回文件列表（不做任何内容分析）
 
+    单次遍历同时生成文件列表与顶层结构；以 . 开头的文件与目录（含其内容）被跳过。
+    文件带大小与修改时间，调用方无需读取内容即可判断变化；with_hash 时在线程池中计算 sha256。
+
+    Args:
+        workspace: helloagents/ 目录
+        with_hash: 是否计算文件摘要
+        jobs: 摘要计算线程数
+        previous: 上一次的扫描清单（load_manifest），with_hash 时未变化的文件沿用其摘要，不读取内容
+
     Returns:
         {
             "workspace": str,
             "exists": bool,
-            "files": [{"path": str, "type": "file"|"directory", "size": int}],
+            "files": [{"path": str, "type": "file"|"directory", "size": int, "mtime": float, "sha256"?: str|None}],
             "structure": {
                 "directories": [str],
                 "root_files": [str]
@@ -65,31 +182,75 @@ def scan_workspace(workspace: Path) -> Dict:
     if not workspace.exists():
         return result
 
-    # 扫描所有文件和目录
-    for item in sorted(workspace.rglob("*")):
-        if item.name.startswith('.'):
-            continue
+    _walk_workspace(workspace, "", result["files"], result["structure"])
+
+    if with_hash:
+        result["hashed"] = fill_digests(workspace, result["files"], (previous or {}).get("files", {}), jobs)
+
+    return result
+
 
-        rel_path = item.relative_to(workspace)
-        file_info = {
-            "path": str(rel_path).replace("\\", "/"),
-            "type": "directory" if item.is_dir() else "file"
+def build_manifest(scan: Dict) -> Dict:
+    """由带摘要的扫描结果生成清单 {"version", "created", "workspace", "files": {path: {"size", "mtime", "sha256"}}}"""
+    return {
+        "version": MANIFEST_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "workspace": scan["workspace"],
+        "files": {
+            item["path"]: {"size": item["size"], "mtime": item["mtime"], "sha256": item.get("sha256")}
+            for item in scan["files"] if item["type"] == "file"
         }
+    }
+
+
+def load_manifest(manifest_file: Path) -> Dict:
+    """读取扫描清单（格式不符时抛出 ValueError）"""
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), dict):
+        raise ValueError(f"无效的扫描清单: {manifest_file}")
+    return manifest
+
 
-        if item.is_file():
-            file_info["size"] = item.stat().st_size
+def diff_scan(scan: Dict, previous: Dict, since: str) -> Dict:
+    """
+    对比扫描结果与上一次的清单，只返回变化的文件
 
-        result["files"].append(file_info)
+    大小与修改时间未变的文件视为未变化；否则按 sha256 判断（只修改了时间的文件不计为变更）。
 
-    # 分析顶层结构
-    for item in workspace.iterdir():
-        if item.name.startswith('.'):
+    Returns:
+        {"workspace", "exists", "since", "added": [文件信息], "modified": [文件信息],
+         "deleted": [路径], "unchanged": int, "hashed": int, "structure"}
+    """
+    old_files = previous.get("files", {})
+    result = {
+        "workspace": scan["workspace"],
+        "exists": scan["exists"],
+        "since": since,
+        "added": [],
+        "modified": [],
+        "deleted": [],
+        "unchanged": 0,
+        "hashed": scan.get("hashed", 0),
+        "structure": scan["structure"]
+    }
+    current = set()
+    for item in scan["files"]:
+        if item["type"] != "file":
+            continue
+        current.add(item["path"])
+        old = old_files.get(item["path"])
+        if old is None:
+            result["added"].append(item)
             continue
-        if item.is_dir():
-            result["structure"]["directories"].append(item.name)
+        if old.get("sha256"):
+            changed = old["sha256"] != item.get("sha256")
         else:
-            result["structure"]["root_files"].append(item.name)
-
+            changed = old.get("size") != item["size"] or old.get("mtime") != item["mtime"]
+        if changed:
+            result["modified"].append(item)
+        else:
+            result["unchanged"] += 1
+    result["deleted"] = sorted(path for path in old_files if path not in current)
     return result
 
 
@@ -124,12 +285,89 @@ def init_structure(workspace: Path) -> Dict:
     return result
 
 
-def create_backup(workspace: Path) -> Dict:
+def next_backup_path(workspace: Path, suffix: str = "") -> Path:
+    """生成不与已有备份冲突的备份路径（同一秒内追加序号）"""
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    backup_path = workspace.parent / f"{BACKUP_PREFIX}{timestamp}{suffix}"
+    counter = 1
+    while backup_path.exists():
+        backup_path = workspace.parent / f"{BACKUP_PREFIX}{timestamp}_{counter}{suffix}"
+        counter += 1
+    return backup_path
+
+
+def list_backups(workspace: Path) -> List[Tuple[Tuple[str, int], Path]]:
+    """列出全部备份（目录与压缩归档），按时间戳与序号倒序"""
+    backups = []
+    if not workspace.parent.is_dir():
+        return backups
+    for entry in os.scandir(workspace.parent):
+        match = BACKUP_NAME_PATTERN.match(entry.name)
+        if match and not entry.is_symlink():
+            backups.append(((match.group(1), int(match.group(2) or 0)), Path(entry.path)))
+    return sorted(backups, reverse=True)
+
+
+def find_latest_backup(workspace: Path) -> Optional[Path]:
+    """查找最近一次完整备份（按目录名中的时间戳与序号）"""
+    for _, path in list_backups(workspace):
+        if path.is_dir():
+            return path
+    return None
+
+
+def copy_incremental(src: Path, dst: Path, base: Optional[Path], stats: Dict):
+    """
+    递归复制 src 到 dst：与 base 中同路径文件大小和修改时间（纳秒）一致时创建硬链接，否则复制
+
+    复制使用 copy2 保留修改时间，下次备份可据此判断文件未变化。
+    硬链接失败（跨设备、不支持、链接数上限）时改为复制，并在本次备份中不再尝试链接。
+    """
+    dst.mkdir()
+    with os.scandir(src) as it:
+        for entry in it:
+            target = dst / entry.name
+            base_path = base / entry.name if base is not None else None
+            if entry.is_dir():
+                copy_incremental(Path(entry.path), target, base_path, stats)
+                continue
+            st = entry.stat()
+            if base_path is not None and stats["link"]:
+                try:
+                    base_st = os.stat(base_path, follow_symlinks=False)
+                except OSError:
+                    base_st = None
+                if (base_st is not None and base_st.st_size == st.st_size
+                        and base_st.st_mtime_ns == st.st_mtime_ns):
+                    try:
+                        os.link(base_path, target)
+                        stats["linked"] += 1
+                        stats["linked_bytes"] += st.st_size
+                        continue
+                    except OSError as e:
+                        stats["link"] = False
+                        stats["link_error"] = str(e)
+            shutil.copy2(entry.path, target)
+            stats["copied"] += 1
+            stats["copied_bytes"] += st.st_size
+    shutil.copystat(src, dst)
+
+
+def create_backup(workspace: Path, incremental: bool = False, compress: Optional[str] = None) -> Dict:
     """
     备份现有知识库
 
+    增量模式（类似 rsync --link-dest）：与上一次备份相比未变化的文件以硬链接共享数据，只复制变化的文件，
+    每个备份仍是完整快照。备份中的文件不应原地修改（硬链接共享的文件会同时改变）。
+
+    Args:
+        workspace: helloagents/ 目录
+        incremental: 是否以最近一次备份为基准增量备份（无历史备份时等同完整备份）
+        compress: 压缩格式（tar.xz/zip），指定时流式写入单个归档文件，见 create_compressed_backup
+
     Returns:
-        {"success": bool, "backup_path": str|None, "error": str|None}
+        {"success": bool, "backup_path": str|None, "error": str|None, "mode": "full"|"incremental",
+         "base": str|None, "copied": int, "copied_bytes": int, "linked": int, "linked_bytes": int}
     """
     result = {
         "success": False,
@@ -141,30 +379,658 @@ def create_backup(workspace: Path) -> Dict:
         result["error"] = f"知识库目录不存在: {workspace}"
         return result
 
-    # 生成备份目录名
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    base_backup_path = workspace.parent / f"helloagents_backup_{timestamp}"
+    if compress:
+        return create_compressed_backup(workspace, compress, result)
 
-    # 确保备份目录不存在（添加序号避免冲突）
-    backup_path = base_backup_path
-    counter = 1
-    while backup_path.exists():
-        backup_path = workspace.parent / f"helloagents_backup_{timestamp}_{counter}"
-        counter += 1
+    # 生成备份目录名（添加序号避免冲突）
+    backup_path = next_backup_path(workspace)
 
+    base = find_latest_backup(workspace) if incremental else None
+    stats = {"link": base is not None, "copied": 0, "copied_bytes": 0, "linked": 0, "linked_bytes": 0}
+    result["mode"] = "incremental" if base is not None else "full"
+    result["base"] = str(base) if base is not None else None
+
+    partial_path = backup_path.with_name(backup_path.name + PARTIAL_SUFFIX)
     try:
-        shutil.copytree(workspace, backup_path)
+        copy_incremental(workspace, partial_path, base, stats)
+        os.rename(partial_path, backup_path)
         result["success"] = True
         result["backup_path"] = str(backup_path)
     except Exception as e:
         result["error"] = str(e)
+        shutil.rmtree(partial_path, ignore_errors=True)
 
+    for key in ("copied", "copied_bytes", "linked", "linked_bytes"):
+        result[key] = stats[key]
+    if "link_error" in stats:
+        result["link_error"] = stats["link_error"]
     return result
 
 
-def write_files(workspace: Path, plan_file: Path) -> Dict:
+class _HashingReader:
+    """读取时同步计算 sha256 的文件包装（tarfile 写入时只读取一遍文件）"""
+
+    def __init__(self, f):
+        self._f = f
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self.hash.update(data)
+        self.size += len(data)
+        return data
+
+
+def iter_tree(root: Path, prefix: str = "") -> Iterator[Tuple[str, os.DirEntry]]:
+    """按名称顺序递归遍历目录，产出 (相对路径, DirEntry)，目录先于其内容"""
+    with os.scandir(root) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        rel_path = prefix + entry.name
+        yield rel_path, entry
+        if entry.is_dir():
+            yield from iter_tree(Path(entry.path), rel_path + "/")
+
+
+def write_archive(workspace: Path, archive_file: Path, fmt: str) -> Dict:
+    """
+    将知识库流式写入压缩归档（不生成中间副本），文件内容在写入的同时计算 sha256
+
+    Returns:
+        校验清单 {"format", "root", "created", "dirs": [相对路径], "files": {相对路径: {"size", "sha256"}}}
     """
-    按计划写入文件（由 AI 生成的写入计划）
+    root = workspace.name
+    manifest = {"format": fmt, "root": root, "created": datetime.now().isoformat(timespec="seconds"),
+                "dirs": [], "files": {}}
+
+    if fmt == "tar.xz":
+        with tarfile.open(archive_file, "w:xz") as tar:
+            for rel_path, entry in iter_tree(workspace):
+                st = entry.stat()
+                info = tarfile.TarInfo(f"{root}/{rel_path}")
+                info.mtime = st.st_mtime
+                info.mode = st.st_mode & 0o777
+                if entry.is_dir():
+                    info.type = tarfile.DIRTYPE
+                    tar.addfile(info)
+                    manifest["dirs"].append(rel_path)
+                    continue
+                info.size = st.st_size
+                with open(entry.path, "rb") as f:
+                    reader = _HashingReader(f)
+                    tar.addfile(info, reader)
+                manifest["files"][rel_path] = {"size": reader.size, "sha256": reader.hash.hexdigest()}
+            data = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(data)
+            info.mtime = int(datetime.now().timestamp())
+            tar.addfile(info, io.BytesIO(data))
+        return manifest
+
+    with zipfile.ZipFile(archive_file, "w", zipfile.ZIP_DEFLATED) as zf:
+        for rel_path, entry in iter_tree(workspace):
+            info = zipfile.ZipInfo.from_file(entry.path, f"{root}/{rel_path}", strict_timestamps=False)
+            if entry.is_dir():
+                zf.writestr(info, b"")
+                manifest["dirs"].append(rel_path)
+                continue
+            info.compress_type = zipfile.ZIP_DEFLATED
+            h, size = hashlib.sha256(), 0
+            with open(entry.path, "rb") as src, zf.open(info, "w") as dst:
+                for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b""):
+                    h.update(chunk)
+                    size += len(chunk)
+                    dst.write(chunk)
+            manifest["files"][rel_path] = {"size": size, "sha256": h.hexdigest()}
+        zf.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+    return manifest
+
+
+def create_compressed_backup(workspace: Path, fmt: str, result: Dict) -> Dict:
+    """
+    流式压缩备份：写入 <备份名>.tar.xz/.zip.partial，完成后改名
+
+    Returns:
+        result 追加 {"mode": "compressed", "format", "files", "bytes", "archive_bytes"}
+    """
+    backup_path = next_backup_path(workspace, COMPRESS_FORMATS[fmt])
+    partial_path = backup_path.with_name(backup_path.name + PARTIAL_SUFFIX)
+    result["mode"] = "compressed"
+    result["format"] = fmt
+    try:
+        manifest = write_archive(workspace, partial_path, fmt)
+        os.rename(partial_path, backup_path)
+    except Exception as e:
+        result["error"] = str(e)
+        partial_path.unlink(missing_ok=True)
+        return result
+
+    result["success"] = True
+    result["backup_path"] = str(backup_path)
+    result["files"] = len(manifest["files"])
+    result["bytes"] = sum(f["size"] for f in manifest["files"].values())
+    result["archive_bytes"] = backup_path.stat().st_size
+    return result
+
+
+def prune_backups(workspace: Path, retain: Optional[int] = None, retain_days: Optional[int] = None,
+                  keep: Optional[Path] = None) -> List[str]:
+    """
+    按保留策略删除旧备份（目录与压缩归档统一计数）
+
+    Args:
+        retain: 只保留最近 N 个备份
+        retain_days: 删除时间戳早于 D 天前的备份
+        keep: 始终保留的备份（刚创建的备份）
+
+    Returns:
+        已删除的备份名称
+    """
+    backups = list_backups(workspace)
+    doomed = {}
+    if retain is not None:
+        for key, path in backups[retain:]:
+            doomed[path] = key
+    if retain_days is not None:
+        cutoff = (datetime.now() - timedelta(days=retain_days)).strftime("%Y%m%d%H%M%S")
+        for key, path in backups:
+            if key[0] < cutoff:
+                doomed[path] = key
+    removed = []
+    for path in sorted(doomed, key=lambda p: doomed[p]):
+        if keep is not None and path == keep:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+        removed.append(path.name)
+    return removed
+
+
+def _member_rel_path(name: str, root: str) -> Optional[str]:
+    """归档成员名 → 知识库内相对路径（拒绝绝对路径与 .. 等越界路径）"""
+    name = name.rstrip("/")
+    if not name.startswith(root + "/"):
+        return None
+    parts = name[len(root) + 1:].split("/")
+    if any(part in ("", ".", "..") for part in parts) or "\\" in name:
+        return None
+    return "/".join(parts)
+
+
+def _extract_stream(src, dest: Path, mtime: Optional[float]) -> Tuple[int, str]:
+    """流式写出成员内容并计算 sha256"""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    h, size = hashlib.sha256(), 0
+    with open(dest, "wb") as out:
+        for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+            size += len(chunk)
+            out.write(chunk)
+    if mtime is not None:
+        os.utime(dest, (mtime, mtime))
+    return size, h.hexdigest()
+
+
+def extract_archive(archive_file: Path, staging: Path, root: str) -> Tuple[Optional[Dict], Dict, List[str]]:
+    """
+    解压到 staging（只写出 root/ 下的普通文件与目录），解压同时计算摘要
+
+    Returns:
+        (校验清单|None, {相对路径: {"size", "sha256"}}, 被拒绝的成员名)
+    """
+    manifest = None
+    extracted: Dict[str, Dict] = {}
+    rejected: List[str] = []
+    staging.mkdir(parents=True)
+
+    if archive_file.name.endswith(".zip"):
+        with zipfile.ZipFile(archive_file) as zf:
+            for info in zf.infolist():
+                if info.filename == MANIFEST_NAME:
+                    manifest = json.loads(zf.read(info).decode("utf-8"))
+                    continue
+                rel_path = _member_rel_path(info.filename, root)
+                if rel_path is None:
+                    rejected.append(info.filename)
+                elif info.is_dir():
+                    (staging / rel_path).mkdir(parents=True, exist_ok=True)
+                else:
+                    mtime = datetime(*info.date_time).timestamp()
+                    with zf.open(info) as src:
+                        size, digest = _extract_stream(src, staging / rel_path, mtime)
+                    extracted[rel_path] = {"size": size, "sha256": digest}
+        return manifest, extracted, rejected
+
+    with tarfile.open(archive_file, "r:*") as tar:
+        for member in tar:
+            if member.name == MANIFEST_NAME and member.isfile():
+                manifest = json.loads(tar.extractfile(member).read().decode("utf-8"))
+                continue
+            rel_path = _member_rel_path(member.name, root)
+            if rel_path is None or not (member.isdir() or member.isfile()):
+                rejected.append(member.name)
+            elif member.isdir():
+                (staging / rel_path).mkdir(parents=True, exist_ok=True)
+            else:
+                size, digest = _extract_stream(tar.extractfile(member), staging / rel_path, member.mtime)
+                extracted[rel_path] = {"size": size, "sha256": digest}
+    return manifest, extracted, rejected
+
+
+def restore_backup(workspace: Path, archive_file: Path) -> Dict:
+    """
+    从压缩备份恢复知识库：解压到同级临时目录并按校验清单核对全部文件，通过后再替换 helloagents/
+
+    现有 helloagents/ 不会被删除，而是改名为新的 helloagents_backup_<时间戳> 目录备份。
+    校验失败（内容不符、文件缺失或多余、清单缺失）时不修改知识库。
+
+    Returns:
+        {"success": bool, "archive": str, "restored_path": str|None, "replaced_path": str|None,
+         "files": int, "bytes": int, "mismatched": [str], "missing": [str], "unexpected": [str], "error": str|None}
+    """
+    result = {
+        "success": False,
+        "archive": str(archive_file),
+        "restored_path": None,
+        "replaced_path": None,
+        "files": 0,
+        "bytes": 0,
+        "mismatched": [],
+        "missing": [],
+        "unexpected": [],
+        "error": None
+    }
+    if not archive_file.is_file():
+        result["error"] = f"备份文件不存在: {archive_file}"
+        return result
+
+    staging = workspace.parent / f".{workspace.name}.restore-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        manifest, extracted, rejected = extract_archive(archive_file, staging, workspace.name)
+        if manifest is None:
+            raise ValueError(f"备份中缺少校验清单 {MANIFEST_NAME}")
+        expected = manifest.get("files", {})
+        result["mismatched"] = sorted(p for p in expected if p in extracted and extracted[p] != expected[p])
+        result["missing"] = sorted(p for p in expected if p not in extracted)
+        result["unexpected"] = sorted([p for p in extracted if p not in expected] + rejected)
+        result["files"] = len(extracted)
+        result["bytes"] = sum(f["size"] for f in extracted.values())
+        if result["mismatched"] or result["missing"] or result["unexpected"]:
+            raise ValueError("校验失败，知识库未修改")
+        for rel_path in manifest.get("dirs", []):
+            (staging / rel_path).mkdir(parents=True, exist_ok=True)
+
+        if workspace.exists():
+            replaced = next_backup_path(workspace)
+            os.rename(workspace, replaced)
+            result["replaced_path"] = str(replaced)
+        os.rename(staging, workspace)
+        result["restored_path"] = str(workspace)
+        result["success"] = True
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return result
+
+
+# 写入计划事务目录（位于 helloagents/ 下，以 . 开头，不出现在扫描结果中）
+TXN_DIR_PREFIX = ".upgrade-txn-"
+WRITE_LOCK = "upgrade-write"
+
+
+def normalize_plan_path(value) -> str:
+    """
+    校验并规范化计划中的路径（相对于 helloagents/，不允许越界或指向事务目录）
+
+    Raises:
+        ValueError: 路径无效
+    """
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"路径无效: {value!r}")
+    parts = [part for part in value.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or value.startswith(("/", "\\")) or ":" in parts[0] or ".." in parts:
+        raise ValueError(f"路径必须位于知识库目录内: {value}")
+    if parts[0].startswith(TXN_DIR_PREFIX):
+        raise ValueError(f"路径无效: {value}")
+    return "/".join(parts)
+
+
+def _tree_size(path: Path) -> Tuple[int, int]:
+    """文件或目录树的 (文件数, 字节数)"""
+    if not path.is_dir():
+        return 1, path.stat().st_size
+    files, size = 0, 0
+    for rel_path, entry in iter_tree(path):
+        if not entry.is_dir():
+            files += 1
+            size += entry.stat().st_size
+    return files, size
+
+
+class PlanSimulator:
+    """
+    在不修改文件系统的前提下按顺序模拟计划操作，用于提交前校验与 --dry-run 统计
+
+    state 记录被计划改变过的路径: False（已删除/移走）、True（计划新建）、str（由该真实路径移入）；
+    未记录的路径沿用文件系统的实际状态。
+    """
+
+    def __init__(self, workspace: Path):
+        self.workspace = workspace
+        self.state: Dict[str, object] = {}
+        self.new_dirs = set()
+
+    def _lookup(self, rel: str) -> Tuple[Optional[str], object, List[str]]:
+        parts = rel.split("/")
+        for i in range(len(parts), 0, -1):
+            key = "/".join(parts[:i])
+            if key in self.state:
+                return key, self.state[key], parts[i:]
+        return None, None, parts
+
+    def origin(self, rel: str) -> Optional[Path]:
+        """路径当前内容对应的真实路径（计划新建或已删除时为 None）"""
+        key, value, rest = self._lookup(rel)
+        if key is None:
+            return self.workspace / rel
+        if isinstance(value, str):
+            return Path(value).joinpath(*rest)
+        return None
+
+    def exists(self, rel: str) -> bool:
+        key, value, rest = self._lookup(rel)
+        if key is not None and value is True:
+            return not rest
+        origin = self.origin(rel)
+        return origin is not None and origin.exists()
+
+    def is_dir(self, rel: str) -> bool:
+        key, value, rest = self._lookup(rel)
+        if value is True:
+            return not rest and rel in self.new_dirs
+        origin = self.origin(rel)
+        return origin is not None and origin.is_dir()
+
+    def _forget(self, rel: str):
+        for key in [k for k in self.state if k.startswith(rel + "/")]:
+            del self.state[key]
+
+    def _create_parents(self, rel: str) -> int:
+        created = 0
+        parts = rel.split("/")[:-1]
+        for i in range(1, len(parts) + 1):
+            parent = "/".join(parts[:i])
+            if not self.exists(parent):
+                self.state[parent] = True
+                self.new_dirs.add(parent)
+                created += 1
+            elif not self.is_dir(parent):
+                raise ValueError(f"父路径是文件: {parent}")
+        return created
+
+    def write(self, rel: str) -> Tuple[bool, int]:
+        """返回 (是否覆盖已有文件, 新建目录数)"""
+        if self.exists(rel) and self.is_dir(rel):
+            raise ValueError(f"目标是目录: {rel}")
+        overwrite = self.exists(rel)
+        created = self._create_parents(rel)
+        self.state[rel] = True
+        self.new_dirs.discard(rel)
+        return overwrite, created
+
+    def rename(self, src: str, dst: str) -> int:
+        if not self.exists(src):
+            raise ValueError(f"源文件不存在: {src}")
+        if self.exists(dst):
+            raise ValueError(f"目标已存在: {dst}")
+        if dst.startswith(src + "/"):
+            raise ValueError(f"不能移动到自身内部: {src} → {dst}")
+        created = self._create_parents(dst)
+        origin = self.origin(src)
+        moved = {k[len(src):]: v for k, v in self.state.items() if k.startswith(src + "/")}
+        self._forget(src)
+        self._forget(dst)
+        self.state[dst] = str(origin) if origin is not None else True
+        if src in self.new_dirs:
+            self.new_dirs.discard(src)
+            self.new_dirs.add(dst)
+        for suffix, value in moved.items():
+            self.state[dst + suffix] = value
+        self.state[src] = False
+        return created
+
+    def delete(self, rel: str) -> Tuple[int, int]:
+        """返回被删除的 (已有文件数, 字节数)；路径不存在时为 (0, 0)"""
+        if not self.exists(rel):
+            return 0, 0
+        origin = self.origin(rel)
+        removed = _tree_size(origin) if origin is not None and origin.exists() else (0, 0)
+        self._forget(rel)
+        self.state[rel] = False
+        self.new_dirs.discard(rel)
+        return removed
+
+    def mkdir(self, rel: str) -> int:
+        if self.exists(rel):
+            if not self.is_dir(rel):
+                raise ValueError(f"目标是文件: {rel}")
+            return 0
+        created = self._create_parents(rel) + 1
+        self.state[rel] = True
+        self.new_dirs.add(rel)
+        return created
+
+
+def load_plan(plan_file: Path) -> List[Dict]:
+    """
+    读取并校验写入计划（动作、必需字段、路径）
+
+    Returns:
+        规范化后的操作列表
+
+    Raises:
+        ValueError: 计划格式无效
+    """
+    plan = json.loads(plan_file.read_text(encoding='utf-8'))
+    operations = plan.get("operations", []) if isinstance(plan, dict) else None
+    if not isinstance(operations, list):
+        raise ValueError("计划缺少 operations 数组")
+    normalized = []
+    for index, op in enumerate(operations, 1):
+        action = op.get("action") if isinstance(op, dict) else None
+        if action == "write":
+            if not isinstance(op.get("content"), str):
+                raise ValueError(f"操作 {index}: write 缺少 content")
+            normalized.append({"action": action, "path": normalize_plan_path(op.get("path")), "content": op["content"]})
+        elif action == "rename":
+            normalized.append({"action": action, "from": normalize_plan_path(op.get("from")),
+                               "to": normalize_plan_path(op.get("to"))})
+        elif action in ("delete", "mkdir"):
+            normalized.append({"action": action, "path": normalize_plan_path(op.get("path"))})
+        else:
+            raise ValueError(f"操作 {index}: 未知操作: {action}")
+    return normalized
+
+
+def simulate_plan(workspace: Path, operations: List[Dict]) -> Tuple[Dict, List[str], List[str]]:
+    """
+    按顺序模拟计划，统计影响范围
+
+    Returns:
+        (统计, 操作描述, 错误)
+        统计: {"files_written", "files_created", "files_overwritten", "bytes_written", "renamed",
+               "deleted_files", "deleted_bytes", "dirs_created", "touched_files", "touched_bytes"}
+    """
+    sim = PlanSimulator(workspace)
+    stats = {"files_written": 0, "files_created": 0, "files_overwritten": 0, "bytes_written": 0,
+             "renamed": 0, "deleted_files": 0, "deleted_bytes": 0, "dirs_created": 0}
+    described, errors = [], []
+    for index, op in enumerate(operations, 1):
+        action = op["action"]
+        try:
+            if action == "write":
+                overwrite, created = sim.write(op["path"])
+                stats["files_written"] += 1
+                stats["files_overwritten" if overwrite else "files_created"] += 1
+                stats["bytes_written"] += len(op["content"].encode("utf-8"))
+                stats["dirs_created"] += created
+                described.append(f"write: {op['path']}")
+            elif action == "rename":
+                stats["dirs_created"] += sim.rename(op["from"], op["to"])
+                stats["renamed"] += 1
+                described.append(f"rename: {op['from']} → {op['to']}")
+            elif action == "delete":
+                files, size = sim.delete(op["path"])
+                stats["deleted_files"] += files
+                stats["deleted_bytes"] += size
+                described.append(f"delete: {op['path']}")
+            else:
+                stats["dirs_created"] += sim.mkdir(op["path"])
+                described.append(f"mkdir: {op['path']}")
+        except (OSError, ValueError) as e:
+            errors.append(f"操作 {index} {action}: {e}")
+    stats["touched_files"] = stats["files_written"] + stats["renamed"] + stats["deleted_files"]
+    stats["touched_bytes"] = stats["bytes_written"] + stats["deleted_bytes"]
+    return stats, described, errors
+
+
+class WriteTransaction:
+    """
+    写入计划事务：内容先写入事务目录 stage/，提交时逐项原子改名，被覆盖或删除的内容移入 old/；
+    每步的撤销记录写入 journal.json，失败时逆序撤销，中断时由下次 --write 回滚。
+    """
+
+    def __init__(self, workspace: Path, txn_dir: Optional[Path] = None):
+        self.workspace = workspace
+        self.dir = txn_dir or workspace / f"{TXN_DIR_PREFIX}{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+        self.undo: List[List[str]] = []
+        self.state = "staging"
+
+    def save(self):
+        data = {"state": self.state, "undo": self.undo}
+        write_bytes_atomic(self.dir / "journal.json", json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def stage(self, operations: List[Dict]):
+        """写出全部 write 内容（fsync），此阶段失败不影响知识库"""
+        (self.dir / "stage").mkdir(parents=True)
+        (self.dir / "old").mkdir()
+        self.save()
+        for index, op in enumerate(operations):
+            if op["action"] == "write":
+                write_bytes_atomic(self.dir / "stage" / str(index), op["content"].encode("utf-8"))
+
+    def _record(self, *entry: str):
+        self.undo.append(list(entry))
+        self.save()
+
+    def _make_parents(self, target: Path):
+        missing = []
+        parent = target.parent
+        while not parent.exists():
+            missing.append(parent)
+            parent = parent.parent
+        for directory in reversed(missing):
+            directory.mkdir()
+            self._record("rmdir", str(directory))
+
+    def commit(self, operations: List[Dict]) -> List[str]:
+        """按顺序执行操作（任一步失败抛出异常，由调用方 rollback）"""
+        self.state = "committing"
+        self.save()
+        executed = []
+        for index, op in enumerate(operations):
+            action = op["action"]
+            if action == "write":
+                target = self.workspace / op["path"]
+                self._make_parents(target)
+                if target.exists():
+                    backup = self.dir / "old" / str(index)
+                    try:
+                        os.link(target, backup)
+                    except OSError:
+                        shutil.copy2(target, backup)
+                    self._record("replace", str(backup), str(target))
+                else:
+                    self._record("unlink", str(target))
+                os.replace(self.dir / "stage" / str(index), target)
+                executed.append(f"write: {op['path']}")
+            elif action == "rename":
+                source, target = self.workspace / op["from"], self.workspace / op["to"]
+                self._make_parents(target)
+                self._record("rename", str(target), str(source))
+                os.rename(source, target)
+                executed.append(f"rename: {op['from']} → {op['to']}")
+            elif action == "delete":
+                target = self.workspace / op["path"]
+                if target.exists() or target.is_symlink():
+                    backup = self.dir / "old" / str(index)
+                    self._record("rename", str(backup), str(target))
+                    os.rename(target, backup)
+                    executed.append(f"delete: {op['path']}")
+            else:
+                target = self.workspace / op["path"]
+                self._make_parents(target / "_")
+                executed.append(f"mkdir: {op['path']}")
+        self.state = "committed"
+        self.save()
+        return executed
+
+    def rollback(self):
+        """逆序撤销已执行的步骤（撤销记录先于操作写入，目标不存在的记录直接跳过）"""
+        for action, *paths in reversed(self.undo):
+            if action == "rmdir":
+                try:
+                    os.rmdir(paths[0])
+                except OSError:
+                    pass
+            elif action == "unlink":
+                Path(paths[0]).unlink(missing_ok=True)
+            elif action == "replace":
+                if Path(paths[0]).exists():
+                    os.replace(paths[0], paths[1])
+            elif action == "rename":
+                if os.path.lexists(paths[0]) and not os.path.lexists(paths[1]):
+                    os.rename(paths[0], paths[1])
+        self.state = "rolled_back"
+        self.save()
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def recover_write_transactions(workspace: Path) -> List[Dict]:
+    """回滚上次中断的写入事务（提交中 → 回滚；已提交或未开始提交 → 仅清理）"""
+    results = []
+    if not workspace.is_dir():
+        return results
+    for txn_dir in sorted(workspace.glob(f"{TXN_DIR_PREFIX}*")):
+        txn = WriteTransaction(workspace, txn_dir)
+        try:
+            journal = json.loads((txn_dir / "journal.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            journal = {"state": "staging", "undo": []}
+        action = "cleaned"
+        if journal.get("state") == "committing":
+            txn.undo = journal.get("undo", [])
+            try:
+                txn.rollback()
+                action = "rolled_back"
+            except OSError as e:
+                results.append({"transaction": txn_dir.name, "action": "failed", "error": str(e)})
+                continue
+        txn.cleanup()
+        results.append({"transaction": txn_dir.name, "action": action})
+    return results
+
+
+def write_files(workspace: Path, plan_file: Path, dry_run: bool = False) -> Dict:
+    """
+    按计划写入文件（由 AI 生成的写入计划），整个计划作为一个事务执行
 
     计划文件格式 (JSON):
     {
@@ -176,13 +1042,20 @@ def write_files(workspace: Path, plan_file: Path) -> Dict:
         ]
     }
 
+    执行顺序: 校验计划格式与路径 → 按顺序模拟（源不存在、目标已存在、父路径是文件等错误在此发现）
+    → 写入内容暂存到 helloagents/.upgrade-txn-*/ → 逐项原子改名提交。提交中任一步失败时全部撤销，
+    知识库保持计划执行前的状态。dry_run 时只模拟并统计影响范围。
+
     Returns:
-        {"success": bool, "executed": [str], "errors": [str]}
+        {"success": bool, "executed": [str], "errors": [str], "dry_run": bool, "stats": {...},
+         "rolled_back": bool, "recovered"?: [...]}
     """
     result = {
         "success": True,
         "executed": [],
-        "errors": []
+        "errors": [],
+        "dry_run": dry_run,
+        "rolled_back": False
     }
 
     if not plan_file.exists():
@@ -191,56 +1064,46 @@ def write_files(workspace: Path, plan_file: Path) -> Dict:
         return result
 
     try:
-        plan = json.loads(plan_file.read_text(encoding='utf-8'))
+        operations = load_plan(plan_file)
     except json.JSONDecodeError as e:
         result["success"] = False
         result["errors"].append(f"JSON解析错误: {e}")
         return result
+    except ValueError as e:
+        result["success"] = False
+        result["errors"].append(str(e))
+        return result
 
-    operations = plan.get("operations", [])
-
-    for op in operations:
-        action = op.get("action")
-        try:
-            if action == "write":
-                file_path = workspace / op["path"]
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(op["content"], encoding='utf-8')
-                result["executed"].append(f"write: {op['path']}")
-
-            elif action == "rename":
-                from_path = workspace / op["from"]
-                to_path = workspace / op["to"]
-                if from_path.exists():
-                    to_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.move(str(from_path), str(to_path))
-                    result["executed"].append(f"rename: {op['from']} → {op['to']}")
-                else:
-                    result["errors"].append(f"源文件不存在: {op['from']}")
+    if dry_run:
+        result["stats"], result["operations"], result["errors"] = simulate_plan(workspace, operations)
+        result["success"] = not result["errors"]
+        return result
 
-            elif action == "delete":
-                file_path = workspace / op["path"]
-                if file_path.exists():
-                    if file_path.is_dir():
-                        shutil.rmtree(file_path)
-                    else:
-                        file_path.unlink()
-                    result["executed"].append(f"delete: {op['path']}")
-
-            elif action == "mkdir":
-                dir_path = workspace / op["path"]
-                dir_path.mkdir(parents=True, exist_ok=True)
-                result["executed"].append(f"mkdir: {op['path']}")
+    workspace.mkdir(parents=True, exist_ok=True)
+    with workspace_lock(workspace, WRITE_LOCK):
+        recovered = recover_write_transactions(workspace)
+        if recovered:
+            result["recovered"] = recovered
 
-            else:
-                result["errors"].append(f"未知操作: {action}")
+        result["stats"], _, result["errors"] = simulate_plan(workspace, operations)
+        if result["errors"]:
+            result["success"] = False
+            return result
 
+        txn = WriteTransaction(workspace)
+        try:
+            txn.stage(operations)
+            result["executed"] = txn.commit(operations)
         except Exception as e:
             result["success"] = False
-            result["errors"].append(f"{action} {op.get('path', '')}: {e}")
-
-    if result["errors"]:
-        result["success"] = False
+            result["errors"].append(f"{type(e).__name__}: {e}")
+            try:
+                txn.rollback()
+                result["rolled_back"] = True
+            except Exception as rollback_error:
+                result["errors"].append(f"回滚失败: {rollback_error}（下次执行 --write 时自动回滚）")
+                return result
+        txn.cleanup()
 
     return result
 
@@ -268,12 +1131,71 @@ def main():
         action="store_true",
         help="备份现有知识库"
     )
+    group.add_argument(
+        "--restore",
+        metavar="BACKUP_ARCHIVE",
+        help="从压缩备份（.tar.xz/.zip）恢复知识库，校验通过后替换 helloagents/"
+    )
     group.add_argument(
         "--write",
         metavar="JSON_FILE",
         help="按计划写入文件（JSON格式的操作计划）"
     )
 
+    parser.add_argument(
+        "--hash",
+        action="store_true",
+        help="与 --scan 同用：计算文件 sha256（线程池并行）"
+    )
+    parser.add_argument(
+        "--save-manifest",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="MANIFEST",
+        help=f"与 --scan 同用：保存扫描清单（路径、大小、修改时间、sha256；默认 helloagents/{SCAN_MANIFEST_NAME}）"
+    )
+    parser.add_argument(
+        "--since",
+        metavar="MANIFEST",
+        default=None,
+        help="与 --scan 同用：只返回相对该清单新增、修改、删除的文件"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"摘要计算线程数（默认: {DEFAULT_JOBS}）"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="与 --write 同用：只校验计划并统计将写入/删除的文件数与字节数，不修改文件"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="与 --backup 同用：未变化的文件硬链接到上一次备份，只复制变化的文件"
+    )
+    parser.add_argument(
+        "--compress",
+        nargs="?",
+        const="tar.xz",
+        choices=list(COMPRESS_FORMATS),
+        help="与 --backup 同用：流式压缩为单个归档文件（默认 tar.xz）"
+    )
+    parser.add_argument(
+        "--retain",
+        type=int,
+        default=None,
+        help="与 --backup 同用：备份成功后只保留最近 N 个备份"
+    )
+    parser.add_argument(
+        "--retain-days",
+        type=int,
+        default=None,
+        help="与 --backup 同用：备份成功后删除早于 D 天的备份"
+    )
     parser.add_argument(
         "--path",
         default=None,
@@ -281,6 +1203,12 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.incremental and args.compress:
+        parser.error("--incremental 与 --compress 不能同时使用")
+    if args.retain is not None and args.retain < 1:
+        parser.error("--retain 必须大于等于 1")
+    if args.retain_days is not None and args.retain_days < 0:
+        parser.error("--retain-days 不能为负数")
 
     # 验证基础路径
     try:
@@ -293,7 +1221,20 @@ def main():
 
     # 执行操作
     if args.scan:
-        result = scan_workspace(workspace)
+        previous = None
+        if args.since:
+            try:
+                previous = load_manifest(Path(args.since))
+            except (OSError, ValueError) as e:
+                print(json.dumps({"error": f"读取扫描清单失败: {e}"}, ensure_ascii=False))
+                sys.exit(1)
+        with_hash = args.hash or previous is not None or args.save_manifest is not None
+        scan = scan_workspace(workspace, with_hash=with_hash, jobs=args.jobs, previous=previous)
+        result = diff_scan(scan, previous, args.since) if previous is not None else scan
+        if args.save_manifest is not None and scan["exists"]:
+            manifest_file = Path(args.save_manifest) if args.save_manifest else workspace / SCAN_MANIFEST_NAME
+            write_bytes_atomic(manifest_file, json.dumps(build_manifest(scan), ensure_ascii=False).encode("utf-8"))
+            result["manifest"] = str(manifest_file)
         print(json.dumps(result, ensure_ascii=False, indent=2))
         sys.exit(0)
 
@@ -306,13 +1247,21 @@ def main():
             sys.exit(0)  # 目录已存在也是成功
 
     elif args.backup:
-        result = create_backup(workspace)
+        result = create_backup(workspace, incremental=args.incremental, compress=args.compress)
+        if result["success"] and (args.retain is not None or args.retain_days is not None):
+            result["pruned"] = prune_backups(workspace, args.retain, args.retain_days,
+                                             keep=Path(result["backup_path"]))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        sys.exit(0 if result["success"] else 1)
+
+    elif args.restore:
+        result = restore_backup(workspace, Path(args.restore))
         print(json.dumps(result, ensure_ascii=False, indent=2))
         sys.exit(0 if result["success"] else 1)
 
     elif args.write:
         plan_file = Path(args.write)
-        result = write_files(workspace, plan_file)
+        result = write_files(workspace, plan_file, dry_run=args.dry_run)
         print(json.dumps(result, ensure_ascii=False, indent=2))
         sys.exit(0 if result["success"] else 1)
 
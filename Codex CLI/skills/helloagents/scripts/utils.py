@@ -10,6 +10,15 @@ import os
 import sys
 import io
 import functools
+import hashlib
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 
 def setup_encoding():
@@ -281,12 +290,13 @@ def get_year_month(timestamp: str) -> str:
     return f"{timestamp[:4]}-{timestamp[4:6]}"
 
 
-def list_packages(plan_path: Path) -> List[Dict]:
+def list_packages(plan_path: Path, with_tasks: bool = True) -> List[Dict]:
     """
     列出所有方案包
 
     Args:
         plan_path: plan/ 目录路径
+        with_tasks: 是否读取 tasks.md 统计任务数（False 时不读取文件内容，task_count 为 None）
 
     Returns:
         方案包信息列表
@@ -306,7 +316,7 @@ def list_packages(plan_path: Path) -> List[Dict]:
                     'timestamp': timestamp,
                     'feature': feature,
                     'complete': is_package_complete(item),
-                    'task_count': count_tasks(item / "tasks.md")
+                    'task_count': count_tasks(item / "tasks.md") if with_tasks else None
                 }
                 packages.append(pkg_info)
 
@@ -374,6 +384,131 @@ def get_package_summary(package_path: Path) -> str:
     return "(无描述)"
 
 
+# === 文件工具 ===
+
+# 文件摘要分块读取大小（1 MiB）
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: Path, algorithm: str = "sha256", chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    分块计算文件摘要（不将整个文件读入内存）
+
+    Args:
+        file_path: 文件路径
+        algorithm: hashlib 支持的算法名称
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        十六进制摘要字符串
+    """
+    h = hashlib.new(algorithm)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_bytes_atomic(file_path: Path, data: bytes) -> None:
+    """
+    原子写入文件：写入同目录临时文件后 os.replace 覆盖，读者不会看到半写入的内容
+
+    Args:
+        file_path: 目标文件路径
+        data: 文件内容
+    """
+    tmp = file_path.with_name(f".{file_path.name}.tmp-{os.getpid()}")
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, file_path)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+
+
+# 工作空间锁目录（位于 helloagents/ 下）
+LOCK_DIR_NAME = ".locks"
+
+
+@contextmanager
+def file_lock(lock_path: Path, blocking: bool = True):
+    """
+    进程间排他文件锁（POSIX: fcntl.flock；Windows: msvcrt.locking）
+
+    进程退出时锁由操作系统自动释放，不会因崩溃遗留死锁。
+
+    Args:
+        lock_path: 锁文件路径（不存在时创建）
+        blocking: 锁被占用时是否等待
+
+    Yields:
+        是否获得锁（blocking=False 且锁被占用时为 False）
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    acquired = False
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                acquired = True
+            except BlockingIOError:
+                pass
+        else:
+            while not acquired:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    acquired = True
+                except OSError:
+                    if not blocking:
+                        break
+                    time.sleep(0.05)
+        yield acquired
+    finally:
+        if acquired:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)
+
+
+def workspace_lock(workspace: Path, name: str, blocking: bool = True):
+    """
+    工作空间命名锁（helloagents/.locks/<name>.lock）
+
+    用法:
+        with workspace_lock(workspace, "archive-index") as acquired:
+            ...
+    """
+    return file_lock(workspace / LOCK_DIR_NAME / f"{name}.lock", blocking)
+
+
+# 方案包 tasks.md 读改写锁名称前缀（helloagents/.locks/tasks-<包名>.lock）
+TASKS_LOCK_PREFIX = "tasks-"
+
+
+def tasks_lock(task_file: Path, blocking: bool = True):
+    """
+    方案包 tasks.md 读改写锁（按包名加锁，plan/ 与 archive/ 中的同名方案包共用一把锁）
+
+    锁文件位于工作空间 .locks/ 下，不会随方案包迁移进入 archive/。
+
+    Args:
+        task_file: tasks.md 路径（plan/<包名>/tasks.md 或 archive/YYYY-MM/<包名>/tasks.md）
+        blocking: 锁被占用时是否等待
+    """
+    package_path = task_file.parent
+    workspace = next((p for p in package_path.parents if p.name == DEFAULT_WORKSPACE),
+                     package_path.parent.parent)
+    return workspace_lock(workspace, f"{TASKS_LOCK_PREFIX}{package_path.name}", blocking)
+
+
 # === 模板加载机制 ===
 
 def get_templates_dir() -> Path:
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+知识库验证脚本（~validate 知识库部分）
+检查核心文件、空文件、死链、必需章节和格式问题，按 Critical/Warning/Info 分级输出
+
+检查范围: helloagents/ 下的 Markdown 文件（plan/ 与 archive/ 中的方案包由 validate_package.py 负责）
+    - INDEX.md、context.md、CHANGELOG*.md
+    - modules/*.md
+    - archive/_index*.md
+
+Usage:
+    python validate_kb.py [--path <base-path>] [--jobs <N>]
+
+Examples:
+    python validate_kb.py                         # 验证当前目录知识库
+    python validate_kb.py --path /project         # 验证指定目录知识库
+    python validate_kb.py --jobs 16               # 16 线程并行检查
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+# 确保能找到同目录下的 utils 模块
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import (
+    setup_encoding,
+    get_workspace_path,
+    script_error_handler,
+    validate_base_path,
+    get_template_loader
+)
+from validate_package import normalize_section_title, scan_headings
+
+# 严重程度（按输出顺序）
+SEVERITIES = ("critical", "warning", "info")
+
+# 核心文件：缺失或为空为 Critical
+CORE_FILES = ["INDEX.md", "context.md"]
+
+# 推荐文件：缺失为 Warning
+RECOMMENDED_FILES = ["CHANGELOG.md", "modules/_index.md", "archive/_index.md"]
+
+# 需要检查必需章节的文件 → 对应模板
+SECTION_TEMPLATES = {
+    "context.md": "context.md",
+    "modules/*.md": "modules/module.md"
+}
+
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) + 4)
+
+# Markdown 链接: [text](target) / ![alt](target)
+LINK_PATTERN = re.compile(r'!?\[[^\]\n]*\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)')
+
+# 行内代码（其中的链接不检查）
+INLINE_CODE_PATTERN = re.compile(r'`[^`\n]*`')
+
+# 外部链接或锚点
+EXTERNAL_LINK_PATTERN = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)')
+
+# 未替换的模板占位符: {模块名} / YYYY-MM
+PLACEHOLDER_PATTERN = re.compile(r'\{[^{}\n]+\}|YYYY')
+
+# 缺少空格的标题: ##标题
+BAD_HEADING_PATTERN = re.compile(r'^#{1,6}[^#\s]')
+
+
+def finding(severity: str, file: str, code: str, message: str, line: Optional[int] = None) -> Dict:
+    """构造单条检查结果"""
+    return {"severity": severity, "file": file, "line": line, "code": code, "message": message}
+
+
+def collect_kb_files(workspace: Path) -> List[Path]:
+    """
+    收集需要检查的知识库文件
+
+    Returns:
+        文件路径列表（按相对路径排序）
+    """
+    files = []
+    for pattern in ("*.md", "modules/*.md", "archive/_index*.md"):
+        files.extend(p for p in workspace.glob(pattern) if p.is_file())
+    return sorted(set(files), key=lambda p: p.relative_to(workspace).as_posix())
+
+
+def get_section_rules() -> Dict[str, List[str]]:
+    """
+    从模板提取必需章节（与 TemplateLoader.get_required_sections() 一致）
+
+    Returns:
+        {文件模式: [归一化必需章节]}，模板缺失的模式不在结果中
+    """
+    loader = get_template_loader()
+    rules = {}
+    for pattern, template in SECTION_TEMPLATES.items():
+        if loader.exists(template):
+            rules[pattern] = [normalize_section_title(s) for s in loader.get_required_sections(template)]
+    return rules
+
+
+def section_rule_for(rel_path: str, rules: Dict[str, List[str]]) -> Optional[List[str]]:
+    """获取文件适用的必需章节"""
+    if rel_path in rules:
+        return rules[rel_path]
+    if rel_path.startswith("modules/") and "/" not in rel_path[len("modules/"):] \
+            and not Path(rel_path).name.startswith("_"):
+        return rules.get("modules/*.md")
+    return None
+
+
+def resolve_link(target: str, file_path: Path) -> Path:
+    """将相对链接解析为文件系统路径（去除锚点与查询参数）"""
+    target = unquote(target.split('#', 1)[0].split('?', 1)[0])
+    return (file_path.parent / target).resolve()
+
+
+def check_file(file_path: Path, workspace: Path, rules: Dict[str, List[str]]) -> List[Dict]:
+    """
+    检查单个知识库文件
+
+    Args:
+        file_path: 文件路径
+        workspace: helloagents/ 目录
+        rules: get_section_rules() 的结果
+
+    Returns:
+        检查结果列表
+    """
+    rel_path = file_path.relative_to(workspace).as_posix()
+    findings: List[Dict] = []
+
+    try:
+        content = file_path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        return [finding("warning", rel_path, "encoding", "文件不是有效的 UTF-8 编码")]
+    except OSError as e:
+        return [finding("critical", rel_path, "unreadable", f"无法读取文件: {e}")]
+
+    if not content.strip():
+        severity = "critical" if rel_path in CORE_FILES else "warning"
+        return [finding(severity, rel_path, "empty", "文件为空")]
+
+    lines = content.splitlines()
+
+    # 必需章节
+    required = section_rule_for(rel_path, rules)
+    if required:
+        present = {normalize_section_title(title) for _, title in scan_headings(content, level=2)}
+        missing = [s for s in required if s not in present]
+        if missing:
+            findings.append(finding("warning", rel_path, "missing_section", f"缺少必需章节: {', '.join(missing)}"))
+
+    # 格式与链接（跳过代码块）
+    in_fence = False
+    fence_line = None
+    first_text = None
+    placeholders = 0
+    for lineno, line in enumerate(lines, 1):
+        stripped = line.lstrip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            in_fence = not in_fence
+            fence_line = lineno if in_fence else None
+            continue
+        if in_fence:
+            continue
+        if first_text is None and stripped:
+            first_text = (lineno, stripped)
+
+        if BAD_HEADING_PATTERN.match(line):
+            findings.append(finding("info", rel_path, "heading_format", "标题 # 后缺少空格", lineno))
+
+        text = INLINE_CODE_PATTERN.sub('', line)
+        for match in LINK_PATTERN.finditer(text):
+            target = match.group(1)
+            if EXTERNAL_LINK_PATTERN.match(target):
+                continue
+            if PLACEHOLDER_PATTERN.search(target):
+                placeholders += 1
+                continue
+            resolved = resolve_link(target, file_path)
+            if not resolved.exists():
+                findings.append(finding("warning", rel_path, "dead_link", f"链接目标不存在: {target}", lineno))
+
+    if in_fence:
+        findings.append(finding("warning", rel_path, "unclosed_fence", "代码块未闭合", fence_line))
+    if first_text and not first_text[1].startswith("# "):
+        findings.append(finding("info", rel_path, "missing_title", "首行不是一级标题", first_text[0]))
+    if placeholders:
+        findings.append(finding("info", rel_path, "placeholder_link", f"{placeholders} 个链接仍为模板占位符"))
+
+    return findings
+
+
+def check_structure(workspace: Path, files: List[Path]) -> List[Dict]:
+    """检查核心文件存在性与模块索引覆盖率"""
+    findings = []
+    for name in CORE_FILES:
+        if not (workspace / name).is_file():
+            findings.append(finding("critical", name, "missing_core", "核心文件缺失"))
+    for name in RECOMMENDED_FILES:
+        if not (workspace / name).is_file():
+            findings.append(finding("warning", name, "missing_file", "文件缺失"))
+
+    modules_index = workspace / "modules" / "_index.md"
+    if modules_index.is_file():
+        try:
+            index_content = modules_index.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            index_content = ""
+        for path in files:
+            rel_path = path.relative_to(workspace).as_posix()
+            if rel_path.startswith("modules/") and not path.name.startswith("_") and path.name not in index_content:
+                findings.append(finding("info", rel_path, "unindexed_module", "模块文档未在 modules/_index.md 中登记"))
+    return findings
+
+
+def validate_kb(workspace: Path, jobs: int = DEFAULT_JOBS) -> Dict:
+    """
+    验证知识库
+
+    Returns:
+        {
+            "workspace": str, "exists": bool, "valid": bool,   # valid: 无 Critical
+            "summary": {"files": int, "critical": int, "warning": int, "info": int},
+            "findings": [{"severity", "file", "line", "code", "message"}]
+        }
+    """
+    result = {
+        "workspace": str(workspace),
+        "exists": workspace.is_dir(),
+        "valid": True,
+        "summary": {"files": 0, **{s: 0 for s in SEVERITIES}},
+        "findings": []
+    }
+
+    if not result["exists"]:
+        result["valid"] = False
+        result["summary"]["critical"] = 1
+        result["findings"].append(finding("critical", ".", "missing_kb", "知识库不存在，请执行 ~init"))
+        return result
+
+    files = collect_kb_files(workspace)
+    rules = get_section_rules()
+    findings = check_structure(workspace, files)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for file_findings in pool.map(lambda p: check_file(p, workspace, rules), files):
+            findings.extend(file_findings)
+
+    order = {s: i for i, s in enumerate(SEVERITIES)}
+    findings.sort(key=lambda f: (order[f["severity"]], f["file"], f["line"] or 0))
+
+    result["findings"] = findings
+    result["summary"]["files"] = len(files)
+    for f in findings:
+        result["summary"][f["severity"]] += 1
+    result["valid"] = result["summary"]["critical"] == 0
+    return result
+
+
+@script_error_handler
+def main():
+    """主函数"""
+    setup_encoding()
+
+    parser = argparse.ArgumentParser(
+        description="验证 HelloAGENTS 知识库"
+    )
+    parser.add_argument(
+        "--path",
+        default=None,
+        help="项目根目录（默认: 当前目录）"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        metavar="N",
+        help=f"并行检查线程数（默认: {DEFAULT_JOBS}）"
+    )
+
+    args = parser.parse_args()
+
+    # 验证基础路径
+    try:
+        validate_base_path(args.path)
+    except ValueError as e:
+        print(json.dumps({
+            "error": str(e),
+            "valid": False
+        }, ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+    result = validate_kb(get_workspace_path(args.path), jobs=args.jobs)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    # 返回状态码: 0=无 Critical, 1=存在 Critical
+    sys.exit(0 if result["valid"] else 1)
+
+
+if __name__ == "__main__":
+    main()
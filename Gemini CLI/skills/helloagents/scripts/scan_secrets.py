@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+敏感信息扫描脚本
+检测知识库、方案包与代码中泄露的密钥和硬编码凭据（~validate / ~review / ~commit）
+
+检测方式:
+    - 已知令牌格式（AWS/GitHub/Slack/Google/Stripe/OpenAI/私钥/JWT/URL 凭据）合并为单个预编译正则
+    - 先用字面量触发词（bytes.find）定位候选行，正则只在候选行上运行
+    - 通用赋值（password/secret/token/api_key = "..."）仅在取值熵足够高且不是占位符时报告
+    - 文件按块流式读取（字节级匹配，不整体解码），多进程并行
+    - 目录排除规则与 project_stats.py 一致（跳过 . 开头的目录；知识库目录按 --scope 单独处理）
+    - 跳过同级 helloagents_backup_* 备份目录（内容为知识库历史副本）
+    - 行内包含 "secret-scan: ignore" 时跳过该行
+
+Usage:
+    python scan_secrets.py [--path <project-path>] [--scope all|code|kb] [--jobs <N>] [<file> ...]
+
+Examples:
+    python scan_secrets.py                           # 扫描当前项目代码与知识库
+    python scan_secrets.py --scope kb                # 仅扫描 helloagents/（含 plan/、archive/）
+    python scan_secrets.py src/app.py .env           # 仅扫描指定文件（~commit 时传入变更文件）
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 确保能找到同目录下的 utils 模块
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import setup_encoding, script_error_handler, DEFAULT_WORKSPACE
+from project_stats import EXCLUDE_DIRS, get_project_root
+
+# 已知令牌格式: (规则名, 触发词, 字节正则)；触发词区分大小写，必须出现在匹配内容中
+KNOWN_TOKEN_RULES = [
+    ("private_key", [b"PRIVATE KEY"], rb'-----BEGIN (?:[A-Z0-9]+ )*PRIVATE KEY-----'),
+    ("aws_access_key", [b"AKIA", b"ASIA"], rb'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b'),
+    ("github_token", [b"ghp_", b"gho_", b"ghu_", b"ghs_", b"ghr_", b"github_pat_"],
+     rb'\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{60,})'),
+    ("slack_token", [b"xox"], rb'\bxox[abposr]-[A-Za-z0-9-]{10,}'),
+    ("google_api_key", [b"AIza"], rb'\bAIza[0-9A-Za-z_\-]{35}'),
+    ("stripe_key", [b"k_live_", b"k_test_"], rb'\b[rs]k_(?:live|test)_[0-9A-Za-z]{16,}'),
+    ("openai_key", [b"sk-"], rb'\bsk-(?:proj-|ant-)?[A-Za-z0-9_\-]{32,}'),
+    ("jwt", [b"eyJ"], rb'\beyJ[A-Za-z0-9_\-]{8,}\.eyJ[A-Za-z0-9_\-]{8,}\.[A-Za-z0-9_\-]{8,}'),
+    ("url_credentials", [b"://"], rb'\b[a-zA-Z][a-zA-Z0-9+.\-]*://[^\s:/@"\'<>]+:[^\s:/@"\'<>]{3,}@[^\s/"\'<>]+'),
+]
+
+# 通用赋值（值需要通过熵检查）；触发词在小写化内容中查找
+GENERIC_TRIGGERS = [
+    b"password", b"passwd", b"pwd", b"secret", b"token",
+    b"apikey", b"api_key", b"api-key", b"accesskey", b"access_key", b"access-key",
+    b"authkey", b"auth_key", b"auth-key", b"privatekey", b"private_key", b"private-key"
+]
+GENERIC_ASSIGNMENT_RULE = (
+    "generic_secret",
+    GENERIC_TRIGGERS,
+    rb'(?i:(?:password|passwd|pwd|secret|token|api[_\-]?key|access[_\-]?key|auth[_\-]?key|client[_\-]?secret|private[_\-]?key))'
+    rb'[A-Za-z0-9_\-]*["\']?\s*[:=]\s*["\']?(?P<value>[A-Za-z0-9+/=_\-.~!@#$%^&*:]{8,})'
+)
+
+# 合并后的单个预编译正则
+SECRET_PATTERN = re.compile(b'|'.join(
+    b'(?P<' + name.encode() + b'>' + pattern + b')'
+    for name, _, pattern in KNOWN_TOKEN_RULES + [GENERIC_ASSIGNMENT_RULE]
+))
+
+# 候选行触发词（去重）
+KNOWN_TRIGGERS = sorted({t for _, triggers, _ in KNOWN_TOKEN_RULES for t in triggers})
+
+# 规则严重程度
+RULE_SEVERITY = {name: "critical" for name, _, _ in KNOWN_TOKEN_RULES}
+RULE_SEVERITY["jwt"] = "warning"
+RULE_SEVERITY[GENERIC_ASSIGNMENT_RULE[0]] = "warning"
+
+# 通用赋值的熵阈值（比特/字符）
+ENTROPY_THRESHOLD = 3.0
+
+# 占位符/引用等非真实取值
+PLACEHOLDER_VALUE_PATTERN = re.compile(
+    rb'^(?:\$\{?|%|<|\{|\[|process\.env|os\.environ|getenv|env\(|config\.|settings\.|self\.|this\.)'
+    rb'|(?i:example|placeholder|changeme|your[_\-]|xxxx|\*\*\*|dummy|sample|redacted)'
+)
+
+DIGIT_PATTERN = re.compile(rb'[0-9]')
+LETTER_PATTERN = re.compile(rb'[A-Za-z]')
+
+# 忽略标记
+IGNORE_MARKER = b"secret-scan: ignore"
+
+# 流式读取块大小
+CHUNK_SIZE = 1024 * 1024
+
+# 单行最长缓冲（超长行按块切分处理）
+MAX_CARRY = 4 * CHUNK_SIZE
+
+# 默认最大文件大小
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024
+
+# 跳过的二进制/资源扩展名
+BINARY_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".svgz",
+    ".pdf", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar", ".war",
+    ".exe", ".dll", ".so", ".dylib", ".o", ".a", ".class", ".pyc", ".wasm",
+    ".mp3", ".mp4", ".mov", ".avi", ".woff", ".woff2", ".ttf", ".otf", ".eot",
+    ".lock"
+}
+
+# 知识库备份目录前缀（与 upgradewiki.py --backup 保持一致）
+BACKUP_PREFIX = "helloagents_backup_"
+
+# 少于该文件数时不启动进程池
+PARALLEL_MIN_FILES = 64
+
+
+def shannon_entropy(value: bytes) -> float:
+    """计算字节串的香农熵（比特/字符）"""
+    if not value:
+        return 0.0
+    counts: Dict[int, int] = {}
+    for b in value:
+        counts[b] = counts.get(b, 0) + 1
+    length = len(value)
+    return -sum(c / length * math.log2(c / length) for c in counts.values())
+
+
+def looks_like_secret(value: bytes) -> bool:
+    """通用赋值取值判定：字母数字混合、非占位符且熵足够高"""
+    if PLACEHOLDER_VALUE_PATTERN.search(value):
+        return False
+    if not (DIGIT_PATTERN.search(value) and LETTER_PATTERN.search(value)):
+        return False
+    return shannon_entropy(value) >= ENTROPY_THRESHOLD
+
+
+def redact(value: bytes) -> str:
+    """脱敏显示：保留前 4 个字符"""
+    text = value.decode("utf-8", errors="replace")
+    return f"{text[:4]}…({len(text)} chars)"
+
+
+def iter_lines_chunked(file_path: Path) -> Iterator[Tuple[int, bytes]]:
+    """
+    按块流式读取文件，产出 (起始行号, 以完整行结尾的块)
+
+    二进制文件（首块含 NUL）不产出任何内容。
+    """
+    lineno = 1
+    carry = b""
+    with open(file_path, "rb") as f:
+        first = True
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if first:
+                if b"\0" in chunk[:8192]:
+                    return
+                first = False
+            if not chunk:
+                break
+            data = carry + chunk
+            cut = data.rfind(b"\n") + 1
+            if cut == 0 and len(data) < MAX_CARRY:
+                carry = data
+                continue
+            if cut == 0:
+                cut = len(data)
+            yield lineno, data[:cut]
+            lineno += data.count(b"\n", 0, cut)
+            carry = data[cut:]
+    if carry:
+        yield lineno, carry
+
+
+def candidate_line_starts(block: bytes) -> List[int]:
+    """
+    用字面量触发词定位可能包含敏感信息的行
+
+    Returns:
+        候选行起始偏移（升序）
+    """
+    starts = set()
+    lower = block.lower()
+    for haystack, triggers in ((block, KNOWN_TRIGGERS), (lower, GENERIC_TRIGGERS)):
+        for trigger in triggers:
+            pos = haystack.find(trigger)
+            while pos != -1:
+                starts.add(block.rfind(b"\n", 0, pos) + 1)
+                line_end = block.find(b"\n", pos)
+                if line_end == -1:
+                    break
+                pos = haystack.find(trigger, line_end + 1)
+    return sorted(starts)
+
+
+def scan_file(file_path: str, display_path: str) -> List[Dict]:
+    """
+    扫描单个文件
+
+    Returns:
+        [{"file", "line", "rule", "severity", "match"}]
+    """
+    findings = []
+    try:
+        for start_line, block in iter_lines_chunked(Path(file_path)):
+            lineno, counted = start_line, 0
+            for line_start in candidate_line_starts(block):
+                line_end = block.find(b"\n", line_start)
+                line = block[line_start:line_end if line_end != -1 else len(block)]
+                lineno += block.count(b"\n", counted, line_start)
+                counted = line_start
+                if IGNORE_MARKER in line:
+                    continue
+
+                for match in SECRET_PATTERN.finditer(line):
+                    rule = match.lastgroup
+                    secret = match.group(rule)
+                    if rule == GENERIC_ASSIGNMENT_RULE[0]:
+                        secret = match.group("value")
+                        if not looks_like_secret(secret):
+                            continue
+                    findings.append({
+                        "file": display_path,
+                        "line": lineno,
+                        "rule": rule,
+                        "severity": RULE_SEVERITY[rule],
+                        "match": redact(secret)
+                    })
+    except OSError as e:
+        findings.append({"file": display_path, "line": None, "rule": "unreadable",
+                         "severity": "info", "match": str(e)})
+    return findings
+
+
+def _scan_batch(batch: List[Tuple[str, str]]) -> List[Dict]:
+    """进程池任务：扫描一批文件"""
+    findings = []
+    for file_path, display_path in batch:
+        findings.extend(scan_file(file_path, display_path))
+    return findings
+
+
+def collect_files(root: Path, scope: str = "all", max_size: int = DEFAULT_MAX_SIZE) -> List[Tuple[str, str]]:
+    """
+    按 project_stats.py 排除规则收集待扫描文件（跳过 . 开头的目录与知识库备份目录，. 开头的文件照常扫描）
+
+    Args:
+        root: 项目根目录
+        scope: all=代码+知识库，code=仅代码，kb=仅 helloagents/
+        max_size: 超过该大小的文件跳过
+
+    Returns:
+        [(绝对路径, 相对路径)]，按相对路径排序
+    """
+    exclude = set(EXCLUDE_DIRS)
+    if scope in ("all", "kb"):
+        exclude.discard(DEFAULT_WORKSPACE)
+    start = root / DEFAULT_WORKSPACE if scope == "kb" else root
+
+    files = []
+    stack = [start]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if (entry.name not in exclude and not entry.name.startswith(".")
+                                and not entry.name.startswith(BACKUP_PREFIX)):
+                            stack.append(Path(entry.path))
+                    elif entry.is_file(follow_symlinks=False):
+                        if os.path.splitext(entry.name)[1].lower() in BINARY_EXTENSIONS:
+                            continue
+                        if entry.stat(follow_symlinks=False).st_size > max_size:
+                            continue
+                        files.append((entry.path, Path(entry.path).relative_to(root).as_posix()))
+        except (PermissionError, FileNotFoundError):
+            continue
+    files.sort(key=lambda f: f[1])
+    return files
+
+
+def scan_secrets(files: List[Tuple[str, str]], jobs: Optional[int] = None) -> Dict:
+    """
+    扫描文件列表
+
+    Returns:
+        {"success": bool, "scanned": int, "summary": {"critical", "warning", "info"}, "findings": [...]}
+        success 为 False 表示发现 critical/warning 级别问题
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(files) < PARALLEL_MIN_FILES:
+        findings = _scan_batch(files)
+    else:
+        # 交错分批，使大文件均匀分布到各进程
+        batch_count = jobs * 4
+        batches = [files[i::batch_count] for i in range(batch_count)]
+        findings = []
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for batch_findings in pool.map(_scan_batch, batches):
+                findings.extend(batch_findings)
+
+    findings.sort(key=lambda f: (f["file"], f["line"] or 0))
+    summary = {s: sum(1 for f in findings if f["severity"] == s) for s in ("critical", "warning", "info")}
+    return {
+        "success": summary["critical"] == 0 and summary["warning"] == 0,
+        "scanned": len(files),
+        "summary": summary,
+        "findings": findings
+    }
+
+
+@script_error_handler
+def main():
+    """主函数"""
+    setup_encoding()
+
+    parser = argparse.ArgumentParser(
+        description="扫描泄露的密钥与硬编码凭据"
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        help="仅扫描指定文件（相对项目根目录或绝对路径）"
+    )
+    parser.add_argument(
+        "--path",
+        default=None,
+        help="项目根目录（默认: 当前目录）"
+    )
+    parser.add_argument(
+        "--scope",
+        choices=["all", "code", "kb"],
+        default="all",
+        help="扫描范围: all=代码+知识库（默认）, code=仅代码, kb=仅 helloagents/"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        metavar="N",
+        help="并行进程数（默认: 0 表示使用全部 CPU）"
+    )
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        metavar="BYTES",
+        help=f"跳过大于该字节数的文件（默认: {DEFAULT_MAX_SIZE}）"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        root = get_project_root(args.path)
+    except ValueError as e:
+        print(json.dumps({"success": False, "error": str(e)}, ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+    if args.files:
+        files = []
+        for name in args.files:
+            path = (root / name).resolve()
+            if path.is_file():
+                try:
+                    display = path.relative_to(root).as_posix()
+                except ValueError:
+                    display = str(path)
+                files.append((str(path), display))
+    else:
+        files = collect_files(root, args.scope, args.max_size)
+
+    result = scan_secrets(files, jobs=args.jobs or None)
+    result["root"] = str(root)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    sys.exit(0 if result["success"] else 1)
+
+
+if __name__ == "__main__":
+    main()
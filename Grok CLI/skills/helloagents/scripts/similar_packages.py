@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+相似方案包检索脚本
+基于 proposal.md 的字符 n-gram TF-IDF 向量，按余弦相似度返回 archive/ 中最相似的历史方案包
+
+- 索引缓存在 archive/.similar_index/，按 proposal.md 的 mtime/size 增量更新
+- 加载、更新与写入缓存持有 helloagents/.locks/similar-index.lock，并发进程不会读到半更新的索引
+- 安装 NumPy 时使用向量化计算，否则回退为纯 Python 实现（结果一致，速度较慢）
+
+Usage:
+    python similar_packages.py "<需求描述>" [--path <base-path>] [--top <k>] [--min-score <score>] [--rebuild]
+
+Examples:
+    python similar_packages.py "用户登录与会话管理"
+    python similar_packages.py "refactor api auth" --top 10
+    python similar_packages.py "登录" --path /project --rebuild
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 确保能找到同目录下的 utils 模块
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import (
+    setup_encoding,
+    get_archive_path,
+    parse_package_name,
+    get_package_summary,
+    script_error_handler,
+    validate_base_path,
+    workspace_lock,
+    write_bytes_atomic
+)
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖
+    np = None
+
+
+# 索引格式版本（结构变化时递增，旧缓存自动重建）
+INDEX_VERSION = 1
+
+# 缓存目录（位于 archive/ 下，以 . 开头不参与扫描）
+INDEX_DIR_NAME = ".similar_index"
+
+# 索引缓存锁名称（helloagents/.locks/similar-index.lock）
+INDEX_LOCK = "similar-index"
+
+# 字符 n-gram 长度
+NGRAM_SIZE = 3
+
+# 单个 proposal.md 参与向量化的最大字符数
+MAX_DOC_CHARS = 20000
+
+# 年月目录名称
+MONTH_DIR_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+# Markdown 标记与空白（归一化时替换为单个空格）
+NOISE_PATTERN = re.compile(r'[\s#*`|>\-_=~\[\](){}:：,，.。;；!！?？"\'“”‘’/\\]+')
+
+
+def normalize_text(text: str) -> str:
+    """归一化文本：小写、去除 Markdown 标记、合并空白"""
+    return NOISE_PATTERN.sub(' ', text[:MAX_DOC_CHARS].lower()).strip()
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> Dict[str, int]:
+    """
+    提取字符 n-gram 词频
+
+    Args:
+        text: 已归一化的文本
+        n: n-gram 长度
+
+    Returns:
+        {ngram: count}
+    """
+    counts: Dict[str, int] = {}
+    padded = f" {text} "
+    for i in range(len(padded) - n + 1):
+        gram = padded[i:i + n]
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def iter_archive_proposals(archive_path: Path):
+    """
+    遍历 archive/YYYY-MM/<package>/proposal.md
+
+    Yields:
+        (relative_package_path, proposal_path, stat_result)
+    """
+    if not archive_path.is_dir():
+        return
+    with os.scandir(archive_path) as months:
+        month_entries = sorted(
+            (e for e in months if e.is_dir() and MONTH_DIR_PATTERN.match(e.name)),
+            key=lambda e: e.name
+        )
+    for month in month_entries:
+        with os.scandir(month.path) as packages:
+            for pkg in sorted(packages, key=lambda e: e.name):
+                if not pkg.is_dir() or pkg.name.startswith('.'):
+                    continue
+                proposal = Path(pkg.path) / "proposal.md"
+                try:
+                    st = proposal.stat()
+                except FileNotFoundError:
+                    continue
+                yield f"{month.name}/{pkg.name}", proposal, st
+
+
+class SimilarityIndex:
+    """
+    proposal.md 的 n-gram 稀疏向量索引
+
+    存储结构（扁平数组，NumPy 可直接按缓冲区加载）:
+        meta.json:        版本、n-gram 长度、词表、文档列表（路径/mtime/size/起止偏移）
+        terms.bin:        int32 词表 ID，按文档依次排列（正排，用于增量复用）
+        weights.bin:      float32 次线性词频 1 + log(tf)，与 terms.bin 一一对应
+        norms.bin:        float64 文档 TF-IDF 向量模长
+        postings_ptr.bin: int64 倒排偏移，词 t 的倒排为 [ptr[t], ptr[t+1])
+        postings_doc.bin: int32 倒排文档序号
+        postings_w.bin:   float32 倒排次线性词频
+
+    查询只访问查询 n-gram 对应的倒排链，与归档规模近似无关；
+    正排与模长、倒排仅在文档变化时重算。
+    """
+
+    ARRAYS = {
+        "terms": 'i',
+        "weights": 'f',
+        "norms": 'd',
+        "postings_ptr": 'q',
+        "postings_doc": 'i',
+        "postings_w": 'f'
+    }
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = index_dir
+        self.vocab: List[str] = []
+        self.term_ids: Dict[str, int] = {}
+        self.docs: List[Dict] = []
+        for name, typecode in self.ARRAYS.items():
+            setattr(self, name, array(typecode))
+
+    def load(self) -> bool:
+        """加载缓存，格式不兼容或损坏时返回 False"""
+        meta_file = self.index_dir / "meta.json"
+        if not meta_file.exists():
+            return False
+        try:
+            meta = json.loads(meta_file.read_text(encoding='utf-8'))
+            if meta.get("version") != INDEX_VERSION or meta.get("ngram") != NGRAM_SIZE:
+                return False
+            loaded = {}
+            for name, typecode in self.ARRAYS.items():
+                arr = array(typecode)
+                with open(self.index_dir / f"{name}.bin", 'rb') as f:
+                    arr.frombytes(f.read())
+                loaded[name] = arr
+        except (OSError, ValueError, KeyError):
+            return False
+        if (len(loaded["terms"]) != len(loaded["weights"])
+                or len(loaded["norms"]) != len(meta["docs"])
+                or len(loaded["postings_ptr"]) != len(meta["vocab"]) + 1):
+            return False
+
+        self.vocab = meta["vocab"]
+        self.term_ids = {term: i for i, term in enumerate(self.vocab)}
+        self.docs = meta["docs"]
+        for name, arr in loaded.items():
+            setattr(self, name, arr)
+        return True
+
+    def save(self):
+        """
+        写入缓存（调用方需持有 INDEX_LOCK）
+
+        先删除 meta.json，再逐个原子写入数组文件，最后写入 meta.json；
+        中途崩溃时 meta.json 缺失，下次加载视为无缓存并重建，不会混用新旧文件。
+        """
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "version": INDEX_VERSION,
+            "ngram": NGRAM_SIZE,
+            "vocab": self.vocab,
+            "docs": self.docs
+        }
+        meta_file = self.index_dir / "meta.json"
+        try:
+            meta_file.unlink()
+        except FileNotFoundError:
+            pass
+        for name in self.ARRAYS:
+            write_bytes_atomic(self.index_dir / f"{name}.bin", getattr(self, name).tobytes())
+        write_bytes_atomic(meta_file, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    def _term_id(self, term: str) -> int:
+        tid = self.term_ids.get(term)
+        if tid is None:
+            tid = len(self.vocab)
+            self.vocab.append(term)
+            self.term_ids[term] = tid
+        return tid
+
+    def _prune_vocab(self):
+        """移除已无文档引用的词，并按新词表重新编号正排（避免词表随历史文档无限增长）"""
+        if np is not None:
+            used, inverse = np.unique(np.frombuffer(self.terms, dtype=np.int32), return_inverse=True)
+            if len(used) == len(self.vocab):
+                return
+            self.terms = array('i', inverse.astype(np.int32).tobytes())
+            used = used.tolist()
+        else:
+            used = sorted(set(self.terms))
+            if len(used) == len(self.vocab):
+                return
+            remap = {old: new for new, old in enumerate(used)}
+            self.terms = array('i', (remap[tid] for tid in self.terms))
+        self.vocab = [self.vocab[tid] for tid in used]
+        self.term_ids = {term: i for i, term in enumerate(self.vocab)}
+
+    def update(self, archive_path: Path) -> Dict[str, int]:
+        """
+        按 proposal.md 的 mtime/size 增量更新索引
+
+        未变化的文档直接复用已有向量片段，只对新增/修改的文档重新提取 n-gram；
+        有变化时清理无引用的词并重算模长与倒排。
+
+        Returns:
+            {"reused": int, "updated": int, "removed": int}
+        """
+        stats = {"reused": 0, "updated": 0, "removed": 0}
+        old_docs = {doc["path"]: doc for doc in self.docs}
+        new_docs: List[Dict] = []
+        new_terms = array('i')
+        new_weights = array('f')
+
+        for rel_path, proposal, st in iter_archive_proposals(archive_path):
+            old = old_docs.pop(rel_path, None)
+            start = len(new_terms)
+            if old and old["mtime_ns"] == st.st_mtime_ns and old["size"] == st.st_size:
+                new_terms.extend(self.terms[old["start"]:old["end"]])
+                new_weights.extend(self.weights[old["start"]:old["end"]])
+                stats["reused"] += 1
+            else:
+                try:
+                    text = proposal.read_text(encoding='utf-8', errors='replace')
+                except OSError:
+                    continue
+                for gram, tf in char_ngrams(normalize_text(text)).items():
+                    new_terms.append(self._term_id(gram))
+                    new_weights.append(1.0 + math.log(tf))
+                stats["updated"] += 1
+            new_docs.append({
+                "path": rel_path,
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "start": start,
+                "end": len(new_terms)
+            })
+
+        stats["removed"] = len(old_docs)
+        self.docs = new_docs
+        self.terms = new_terms
+        self.weights = new_weights
+        if stats["updated"] or stats["removed"]:
+            self._prune_vocab()
+        if stats["updated"] or stats["removed"] or len(self.postings_ptr) != len(self.vocab) + 1:
+            self._build_derived()
+        return stats
+
+    def _build_derived(self):
+        """由正排数组重算文档模长与倒排"""
+        if np is not None:
+            self._build_derived_numpy()
+        else:
+            self._build_derived_python()
+
+    def _build_derived_numpy(self):
+        n_docs, n_terms = len(self.docs), len(self.vocab)
+        terms = np.frombuffer(self.terms, dtype=np.int32)
+        weights = np.frombuffer(self.weights, dtype=np.float32)
+        lengths = np.array([doc["end"] - doc["start"] for doc in self.docs], dtype=np.int64)
+        doc_ids = np.repeat(np.arange(n_docs, dtype=np.int32), lengths)
+
+        df = np.bincount(terms, minlength=n_terms)
+        idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+        tfidf = weights.astype(np.float64) * idf[terms]
+        norms = np.sqrt(np.bincount(doc_ids, weights=tfidf ** 2, minlength=n_docs))
+
+        order = np.argsort(terms, kind='stable')
+        ptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df, out=ptr[1:])
+
+        self.norms = array('d', norms.tobytes())
+        self.postings_ptr = array('q', ptr.tobytes())
+        self.postings_doc = array('i', doc_ids[order].tobytes())
+        self.postings_w = array('f', weights[order].tobytes())
+
+    def _build_derived_python(self):
+        n_docs, n_terms = len(self.docs), len(self.vocab)
+        df = [0] * n_terms
+        for tid in self.terms:
+            df[tid] += 1
+        idf = [math.log((1 + n_docs) / (1 + d)) + 1.0 for d in df]
+
+        ptr = array('q', [0]) * (n_terms + 1)
+        for tid in range(n_terms):
+            ptr[tid + 1] = ptr[tid] + df[tid]
+        cursor = list(ptr[:-1])
+        postings_doc = array('i', [0]) * len(self.terms)
+        postings_w = array('f', [0.0]) * len(self.terms)
+        norms = array('d')
+
+        terms, weights = self.terms, self.weights
+        for i, doc in enumerate(self.docs):
+            norm_sq = 0.0
+            for pos in range(doc["start"], doc["end"]):
+                tid = terms[pos]
+                w = weights[pos]
+                slot = cursor[tid]
+                postings_doc[slot] = i
+                postings_w[slot] = w
+                cursor[tid] = slot + 1
+                norm_sq += (w * idf[tid]) ** 2
+            norms.append(math.sqrt(norm_sq))
+
+        self.norms = norms
+        self.postings_ptr = ptr
+        self.postings_doc = postings_doc
+        self.postings_w = postings_w
+
+    def query(self, text: str, top_k: int) -> List[Tuple[int, float]]:
+        """
+        计算查询文本与所有文档的余弦相似度（仅遍历查询 n-gram 的倒排链）
+
+        Returns:
+            [(doc_index, score)]，按相似度降序，最多 top_k 条
+        """
+        n_docs = len(self.docs)
+        if not n_docs:
+            return []
+
+        # (term_id, idf, 查询词权重)
+        query_terms: List[Tuple[int, float, float]] = []
+        for gram, tf in char_ngrams(normalize_text(text)).items():
+            tid = self.term_ids.get(gram)
+            if tid is None:
+                continue
+            df = self.postings_ptr[tid + 1] - self.postings_ptr[tid]
+            if df:
+                idf = math.log((1 + n_docs) / (1 + df)) + 1.0
+                query_terms.append((tid, idf, (1.0 + math.log(tf)) * idf))
+        query_norm = math.sqrt(sum(q * q for _, _, q in query_terms))
+        if query_norm == 0:
+            return []
+
+        if np is not None:
+            return self._score_numpy(query_terms, query_norm, top_k)
+        return self._score_python(query_terms, query_norm, top_k)
+
+    def _score_numpy(self, query_terms, query_norm: float, top_k: int) -> List[Tuple[int, float]]:
+        n_docs = len(self.docs)
+        ptr = self.postings_ptr
+        postings_doc = np.frombuffer(self.postings_doc, dtype=np.int32)
+        postings_w = np.frombuffer(self.postings_w, dtype=np.float32)
+        norms = np.frombuffer(self.norms, dtype=np.float64)
+
+        dots = np.zeros(n_docs, dtype=np.float64)
+        for tid, idf, q in query_terms:
+            s, e = ptr[tid], ptr[tid + 1]
+            np.add.at(dots, postings_doc[s:e], postings_w[s:e] * (idf * q))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(norms > 0, dots / (norms * query_norm), 0.0)
+
+        k = min(top_k, n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def _score_python(self, query_terms, query_norm: float, top_k: int) -> List[Tuple[int, float]]:
+        ptr, postings_doc, postings_w, norms = self.postings_ptr, self.postings_doc, self.postings_w, self.norms
+        dots: Dict[int, float] = {}
+        for tid, idf, q in query_terms:
+            factor = idf * q
+            for pos in range(ptr[tid], ptr[tid + 1]):
+                doc = postings_doc[pos]
+                dots[doc] = dots.get(doc, 0.0) + postings_w[pos] * factor
+
+        scores = [(doc, dot / (norms[doc] * query_norm)) for doc, dot in dots.items() if norms[doc] > 0]
+        return heapq.nsmallest(top_k, scores, key=lambda x: (-x[1], x[0]))
+
+
+def find_similar_packages(query: str, base_path: Optional[str] = None, top_k: int = 5,
+                          min_score: float = 0.05, rebuild: bool = False) -> Dict:
+    """
+    检索与需求描述最相似的归档方案包
+
+    Args:
+        query: 需求描述文本
+        base_path: 项目根目录
+        top_k: 返回条数
+        min_score: 最低相似度
+        rebuild: 忽略缓存重建索引
+
+    Returns:
+        检索结果字典
+    """
+    started = time.perf_counter()
+    archive_path = get_archive_path(base_path)
+    index = SimilarityIndex(archive_path / INDEX_DIR_NAME)
+
+    if archive_path.is_dir():
+        # 加载与写入在同一把锁内，其他进程的写入不会与本次读取交错
+        with workspace_lock(archive_path.parent, INDEX_LOCK):
+            cache_loaded = False if rebuild else index.load()
+            cache_stats = index.update(archive_path)
+            if not cache_loaded or cache_stats["updated"] or cache_stats["removed"]:
+                index.save()
+    else:
+        cache_loaded = False
+        cache_stats = index.update(archive_path)
+
+    results = []
+    for doc_idx, score in index.query(query, top_k):
+        if score < min_score:
+            continue
+        rel_path = index.docs[doc_idx]["path"]
+        package_path = archive_path / rel_path
+        parsed = parse_package_name(package_path.name)
+        results.append({
+            "name": package_path.name,
+            "path": str(package_path),
+            "timestamp": parsed[0] if parsed else None,
+            "feature": parsed[1] if parsed else package_path.name,
+            "score": round(score, 4),
+            "summary": get_package_summary(package_path)
+        })
+
+    return {
+        "query": query,
+        "archive_path": str(archive_path),
+        "total_packages": len(index.docs),
+        "backend": "numpy" if np is not None else "python",
+        "cache": dict(cache_stats, loaded=cache_loaded),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "results": results
+    }
+
+
+@script_error_handler
+def main():
+    """主函数"""
+    setup_encoding()
+
+    parser = argparse.ArgumentParser(
+        description="检索与需求描述相似的历史方案包（archive/）"
+    )
+    parser.add_argument(
+        "query",
+        help="需求描述文本"
+    )
+    parser.add_argument(
+        "--path",
+        default=None,
+        help="项目根目录（默认: 当前目录）"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        help="返回最相似的前 K 个方案包（默认: 5）"
+    )
+    parser.add_argument(
+        "--min-score",
+        type=float,
+        default=0.05,
+        help="最低相似度阈值（默认: 0.05）"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="忽略缓存，重建索引"
+    )
+
+    args = parser.parse_args()
+
+    # 验证基础路径
+    try:
+        validate_base_path(args.path)
+    except ValueError as e:
+        print(json.dumps({"error": str(e)}, ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+    result = find_similar_packages(
+        args.query,
+        base_path=args.path,
+        top_k=max(1, args.top),
+        min_score=args.min_score,
+        rebuild=args.rebuild
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,616 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HelloAGENTS 知识库去重工具（内容寻址硬链接/reflink）
+
+扫描 helloagents/ 及同级的 helloagents_backup_* 备份目录，
+将内容完全相同的普通文件替换为指向同一份数据的链接，减少磁盘与 inode 占用。
+
+- 优先使用 reflink（写时复制，修改任一副本互不影响），文件系统不支持时回退为硬链接
+- 硬链接仅在备份快照之间创建；helloagents/ 中的文件只做 reflink，避免原地写入改坏备份
+- 按文件大小预分组，仅对大小相同的候选文件计算摘要（线程池并行），链接前重新校验
+- 创建的硬链接记录在 helloagents/.dedup_links.json，--undo 仅撤销这些链接
+
+Usage:
+    python dedup_workspace.py [--path <base-path>] [--mode <auto|reflink|hardlink>] [--dry-run]
+    python dedup_workspace.py --undo [--path <base-path>]
+
+Examples:
+    python dedup_workspace.py --dry-run             # 预览可节省的空间
+    python dedup_workspace.py                       # 执行去重（reflink 优先）
+    python dedup_workspace.py --mode hardlink       # 强制使用硬链接
+    python dedup_workspace.py --no-backups          # 仅处理 helloagents/
+    python dedup_workspace.py --undo                # 撤销本工具创建的硬链接
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 确保能找到同目录下的 utils 模块
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import setup_encoding, get_workspace_path, validate_base_path, file_digest, write_bytes_atomic
+
+# 备份目录前缀（与 upgradewiki.py --backup 保持一致）
+BACKUP_PREFIX = "helloagents_backup_"
+
+# 替换过程中使用的临时文件后缀
+TEMP_SUFFIX = ".dedup-tmp"
+
+# 硬链接记录文件（位于 helloagents/ 下，隐藏文件不参与扫描）
+LINK_RECORD_NAME = ".dedup_links.json"
+LINK_RECORD_VERSION = 1
+
+# Linux FICLONE ioctl 编号（_IOW(0x94, 9, int)）
+FICLONE = 0x40049409
+
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) + 4)
+
+
+def get_dedup_roots(workspace: Path, include_backups: bool = True) -> List[Path]:
+    """
+    获取去重扫描根目录
+
+    Args:
+        workspace: helloagents/ 目录
+        include_backups: 是否包含同级备份目录
+
+    Returns:
+        存在的根目录列表（工作空间在前，备份按名称排序）
+    """
+    roots = []
+    if workspace.is_dir():
+        roots.append(workspace)
+    if include_backups and workspace.parent.is_dir():
+        for item in sorted(workspace.parent.iterdir()):
+            if item.name.startswith(BACKUP_PREFIX) and item.is_dir() and not item.is_symlink():
+                roots.append(item)
+    return roots
+
+
+def iter_regular_files(root: Path):
+    """
+    递归遍历普通文件（跳过隐藏项与符号链接）
+
+    Yields:
+        (path, stat_result)
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.name.startswith('.') or entry.name.endswith(TEMP_SUFFIX):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.is_file(follow_symlinks=False):
+                        yield Path(entry.path), entry.stat(follow_symlinks=False)
+        except (PermissionError, FileNotFoundError):
+            continue
+
+
+def try_reflink(src: Path, dst: Path) -> bool:
+    """
+    尝试以 reflink 方式克隆文件（仅 Linux FICLONE，需 Btrfs/XFS 等支持）
+
+    Returns:
+        是否克隆成功；失败时不会留下 dst
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        try:
+            dst.unlink()
+        except FileNotFoundError:
+            pass
+        return False
+
+
+class FileChangedError(Exception):
+    """文件在摘要计算后被修改，放弃链接"""
+
+
+def same_file_state(path: Path, expected: os.stat_result) -> bool:
+    """
+    检查文件是否仍与扫描时一致（inode/大小/修改时间）
+
+    Args:
+        path: 文件路径
+        expected: 扫描时的 stat 结果
+
+    Returns:
+        是否一致；文件不存在时返回 False
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (st.st_dev == expected.st_dev and st.st_ino == expected.st_ino
+            and st.st_size == expected.st_size and st.st_mtime_ns == expected.st_mtime_ns)
+
+
+def probe_reflink(directory: Path) -> bool:
+    """
+    探测目录所在文件系统是否支持 reflink（创建并删除两个隐藏临时文件）
+
+    Returns:
+        是否支持
+    """
+    try:
+        fd, src = tempfile.mkstemp(prefix=".dedup-probe-", dir=str(directory))
+    except OSError:
+        return False
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b"probe")
+    dst = Path(src + TEMP_SUFFIX)
+    try:
+        return try_reflink(Path(src), dst)
+    finally:
+        for path in (Path(src), dst):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def link_duplicate(canonical: Path, duplicate: Path, mode: str,
+                   expected: Optional[os.stat_result] = None) -> Optional[str]:
+    """
+    将重复文件原子替换为指向规范副本的链接
+
+    先在同目录创建临时链接，再 os.replace 覆盖原文件，
+    保证任意时刻 duplicate 路径都指向完整内容。
+
+    Args:
+        canonical: 保留的规范文件
+        duplicate: 被替换的重复文件
+        mode: auto/reflink/hardlink
+        expected: duplicate 扫描时的 stat，替换前再次比对
+
+    Returns:
+        实际使用的方式（"reflink"/"hardlink"），无法链接时返回 None
+
+    Raises:
+        FileChangedError: duplicate 在扫描后被修改
+    """
+    tmp = duplicate.with_name(duplicate.name + TEMP_SUFFIX)
+    if tmp.exists():
+        tmp.unlink()
+
+    method = None
+    if mode in ("auto", "reflink") and try_reflink(canonical, tmp):
+        method = "reflink"
+    elif mode != "reflink":
+        try:
+            os.link(canonical, tmp)
+            method = "hardlink"
+        except OSError:
+            return None
+    if method is None:
+        return None
+
+    # 创建临时链接期间 duplicate 可能被写入，替换前最后确认一次
+    if expected is not None and not same_file_state(duplicate, expected):
+        tmp.unlink()
+        raise FileChangedError(str(duplicate))
+    os.replace(tmp, duplicate)
+    return method
+
+
+def find_duplicates(roots: List[Path], jobs: int = DEFAULT_JOBS,
+                    detached: Optional[set] = None) -> Tuple[List[Tuple[str, List[Tuple[Path, os.stat_result]]]], int]:
+    """
+    查找内容相同的文件组
+
+    Args:
+        roots: 扫描根目录
+        jobs: 摘要计算线程数
+        detached: 视为独立 inode 的路径（预览时尚未断开的共享链接）
+
+    Returns:
+        (duplicate_groups, scanned): 每组为 (摘要, [(路径, 扫描时 stat)])，按路径排序；
+        scanned 为扫描文件数
+    """
+    # 按 (设备, 大小) 预分组；跨设备无法硬链接，空文件无需去重
+    by_size: Dict[Tuple[int, int], List[Tuple[Path, os.stat_result]]] = {}
+    scanned = 0
+    for root in roots:
+        for path, st in iter_regular_files(root):
+            scanned += 1
+            if st.st_size == 0:
+                continue
+            by_size.setdefault((st.st_dev, st.st_size), []).append((path, st))
+
+    candidates = [entries for entries in by_size.values() if len(entries) > 1]
+
+    # 已共享同一 inode 的文件只需计算一次摘要
+    to_hash: Dict[Tuple[int, int], Path] = {}
+    for entries in candidates:
+        for path, st in entries:
+            to_hash.setdefault((st.st_dev, st.st_ino), path)
+
+    def _digest(item):
+        key, path = item
+        try:
+            return key, file_digest(path)
+        except OSError:
+            return key, None
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        digests = dict(pool.map(_digest, to_hash.items()))
+
+    groups = []
+    for entries in candidates:
+        by_digest: Dict[str, List[Tuple[Path, os.stat_result]]] = {}
+        for path, st in entries:
+            digest = digests.get((st.st_dev, st.st_ino))
+            if digest:
+                by_digest.setdefault(digest, []).append((path, st))
+        for digest, same in by_digest.items():
+            inodes = {path if detached and path in detached else st.st_ino for path, st in same}
+            if len(inodes) > 1:
+                groups.append((digest, sorted(same, key=lambda item: str(item[0]))))
+
+    groups.sort(key=lambda g: str(g[1][0][0]))
+    return groups, scanned
+
+
+def is_under(path: Path, roots: List[Path]) -> bool:
+    """判断路径是否位于任一根目录下"""
+    for root in roots:
+        try:
+            path.relative_to(root)
+            return True
+        except ValueError:
+            continue
+    return False
+
+
+def load_link_record(record_file: Path) -> List[Dict]:
+    """
+    读取去重硬链接记录
+
+    Returns:
+        [{"path": str, "canonical": str, "dev": int, "ino": int}]，不存在或损坏时返回空列表
+    """
+    try:
+        data = json.loads(record_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return []
+    links = data.get("links") if isinstance(data, dict) else None
+    return links if isinstance(links, list) else []
+
+
+def save_link_record(record_file: Path, links: List[Dict]) -> None:
+    """写入去重硬链接记录（为空时删除记录文件）"""
+    if not links:
+        try:
+            record_file.unlink()
+        except FileNotFoundError:
+            pass
+        return
+    payload = {"version": LINK_RECORD_VERSION, "links": links}
+    write_bytes_atomic(record_file, json.dumps(payload, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def materialize(path: Path) -> int:
+    """
+    将文件重新复制为独立副本（断开与其他路径共享的 inode）
+
+    Returns:
+        文件字节数
+    """
+    tmp = path.with_name(path.name + TEMP_SUFFIX)
+    try:
+        shutil.copy2(path, tmp)
+        os.replace(tmp, path)
+    except OSError:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+    return os.lstat(path).st_size
+
+
+def find_shared_live_files(live_roots: List[Path]) -> List[Tuple[Path, os.stat_result]]:
+    """
+    查找与工作空间外路径共享 inode 的工作空间文件
+
+    工作空间文件会被原地修改，若与备份共享 inode 会连带改写备份内容，
+    此类链接（如旧版本去重留下的）需要断开。
+
+    Returns:
+        [(path, stat)]
+    """
+    by_inode: Dict[Tuple[int, int], List[Tuple[Path, os.stat_result]]] = {}
+    for root in live_roots:
+        for path, st in iter_regular_files(root):
+            if st.st_nlink > 1:
+                by_inode.setdefault((st.st_dev, st.st_ino), []).append((path, st))
+    shared = []
+    for entries in by_inode.values():
+        # 链接数多于工作空间内可见路径数，说明还有工作空间外的链接
+        if entries[0][1].st_nlink > len(entries):
+            shared.extend(entries)
+    return sorted(shared, key=lambda item: str(item[0]))
+
+
+def dedup_files(roots: List[Path], mode: str = "auto", dry_run: bool = False,
+                jobs: int = DEFAULT_JOBS, live_roots: Optional[List[Path]] = None,
+                record_file: Optional[Path] = None) -> Dict:
+    """
+    对根目录下的重复文件执行去重
+
+    硬链接仅在不可变的备份快照之间创建，并记录到 record_file 供 --undo 精确撤销；
+    涉及工作空间（live_roots）的文件只允许 reflink，不支持时跳过。
+    链接前重新比对 stat 与摘要，扫描后被修改的文件不处理。
+
+    Args:
+        roots: 扫描根目录
+        mode: auto/reflink/hardlink
+        dry_run: 仅统计
+        jobs: 摘要计算线程数
+        live_roots: 工作空间根目录（会被原地修改，禁止硬链接）
+        record_file: 硬链接记录文件，为 None 时不创建硬链接
+
+    Returns:
+        {
+            "success": bool, "dry_run": bool, "scanned": int,
+            "groups": int, "linked": int, "bytes_saved": int,
+            "methods": {"reflink": int, "hardlink": int},
+            "skipped": {"live": int, "changed": int},
+            "unshared": int, "errors": [str]
+        }
+    """
+    live_roots = live_roots or []
+    result = {
+        "success": True,
+        "dry_run": dry_run,
+        "mode": mode,
+        "roots": [str(r) for r in roots],
+        "scanned": 0,
+        "groups": 0,
+        "linked": 0,
+        "bytes_saved": 0,
+        "methods": {"reflink": 0, "hardlink": 0},
+        "skipped": {"live": 0, "changed": 0},
+        "unshared": 0,
+        "errors": []
+    }
+
+    # 先断开工作空间与备份之间已存在的硬链接
+    unshared = set()
+    for path, st in find_shared_live_files(live_roots):
+        if dry_run:
+            # 预览时视为已断开（实际运行中会成为独立 inode）
+            unshared.add(path)
+            result["unshared"] += 1
+            continue
+        try:
+            materialize(path)
+            result["unshared"] += 1
+        except OSError as e:
+            result["errors"].append(f"{path}: {e}")
+
+    groups, result["scanned"] = find_duplicates(roots, jobs, unshared)
+    result["groups"] = len(groups)
+
+    # 按设备缓存 reflink 支持情况（仅预览时探测，实际运行以链接结果为准）
+    reflink_support: Dict[int, bool] = {}
+
+    def _reflink_supported(path: Path, st: os.stat_result) -> bool:
+        if st.st_dev not in reflink_support:
+            reflink_support[st.st_dev] = probe_reflink(path.parent)
+        return reflink_support[st.st_dev]
+
+    # 节省空间按 inode 计：同一 inode 的多个路径只在首次被链接时计入
+    saved_inodes = set()
+
+    def _count_linked(st: os.stat_result):
+        result["linked"] += 1
+        if (st.st_dev, st.st_ino) not in saved_inodes:
+            saved_inodes.add((st.st_dev, st.st_ino))
+            result["bytes_saved"] += st.st_size
+
+    new_links: List[Dict] = []
+    for digest, members in groups:
+        # 规范副本优先取备份中的文件，使备份之间可以硬链接
+        backups = [m for m in members if not is_under(m[0], live_roots)]
+        canonical, canonical_st = backups[0] if backups else members[0]
+        verified = None
+
+        for duplicate, st in members:
+            if duplicate == canonical:
+                continue
+            if st.st_ino == canonical_st.st_ino and duplicate not in unshared:
+                continue
+            live = is_under(duplicate, live_roots) or is_under(canonical, live_roots)
+            if live and mode == "hardlink":
+                result["skipped"]["live"] += 1
+                continue
+            link_mode = "reflink" if live or record_file is None else mode
+            if dry_run:
+                # 与实际运行同一规则：需要 reflink 而文件系统不支持时不计入
+                if link_mode == "reflink" and not _reflink_supported(duplicate, st):
+                    if live:
+                        result["skipped"]["live"] += 1
+                    else:
+                        result["errors"].append(f"无法链接（不支持 reflink）: {duplicate}")
+                    continue
+                _count_linked(st)
+                continue
+
+            try:
+                if verified is None:
+                    verified = (same_file_state(canonical, canonical_st)
+                                and file_digest(canonical) == digest)
+                if not verified or not same_file_state(duplicate, st) or file_digest(duplicate) != digest:
+                    result["skipped"]["changed"] += 1
+                    continue
+                method = link_duplicate(canonical, duplicate, link_mode, expected=st)
+                if method is None:
+                    if live:
+                        result["skipped"]["live"] += 1
+                    else:
+                        result["errors"].append(f"无法链接: {duplicate}")
+                    continue
+                if method == "hardlink":
+                    new_links.append({
+                        "path": os.path.abspath(duplicate),
+                        "canonical": os.path.abspath(canonical),
+                        "dev": canonical_st.st_dev,
+                        "ino": canonical_st.st_ino
+                    })
+                result["methods"][method] += 1
+                _count_linked(st)
+            except FileChangedError:
+                result["skipped"]["changed"] += 1
+            except OSError as e:
+                result["errors"].append(f"{duplicate}: {e}")
+
+    if new_links and record_file is not None:
+        try:
+            save_link_record(record_file, load_link_record(record_file) + new_links)
+        except OSError as e:
+            result["errors"].append(f"无法写入硬链接记录 {record_file}: {e}")
+
+    if result["errors"]:
+        result["success"] = False
+    return result
+
+
+def undo_dedup(record_file: Path) -> Dict:
+    """
+    撤销硬链接去重：仅将去重记录中的硬链接重新复制为独立副本
+
+    不在记录中的多链接文件（如 upgradewiki.py --incremental 备份）保持不变；
+    记录后已被替换或删除的路径直接忽略。
+
+    Returns:
+        {"success": bool, "restored": int, "bytes_restored": int, "skipped": int, "errors": [str]}
+    """
+    result = {
+        "success": True,
+        "record": str(record_file),
+        "restored": 0,
+        "bytes_restored": 0,
+        "skipped": 0,
+        "errors": []
+    }
+
+    remaining = []
+    for link in load_link_record(record_file):
+        path = Path(link.get("path", ""))
+        try:
+            st = os.lstat(path)
+        except OSError:
+            result["skipped"] += 1
+            continue
+        if (st.st_dev, st.st_ino) != (link.get("dev"), link.get("ino")) or st.st_nlink <= 1:
+            result["skipped"] += 1
+            continue
+        try:
+            result["bytes_restored"] += materialize(path)
+            result["restored"] += 1
+        except OSError as e:
+            result["errors"].append(f"{path}: {e}")
+            remaining.append(link)
+
+    try:
+        save_link_record(record_file, remaining)
+    except OSError as e:
+        result["errors"].append(f"无法更新硬链接记录 {record_file}: {e}")
+
+    if result["errors"]:
+        result["success"] = False
+    return result
+
+
+def main():
+    setup_encoding()
+    parser = argparse.ArgumentParser(
+        description="HelloAGENTS 知识库去重（内容寻址硬链接/reflink）"
+    )
+    parser.add_argument(
+        "--path",
+        default=None,
+        help="项目根目录（默认: 当前目录）"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["auto", "reflink", "hardlink"],
+        default="auto",
+        help="链接方式: auto(reflink 优先，回退硬链接) / reflink / hardlink"
+    )
+    parser.add_argument(
+        "--no-backups",
+        action="store_true",
+        help="不处理同级 helloagents_backup_* 备份目录"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"摘要计算线程数（默认: {DEFAULT_JOBS}）"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="仅统计可节省空间，不修改文件"
+    )
+    parser.add_argument(
+        "--undo",
+        action="store_true",
+        help="撤销去重：将本工具记录的硬链接恢复为独立副本"
+    )
+
+    args = parser.parse_args()
+
+    # 验证基础路径
+    try:
+        validate_base_path(args.path)
+    except ValueError as e:
+        print(json.dumps({"error": str(e)}, ensure_ascii=False))
+        sys.exit(1)
+
+    workspace = get_workspace_path(args.path)
+    roots = get_dedup_roots(workspace, include_backups=not args.no_backups)
+
+    if not roots:
+        print(json.dumps({"success": False, "error": f"知识库目录不存在: {workspace}"}, ensure_ascii=False, indent=2))
+        sys.exit(1)
+
+    # 工作空间不存在时无处记录硬链接，只允许 reflink
+    record_file = workspace / LINK_RECORD_NAME if workspace.is_dir() else None
+
+    if args.undo:
+        if record_file is None:
+            print(json.dumps({"success": False, "error": f"知识库目录不存在: {workspace}"}, ensure_ascii=False, indent=2))
+            sys.exit(1)
+        result = undo_dedup(record_file)
+    else:
+        live_roots = [workspace] if workspace.is_dir() else []
+        result = dedup_files(roots, mode=args.mode, dry_run=args.dry_run, jobs=args.jobs,
+                             live_roots=live_roots, record_file=record_file)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    sys.exit(0 if result["success"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,72 +5,77 @@
 验证方案包完整性、任务状态、可执行性
 
 Usage:
-    python validate_package.py [--path <base-path>] [package-name]
+    python validate_package.py [--path <base-path>] [--jobs <N>] [--archive] [--no-cache] [package-name]
+    python validate_package.py --graph [--path <base-path>] <package-name>
+    python validate_package.py --fix [--path <base-path>] [--archive] [package-name]
 
 Examples:
     python validate_package.py                         # 验证当前目录下所有方案包
     python validate_package.py --path /project         # 验证指定目录下所有方案包
     python validate_package.py 202501_feat             # 验证指定方案包
     python validate_package.py --path /project pkg     # 指定目录和方案包
+    python validate_package.py --jobs 8 --archive      # 8 进程并行验证 plan/ 与 archive/
+    python validate_package.py --no-cache              # 忽略缓存，强制重新验证
+    python validate_package.py --graph 202501_feat     # 输出任务依赖图（环/关键路径/并行批次）
+    python validate_package.py --fix                   # 按任务列表重新计算执行状态后再验证
 """
 
 import argparse
+import functools
+import hashlib
+import io
 import json
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 # 确保能找到同目录下的 utils 模块
 sys.path.insert(0, str(Path(__file__).parent))
-from utils import setup_encoding, get_plan_path, script_error_handler, validate_base_path, get_template_loader
-
-# 任务状态符号
-TASK_STATUS = {
-    "[ ]": "pending",
-    "[√]": "completed",
-    "[X]": "failed",
-    "[-]": "skipped",
-    "[?]": "uncertain"
-}
+from utils import (
+    setup_encoding,
+    get_plan_path,
+    get_archive_path,
+    get_workspace_path,
+    script_error_handler,
+    validate_base_path,
+    get_template_loader,
+    write_bytes_atomic,
+    tasks_lock
+)
+from task_graph import analyze_tasks
+from task_model import parse_task_stream, parse_tasks_text, status_block_patch
 
 # 方案包必需文件
 REQUIRED_FILES = ["proposal.md", "tasks.md"]
 OPTIONAL_FILES = []
 
+# 验证结果缓存（位于 helloagents/ 下；验证逻辑变化时递增版本号使旧缓存失效）
+VALIDATION_CACHE_FILE = ".validate_cache.json"
+VALIDATION_CACHE_VERSION = 5
 
-def parse_tasks(tasks_content: str) -> dict:
-    """解析tasks.md中的任务"""
-    tasks = {
-        "total": 0,
-        "by_status": {
-            "pending": 0,
-            "completed": 0,
-            "failed": 0,
-            "skipped": 0,
-            "uncertain": 0
-        },
-        "items": []
-    }
-
-    # 匹配任务行: - [ ] 任务描述 或 - [√] 任务描述
-    task_pattern = re.compile(r'^[-*]\s*\[([ √X\-?])\]\s*(.+)$', re.MULTILINE)
-
-    for match in task_pattern.finditer(tasks_content):
-        status_char = match.group(1)
-        description = match.group(2).strip()
-
-        # 映射状态
-        status_key = f"[{status_char}]"
-        status = TASK_STATUS.get(status_key, "pending")
+# 章节标题归一化：编号前缀、括号备注（如 "（可选）"）
+SECTION_NUMBER_PATTERN = re.compile(r'^\d+\.\s*')
+SECTION_REMARK_PATTERN = re.compile(r'[（(].*?[）)]')
 
-        tasks["items"].append({
-            "status": status,
-            "description": description[:100]  # 截断过长描述
-        })
-        tasks["total"] += 1
-        tasks["by_status"][status] += 1
 
+def parse_tasks(tasks_content: str) -> dict:
+    """解析tasks.md中的任务（基于 task_model 的任务树）"""
+    doc = parse_tasks_text(tasks_content)
+    tasks = doc.counts()
+    tasks["status_block_stale"] = status_block_patch(doc, tasks_content.encode("utf-8")) is not None
+    tasks["items"] = [
+        {
+            "id": task.id,
+            "status": task.status,
+            "description": task.description,
+            "line": task.line
+        }
+        for task in doc.tasks
+    ]
     return tasks
 
 
@@ -90,28 +95,119 @@ def get_template_sections() -> tuple:
     return loader.get_sections("plan/proposal.md", level=2), False
 
 
+def normalize_section_title(title: str) -> str:
+    """归一化章节标题：移除编号前缀（如 "1. "）和括号备注（如 "（可选）"）"""
+    core = SECTION_NUMBER_PATTERN.sub('', title)
+    return SECTION_REMARK_PATTERN.sub('', core).strip()
+
+
+@functools.lru_cache(maxsize=1)
+def get_section_index() -> tuple:
+    """
+    编译模板章节索引（每个进程仅构建一次）
+
+    Returns:
+        (index, template_missing):
+            index 为 {归一化标题: (模板顺序, 是否必需, 原始标题)}
+    """
+    sections, template_missing = get_template_sections()
+    index = {}
+    for order, section in enumerate(sections):
+        core = normalize_section_title(section)
+        if core and core not in index:
+            required = '可选' not in section and 'optional' not in section.lower()
+            index[core] = (order, required, section)
+    return index, template_missing
+
+
+def scan_headings(content: str, level: int = 2) -> List[Tuple[int, str]]:
+    """
+    单次线性扫描提取指定级别标题（跳过代码块）
+
+    Returns:
+        [(行号, 标题文本)]，行号从 1 开始
+    """
+    prefix = "#" * level
+    headings = []
+    in_fence = False
+    for lineno, line in enumerate(content.splitlines(), 1):
+        if line.startswith("```") or line.startswith("~~~"):
+            in_fence = not in_fence
+            continue
+        if in_fence or not line.startswith(prefix):
+            continue
+        rest = line[level:]
+        if rest[:1] in (" ", "\t") and rest.strip():
+            headings.append((lineno, rest.strip()))
+    return headings
+
+
+def match_sections(proposal_content: str) -> dict:
+    """
+    将 proposal.md 的实际 ## 标题与模板章节索引匹配
+
+    Returns:
+        {
+            "matched": [{"section", "line"}],
+            "missing": [str],
+            "missing_required": [str],
+            "out_of_order": [{"section", "line"}]
+        }
+    """
+    index, _ = get_section_index()
+    matched = []
+    out_of_order = []
+    seen = set()
+    max_order = -1
+
+    for lineno, title in scan_headings(proposal_content):
+        core = normalize_section_title(title)
+        entry = index.get(core)
+        if entry is None or core in seen:
+            continue
+        order, _, section = entry
+        seen.add(core)
+        matched.append({"section": section, "line": lineno})
+        if order < max_order:
+            out_of_order.append({"section": section, "line": lineno})
+        max_order = max(max_order, order)
+
+    missing = []
+    missing_required = []
+    for core, (_, required, section) in sorted(index.items(), key=lambda x: x[1][0]):
+        if core not in seen:
+            missing.append(section)
+            if required:
+                missing_required.append(section)
+
+    return {
+        "matched": matched,
+        "missing": missing,
+        "missing_required": missing_required,
+        "out_of_order": out_of_order
+    }
+
+
 def parse_proposal(proposal_content: str) -> dict:
     """解析proposal.md中的关键信息"""
     proposal = {
         "sections_found": 0,
         "sections_expected": 0,
+        "sections": None,
         "decisions": [],
         "pkg_type": "implementation",
         "template_missing": False
     }
 
-    # 从模板动态获取期望的章节（语言无关）
-    expected_sections, template_missing = get_template_sections()
-    proposal["sections_expected"] = len(expected_sections)
+    # 从模板章节索引获取期望的章节（语言无关）
+    index, template_missing = get_section_index()
+    proposal["sections_expected"] = len(index)
     proposal["template_missing"] = template_missing
 
-    # 检测实际存在的章节
-    for section in expected_sections:
-        # 移除编号前缀（如 "1. "）和可选标记（如 "（可选）"）
-        core = re.sub(r'^\d+\.\s*', '', section)
-        core = re.sub(r'[（(].*?[）)]', '', core).strip()
-        if core and core in proposal_content:
-            proposal["sections_found"] += 1
+    # 按实际 ## 标题匹配（而非全文子串搜索）
+    sections = match_sections(proposal_content)
+    proposal["sections"] = sections
+    proposal["sections_found"] = len(sections["matched"])
 
     # 提取决策ID（语言无关：#D001格式）
     proposal["decisions"] = re.findall(r'#D\d{3}', proposal_content)
@@ -171,6 +267,16 @@ def validate_package(package_path: Path) -> dict:
             # 检查模板是否缺失
             if result["proposal"].get("template_missing", False):
                 result["warnings"].append("模板文件缺失 (plan/proposal.md)，章节验证已跳过")
+            else:
+                sections = result["proposal"]["sections"]
+                if sections["missing_required"]:
+                    result["warnings"].append(
+                        f"proposal.md 缺少必需章节: {', '.join(sections['missing_required'])}"
+                    )
+                for item in sections["out_of_order"]:
+                    result["warnings"].append(
+                        f"proposal.md 章节顺序与模板不一致: {item['section']} (第{item['line']}行)"
+                    )
         except Exception as e:
             result["warnings"].append(f"解析proposal.md失败: {str(e)}")
 
@@ -200,6 +306,19 @@ def validate_package(package_path: Path) -> dict:
                 elif result["tasks"]["by_status"]["failed"] > 0:
                     result["warnings"].append(f"存在{result['tasks']['by_status']['failed']}个失败任务")
 
+            if result["tasks"]["status_block_stale"]:
+                result["warnings"].append("tasks.md 执行状态与任务列表不一致（可使用 --fix 重新计算）")
+
+            # 检查任务依赖（环导致相关任务永远无法执行）
+            graph = analyze_tasks(content)
+            for cycle in graph["cycles"]:
+                result["issues"].append(f"任务依赖存在环: {' → '.join(cycle + cycle[:1])}")
+                result["executable"] = False
+            for item in graph["dangling"]:
+                result["warnings"].append(
+                    f"任务 {item['task']} 依赖不存在的任务: {item['ref']} (第{item['line']}行)"
+                )
+
         except Exception as e:
             result["issues"].append(f"解析tasks.md失败: {str(e)}")
             result["valid"] = False
@@ -207,35 +326,259 @@ def validate_package(package_path: Path) -> dict:
     return result
 
 
-def validate_all_packages(plan_path: Path) -> dict:
-    """验证所有方案包"""
+class ValidationCache:
+    """
+    方案包验证结果缓存（按内容哈希命中）
+
+    缓存键为 proposal.md、tasks.md 与 plan/proposal.md 模板内容的 SHA-256，
+    任一文件变化即失效；缓存文件位于 helloagents/.validate_cache.json。
+
+    用法:
+        cache = ValidationCache(workspace)
+        result = cache.get(package_path)
+        if result is None:
+            result = validate_package(package_path)
+            cache.put(package_path, result)
+        cache.save()
+    """
+
+    def __init__(self, workspace: Path):
+        self.cache_file = workspace / VALIDATION_CACHE_FILE
+        self._entries: Dict[str, Dict] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._dirty = False
+        self._template_digest = self._digest_template()
+        self._load()
+
+    @staticmethod
+    def _digest_template() -> str:
+        template = get_template_loader().load("plan/proposal.md")
+        if template is None:
+            return "missing"
+        return hashlib.sha256(template.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        try:
+            data = json.loads(self.cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == VALIDATION_CACHE_VERSION:
+            self._entries = data.get("entries", {})
+
+    def fingerprint(self, package_path: Path) -> str:
+        """计算方案包内容指纹（模板 + 必需文件内容）"""
+        key = str(package_path.resolve())
+        if key not in self._fingerprints:
+            h = hashlib.sha256(self._template_digest.encode('utf-8'))
+            for file in REQUIRED_FILES:
+                h.update(b"\0" + file.encode('utf-8') + b"\0")
+                try:
+                    h.update((package_path / file).read_bytes())
+                except FileNotFoundError:
+                    h.update(b"<missing>")
+            self._fingerprints[key] = h.hexdigest()
+        return self._fingerprints[key]
+
+    def get(self, package_path: Path) -> Optional[Dict]:
+        """命中时返回缓存结果副本，否则返回 None"""
+        entry = self._entries.get(str(package_path.resolve()))
+        if entry and entry.get("hash") == self.fingerprint(package_path):
+            result = json.loads(json.dumps(entry["result"]))
+            result["path"] = str(package_path)
+            return result
+        return None
+
+    def put(self, package_path: Path, result: Dict):
+        """写入验证结果"""
+        self._entries[str(package_path.resolve())] = {
+            "hash": self.fingerprint(package_path),
+            "result": result
+        }
+        self._dirty = True
+
+    def prune(self):
+        """移除已不存在的方案包条目"""
+        stale = [key for key in self._entries if not Path(key).is_dir()]
+        for key in stale:
+            del self._entries[key]
+        self._dirty = self._dirty or bool(stale)
+
+    def save(self):
+        """原子写入缓存文件（工作空间不存在时跳过）"""
+        if not self._dirty or not self.cache_file.parent.is_dir():
+            return
+        write_bytes_atomic(self.cache_file, json.dumps({
+            "version": VALIDATION_CACHE_VERSION,
+            "entries": self._entries
+        }, ensure_ascii=False).encode('utf-8'))
+        self._dirty = False
+
+
+def graph_package(package_path: Path) -> dict:
+    """
+    分析方案包的任务依赖图
+
+    Args:
+        package_path: 方案包目录
+
+    Returns:
+        {"name", "path", "valid", "tasks", "edges", "cycles", "dangling",
+         "critical_path", "waves", "blocked"}，tasks.md 缺失时含 "error"
+    """
+    tasks_path = package_path / "tasks.md"
+    if not tasks_path.is_file():
+        return {
+            "name": package_path.name,
+            "path": str(package_path),
+            "valid": False,
+            "error": "缺少必需文件: tasks.md"
+        }
+
+    graph = analyze_tasks(tasks_path.read_text(encoding="utf-8"))
+    return {"name": package_path.name, "path": str(package_path), **graph}
+
+
+def fix_package(package_path: Path) -> bool:
+    """
+    按任务列表重新计算 tasks.md 的执行状态（仅替换代码块内容，原子写入）
+
+    读改写期间持有方案包 tasks.md 锁，与 update_task.py 的并发更新互不覆盖。
+
+    Returns:
+        是否修改了文件
+    """
+    tasks_path = package_path / "tasks.md"
+    if not tasks_path.is_file():
+        return False
+    with tasks_lock(tasks_path):
+        try:
+            data = tasks_path.read_bytes()
+        except FileNotFoundError:
+            return False
+        patch = status_block_patch(parse_task_stream(io.BytesIO(data)), data)
+        if patch is None:
+            return False
+        start, end, replacement = patch
+        write_bytes_atomic(tasks_path, data[:start] + replacement + data[end:])
+    return True
+
+
+def validate_package_cached(package_path: Path, cache: Optional[ValidationCache]) -> dict:
+    """带缓存的单包验证，结果中 cached 字段标记是否命中缓存"""
+    if cache is not None:
+        result = cache.get(package_path)
+        if result is not None:
+            result["cached"] = True
+            return result
+
+    result = validate_package(package_path)
+    if cache is not None:
+        cache.put(package_path, result)
+    return dict(result, cached=False)
+
+
+def collect_package_dirs(plan_path: Path, archive_path: Optional[Path] = None) -> List[Tuple[str, Path]]:
+    """
+    收集待验证的方案包目录（确定性排序）
+
+    Args:
+        plan_path: plan/ 目录
+        archive_path: archive/ 目录，None 表示不包含归档
+
+    Returns:
+        [(scope, package_path)]，plan/ 在前，archive/ 按年月、名称排序
+    """
+    dirs: List[Tuple[str, Path]] = []
+
+    # plan/ 目录不存在是正常情况（新项目）
+    if plan_path.is_dir():
+        for item in sorted(plan_path.iterdir()):
+            if item.is_dir() and not item.name.startswith("."):
+                dirs.append(("plan", item))
+
+    if archive_path is not None and archive_path.is_dir():
+        for month_dir in sorted(archive_path.iterdir()):
+            if not month_dir.is_dir() or month_dir.name.startswith("."):
+                continue
+            for item in sorted(month_dir.iterdir()):
+                if item.is_dir() and not item.name.startswith("."):
+                    dirs.append(("archive", item))
+
+    return dirs
+
+
+def validate_all_packages(plan_path: Path, jobs: int = 1, archive_path: Optional[Path] = None,
+                          cache: Optional[ValidationCache] = None) -> dict:
+    """
+    验证所有方案包
+
+    Args:
+        plan_path: plan/ 目录
+        jobs: 并行进程数（<=1 为串行）
+        archive_path: 同时验证的 archive/ 目录，None 表示仅验证 plan/
+        cache: 验证结果缓存，None 表示不使用缓存
+
+    Returns:
+        汇总结果，packages 顺序与串行验证一致；cached 为命中缓存的方案包数
+    """
     results = {
         "timestamp": datetime.now().isoformat(),
         "plan_path": str(plan_path),
+        "archive_path": str(archive_path) if archive_path is not None else None,
         "total": 0,
         "valid": 0,
         "invalid": 0,
         "executable": 0,
+        "cached": 0,
         "packages": []
     }
+    if archive_path is None:
+        del results["archive_path"]
+
+    package_dirs = collect_package_dirs(plan_path, archive_path)
+    paths = [path for _, path in package_dirs]
+
+    # 先查缓存，仅对未命中的方案包执行验证
+    pkg_results: List[Optional[dict]] = [None] * len(paths)
+    misses = []
+    for i, path in enumerate(paths):
+        cached = cache.get(path) if cache is not None else None
+        if cached is not None:
+            cached["cached"] = True
+            pkg_results[i] = cached
+        else:
+            misses.append(i)
+
+    miss_paths = [paths[i] for i in misses]
+    if jobs > 1 and len(miss_paths) > 1:
+        # Executor.map 按提交顺序返回结果，保证输出顺序确定
+        workers = min(jobs, len(miss_paths))
+        chunksize = max(1, len(miss_paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(validate_package, miss_paths, chunksize=chunksize))
+    else:
+        fresh = [validate_package(path) for path in miss_paths]
 
-    # plan/ 目录不存在是正常情况（新项目），返回空结果即可
-    if not plan_path.is_dir():
-        return results
+    for i, result in zip(misses, fresh):
+        if cache is not None:
+            cache.put(paths[i], result)
+        pkg_results[i] = dict(result, cached=False)
 
-    for item in sorted(plan_path.iterdir()):
-        if item.is_dir() and not item.name.startswith("."):
-            pkg_result = validate_package(item)
-            results["packages"].append(pkg_result)
-            results["total"] += 1
+    for (scope, _), pkg_result in zip(package_dirs, pkg_results):
+        pkg_result["scope"] = scope
+        results["packages"].append(pkg_result)
+        results["total"] += 1
 
-            if pkg_result["valid"]:
-                results["valid"] += 1
-            else:
-                results["invalid"] += 1
+        if pkg_result["valid"]:
+            results["valid"] += 1
+        else:
+            results["invalid"] += 1
+
+        if pkg_result["executable"]:
+            results["executable"] += 1
 
-            if pkg_result["executable"]:
-                results["executable"] += 1
+        if pkg_result["cached"]:
+            results["cached"] += 1
 
     return results
 
@@ -258,8 +601,36 @@ def main():
         default=None,
         help="项目根目录（默认: 当前目录）"
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="并行验证进程数（默认: 1，0 表示使用全部 CPU）"
+    )
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="同时验证 archive/ 中的方案包"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不使用验证结果缓存（强制重新验证）"
+    )
+    parser.add_argument(
+        "--graph",
+        action="store_true",
+        help="输出指定方案包的任务依赖图（环、悬空引用、关键路径、可并行批次）"
+    )
+    parser.add_argument(
+        "--fix",
+        action="store_true",
+        help="验证前按任务列表重新计算 tasks.md 执行状态"
+    )
 
     args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
 
     # 验证基础路径
     try:
@@ -273,6 +644,14 @@ def main():
 
     # 获取 plan/ 目录
     plan_path = get_plan_path(args.path)
+    cache = None if args.no_cache else ValidationCache(get_workspace_path(args.path))
+
+    if args.graph and not args.package:
+        print(json.dumps({
+            "error": "--graph 需要指定方案包名称",
+            "valid": False
+        }, ensure_ascii=False, indent=2))
+        sys.exit(1)
 
     # 判断是验证单个包还是所有包
     if args.package:
@@ -283,8 +662,17 @@ def main():
             # 尝试作为完整路径
             package_path = Path(args.package)
 
-        if package_path.is_dir():
-            result = validate_package(package_path)
+        if package_path.is_dir() and args.graph:
+            result = graph_package(package_path)
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+            sys.exit(0 if result["valid"] else 1)
+        elif package_path.is_dir():
+            fixed = fix_package(package_path) if args.fix else False
+            result = validate_package_cached(package_path, cache)
+            if args.fix:
+                result["fixed"] = fixed
+            if cache is not None:
+                cache.save()
             print(json.dumps(result, ensure_ascii=False, indent=2))
             sys.exit(0 if result["valid"] else 1)
         else:
@@ -295,7 +683,16 @@ def main():
             sys.exit(1)
     else:
         # 验证所有方案包
-        results = validate_all_packages(plan_path)
+        archive_path = get_archive_path(args.path) if args.archive else None
+        fixed = []
+        if args.fix:
+            fixed = [path.name for _, path in collect_package_dirs(plan_path, archive_path) if fix_package(path)]
+        results = validate_all_packages(plan_path, jobs=jobs, archive_path=archive_path, cache=cache)
+        if args.fix:
+            results["fixed"] = fixed
+        if cache is not None:
+            cache.prune()
+            cache.save()
         print(json.dumps(results, ensure_ascii=False, indent=2))
 
         # 返回状态码: 0=全部有效, 1=存在无效方案包